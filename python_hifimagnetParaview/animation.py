@@ -0,0 +1,435 @@
+import os
+import shutil
+import subprocess
+
+import numpy as np
+
+# animations of transient cases: the geometry of a view (1/4 cut out, slice) is
+# cut once, at the first time step, and frozen with the interpolation weights of
+# its points in the cells of the dataset (see freeze); at each time step only the
+# field arrays are interpolated onto it (see remap), so that a frame costs the
+# read of the variables and the render
+#   frozen: key -> frozen geometry, stored where the data are by the freeze script
+#
+# frames are assembled into a movie by a local encoder (ffmpeg)
+_animation = {
+    "frozen": {},
+}
+
+# points of the simplex cells (vertex, line, triangle, tetra) by vtk cell type,
+# the weights of points in other cells are computed by the cell functions
+_simplices = {1: 1, 3: 2, 5: 3, 10: 4}
+
+
+def timesteps(input) -> list[float]:
+    """returns the time steps of a paraview source
+
+    Args:
+        input: paraview reader
+
+    Returns:
+        list[float]: time values, empty for a static dataset
+    """
+
+    values = input.TimestepValues
+    if values is None:
+        return []
+    if isinstance(values, (int, float)):
+        return [float(values)]
+    return [float(value) for value in values]
+
+
+def owners(offsets, connectivity, npoints: int):
+    """returns a cell of each point, -1 for points of no cell
+
+    Args:
+        offsets: (m + 1,) start of each cell in connectivity
+        connectivity: point ids of cells
+        npoints (int): number of points
+
+    Returns:
+        np.ndarray: (npoints,) cell ids
+    """
+
+    offsets = np.asarray(offsets, dtype=np.int64)
+    owner = np.full(npoints, -1, dtype=np.int64)
+    owner[np.asarray(connectivity, dtype=np.int64)] = np.repeat(
+        np.arange(len(offsets) - 1), np.diff(offsets)
+    )
+    return owner
+
+
+def barycentric(points, corners):
+    """returns the barycentric coordinates of points in simplices
+
+    Args:
+        points: (n, 3) point coordinates
+        corners: (n, k + 1, 3) coordinates of the simplex of each point
+
+    Returns:
+        np.ndarray: (n, k + 1) weights of the corners
+    """
+
+    points = np.asarray(points, dtype=np.float64)
+    corners = np.asarray(corners, dtype=np.float64)
+    if corners.shape[1] == 1:
+        return np.ones((len(points), 1))
+
+    # least squares in the simplex plane (triangles and lines are embedded in 3D)
+    edges = corners[:, 1:] - corners[:, :1]
+    gram = np.einsum("nid,njd->nij", edges, edges)
+    rhs = np.einsum("nid,nd->ni", edges, points - corners[:, 0])
+    coords = np.einsum("nij,nj->ni", np.linalg.pinv(gram), rhs)
+    return np.concatenate([1 - coords.sum(axis=1, keepdims=True), coords], axis=1)
+
+
+def weights(points, cells, offsets, connectivity, types, sourcepoints):
+    """returns the interpolation weights of points in cells of a dataset
+
+    Args:
+        points: (n, 3) point coordinates
+        cells: (n,) cell of the dataset containing each point, -1 if none
+        offsets: (m + 1,) start of each cell of the dataset in connectivity
+        connectivity: point ids of the cells of the dataset
+        types: (m,) vtk cell types of the dataset
+        sourcepoints: point coordinates of the dataset
+
+    Returns:
+        tuple: (ids, weights, pending), ids and weights (n, width) of the dataset
+        points, pending (n,) points of non simplex cells whose weights are left
+        to compute (see vtkCell.EvaluatePosition)
+    """
+
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    cells = np.asarray(cells, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    connectivity = np.asarray(connectivity, dtype=np.int64)
+    types = np.asarray(types)
+    sourcepoints = np.asarray(sourcepoints, dtype=np.float64).reshape(-1, 3)
+
+    valid = cells >= 0
+    sizes = np.zeros(len(points), dtype=np.int64)
+    sizes[valid] = offsets[cells[valid] + 1] - offsets[cells[valid]]
+    width = max(1, int(sizes.max(initial=0)))
+    ids = np.zeros((len(points), width), dtype=np.int64)
+    w = np.zeros((len(points), width))
+
+    # point ids of the cell of each point
+    (rows, columns) = np.nonzero(np.arange(width) < sizes[:, None])
+    ids[rows, columns] = connectivity[offsets[cells[rows]] + columns]
+
+    pending = valid.copy()
+    for celltype, size in _simplices.items():
+        selected = np.nonzero(valid & (types[np.maximum(cells, 0)] == celltype))[0]
+        if selected.size == 0:
+            continue
+        corners = sourcepoints[ids[selected, :size]]
+        w[selected, :size] = barycentric(points[selected], corners)
+        pending[selected] = False
+    return ids, w, pending
+
+
+def interpolate(values, ids, weights):
+    """returns values of a dataset interpolated at points (see weights)
+
+    integer values (eg. markers) are not interpolated: the value of the
+    nearest point (largest weight) is taken
+
+    Args:
+        values: (m,) or (m, c) point values of the dataset
+        ids: (n, width) point ids
+        weights: (n, width) weights
+
+    Returns:
+        np.ndarray: (n,) or (n, c) values
+    """
+
+    values = np.asarray(values)
+    if not np.issubdtype(values.dtype, np.floating):
+        nearest = np.asarray(weights).argmax(axis=1)
+        return values[np.asarray(ids)[np.arange(len(nearest)), nearest]]
+    result = np.einsum("pk,pk...->p...", weights, values[ids])
+    return result.astype(values.dtype)
+
+
+# script of the cell ids (see cellIds): each cell is tagged by its id in its block
+_cellIdsScript = """
+import numpy
+
+output.VTKObject.ShallowCopy(inputs[0].VTKObject)
+blocks = [output]
+if output.VTKObject.IsA("vtkCompositeDataSet"):
+    blocks = list(output)
+
+for block in blocks:
+    block.CellData.append(
+        numpy.arange(block.GetNumberOfCells(), dtype=numpy.int64), "AnimationCellIds"
+    )
+"""
+
+
+def cellIds(input):
+    """tag the cells of input by their id (AnimationCellIds CellData)
+
+    the cells of views cut from the output keep the id of their dataset cell
+
+    Args:
+        input: paraview reader
+
+    Returns:
+        paraview reader
+    """
+
+    from paraview.simple import ProgrammableFilter
+
+    cellids = ProgrammableFilter(registrationName="AnimationCellIds", Input=input)
+    cellids.Script = _cellIdsScript
+    cellids.UpdatePipeline()
+    return cellids
+
+
+# script of the frozen geometry (see freeze)
+#   inputs[0]: geometry of the view, cut from inputs[1]
+#   inputs[1]: dataset tagged by cellIds
+#   key: key of the frozen geometry
+_freezeScript = """
+import numpy
+from vtkmodules.vtkCommonCore import reference
+from vtkmodules.vtkCommonDataModel import vtkGenericCell
+from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+from python_hifimagnetParaview import animation
+
+
+def cells(dataset):
+    # offsets and connectivity of the cells, in cell id order
+    parts = [dataset.GetCells()] if dataset.IsA("vtkUnstructuredGrid") else []
+    if dataset.IsA("vtkPolyData"):
+        parts = [
+            dataset.GetVerts(),
+            dataset.GetLines(),
+            dataset.GetPolys(),
+            dataset.GetStrips(),
+        ]
+    (offsets, connectivity, base) = ([numpy.zeros(1, dtype=numpy.int64)], [], 0)
+    for part in parts:
+        connectivity.append(vtk_to_numpy(part.GetConnectivityArray()))
+        offsets.append(vtk_to_numpy(part.GetOffsetsArray())[1:] + base)
+        base += len(connectivity[-1])
+    connectivity = connectivity or [numpy.zeros(0, dtype=numpy.int64)]
+    return (numpy.concatenate(offsets), numpy.concatenate(connectivity))
+
+
+def array(data, name):
+    result = numpy_to_vtk(numpy.ascontiguousarray(data), deep=1)
+    result.SetName(name)
+    return result
+
+
+(geometry, source) = (inputs[0].VTKObject, inputs[1].VTKObject)
+frozen = geometry.NewInstance()
+frozen.CopyStructure(geometry)
+iterator = geometry.NewTreeIterator()
+iterator.VisitOnlyLeavesOn()
+iterator.InitTraversal()
+while not iterator.IsDoneWithTraversal():
+    leaf = iterator.GetCurrentDataObject()
+    dataset = source.GetDataSet(iterator)
+    block = leaf.NewInstance()
+    block.CopyStructure(leaf)
+    frozen.SetDataSet(iterator, block)
+    if leaf.GetNumberOfPoints() == 0 or dataset is None:
+        iterator.GoToNextItem()
+        continue
+    if not dataset.IsA("vtkUnstructuredGrid"):
+        iterator.GoToNextItem()
+        continue
+
+    points = vtk_to_numpy(leaf.GetPoints().GetData())
+    cellids = vtk_to_numpy(leaf.GetCellData().GetArray("AnimationCellIds"))
+    (offsets, connectivity) = cells(leaf)
+    owner = animation.owners(offsets, connectivity, len(points))
+    owner = numpy.where(owner >= 0, cellids[numpy.maximum(owner, 0)], -1)
+
+    (ids, weights, pending) = animation.weights(
+        points,
+        owner,
+        vtk_to_numpy(dataset.GetCells().GetOffsetsArray()),
+        vtk_to_numpy(dataset.GetCells().GetConnectivityArray()),
+        vtk_to_numpy(dataset.GetCellTypesArray()),
+        vtk_to_numpy(dataset.GetPoints().GetData()),
+    )
+
+    # other cells: weights from the cell functions
+    cell = vtkGenericCell()
+    (closest, pcoords, buffer) = ([0.0] * 3, [0.0] * 3, [0.0] * ids.shape[1])
+    (subId, dist2) = (reference(0), reference(0.0))
+    for p in numpy.nonzero(pending)[0]:
+        dataset.GetCell(int(owner[p]), cell)
+        cell.EvaluatePosition(points[p], closest, subId, pcoords, dist2, buffer)
+        size = cell.GetNumberOfPoints()
+        weights[p, :size] = buffer[:size]
+
+    block.GetPointData().AddArray(array(ids, "AnimationPointIds"))
+    block.GetPointData().AddArray(array(weights, "AnimationWeights"))
+    block.GetCellData().AddArray(array(cellids, "AnimationCellIds"))
+    iterator.GoToNextItem()
+
+animation._animation["frozen"][{key!r}] = frozen
+output.VTKObject.ShallowCopy(geometry)
+"""
+
+
+def freeze(input, source, key: str, time: float):
+    """freeze the geometry of a view with the interpolation weights of its points
+
+    the geometry is cut from source (see cellIds) at time, the mesh is static
+
+    Args:
+        input: geometry of the view (eg. clip or slice of source)
+        source: dataset tagged by cellIds
+        key (str): key of the frozen geometry (see remap)
+        time (float): time step of the geometry
+    """
+
+    from paraview.simple import ProgrammableFilter
+
+    print(f"freeze: key={key}, time={time}", flush=True)
+    frozen = ProgrammableFilter(registrationName="Freeze", Input=[input, source])
+    frozen.Script = _freezeScript.format(key=key)
+    frozen.UpdatePipeline(time)
+    return frozen
+
+
+# script of the fields of a frozen geometry at the pipeline time (see remap)
+#   key: key of the frozen geometry
+_remapScript = """
+import numpy
+from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+from python_hifimagnetParaview import animation
+
+
+def array(data, name):
+    result = numpy_to_vtk(numpy.ascontiguousarray(data), deep=1)
+    result.SetName(name)
+    return result
+
+
+(frozen, source) = (animation._animation["frozen"][{key!r}], inputs[0].VTKObject)
+output.VTKObject.ShallowCopy(frozen)
+iterator = output.VTKObject.NewTreeIterator()
+iterator.VisitOnlyLeavesOn()
+iterator.InitTraversal()
+while not iterator.IsDoneWithTraversal():
+    leaf = iterator.GetCurrentDataObject()
+    block = leaf.NewInstance()
+    block.CopyStructure(leaf)
+    dataset = source.GetDataSet(iterator)
+    mapped = leaf.GetPointData().GetArray("AnimationPointIds") is not None
+    if dataset is not None and mapped:
+        npoints = leaf.GetNumberOfPoints()
+        ids = vtk_to_numpy(leaf.GetPointData().GetArray("AnimationPointIds"))
+        weights = vtk_to_numpy(leaf.GetPointData().GetArray("AnimationWeights"))
+        (ids, weights) = (ids.reshape(npoints, -1), weights.reshape(npoints, -1))
+        cellids = vtk_to_numpy(leaf.GetCellData().GetArray("AnimationCellIds"))
+
+        data = dataset.GetPointData()
+        for i in range(data.GetNumberOfArrays()):
+            if data.GetArray(i) is None:
+                continue
+            values = animation.interpolate(vtk_to_numpy(data.GetArray(i)), ids, weights)
+            block.GetPointData().AddArray(array(values, data.GetArrayName(i)))
+        data = dataset.GetCellData()
+        for i in range(data.GetNumberOfArrays()):
+            if data.GetArray(i) is None:
+                continue
+            values = vtk_to_numpy(data.GetArray(i))[cellids]
+            block.GetCellData().AddArray(array(values, data.GetArrayName(i)))
+    output.VTKObject.SetDataSet(iterator, block)
+    iterator.GoToNextItem()
+"""
+
+
+def remap(input, key: str):
+    """returns the frozen geometry key with the fields of input at the view time
+
+    Args:
+        input: paraview reader, source of the frozen geometry (see freeze)
+        key (str): key of the frozen geometry
+
+    Returns:
+        paraview reader
+    """
+
+    from paraview.simple import ProgrammableFilter
+
+    remapped = ProgrammableFilter(registrationName=f"Remap{key}", Input=input)
+    remapped.Script = _remapScript.format(key=key)
+    return remapped
+
+
+def release():
+    """forget the frozen geometries"""
+
+    _animation["frozen"] = {}
+
+
+def command(pattern: str, filename: str, fps: int) -> list[str]:
+    """returns the ffmpeg command assembling frames into a movie
+
+    Args:
+        pattern (str): frame files (eg. frames/%04d.png)
+        filename (str): movie file name, mp4 (h264) or gif
+        fps (int): frames per second
+
+    Returns:
+        list[str]: command line
+    """
+
+    args = ["ffmpeg", "-y", "-loglevel", "error", "-framerate", str(fps)]
+    args += ["-i", pattern]
+    match os.path.splitext(filename)[1]:
+        case ".mp4":
+            # h264 requires even dimensions
+            args += ["-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2"]
+            args += ["-c:v", "libx264", "-pix_fmt", "yuv420p"]
+        case ".gif":
+            args += ["-vf", "split[a][b];[a]palettegen[p];[b][p]paletteuse"]
+        case extension:
+            raise RuntimeError(f"animation: unsupported movie format {extension}")
+    return args + [filename]
+
+
+def encode(pattern: str, filename: str, fps: int):
+    """assemble frames into a movie with ffmpeg
+
+    Args:
+        pattern (str): frame files (eg. frames/%04d.png)
+        filename (str): movie file name
+        fps (int): frames per second
+    """
+
+    result = subprocess.run(
+        command(pattern, filename, fps), capture_output=True, text=True
+    )
+    if result.returncode:
+        raise RuntimeError(f"ffmpeg {filename}: {result.stderr.strip()}")
+
+
+def save(pattern: str, filename: str, fps: int):
+    """assemble frames into a movie, once the frames are written (see writer)
+
+    without ffmpeg, the frames are kept as is
+
+    Args:
+        pattern (str): frame files (eg. frames/%04d.png)
+        filename (str): movie file name
+        fps (int): frames per second
+    """
+
+    from .writer import submit
+
+    if shutil.which("ffmpeg") is None:
+        print(f"animation: ffmpeg not found, {filename} frames: {pattern}", flush=True)
+        return
+    print(f"animation: {filename}", flush=True)
+    submit(filename, encode, pattern, filename, fps)
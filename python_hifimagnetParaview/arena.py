@@ -0,0 +1,204 @@
+import functools
+import contextlib
+
+from . import cache, profiling
+
+# proxy lifecycle: the paraview sources, views and representations created
+# in a scope are owned by the scope and deleted when it ends
+#   budget: memory budget in MB of paraview data checked at scope end (None: none)
+#   verbose: print the proxies released at scope end
+#   scopes: running scopes, innermost last, each {name, kept}
+#   reports: finished scopes {name, released, memory}, in completion order
+_arena = {
+    "budget": None,
+    "verbose": False,
+    "scopes": [],
+    "reports": [],
+}
+
+# proxy manager groups owned by scopes, released in this order
+_groups = ["representations", "views", "sources"]
+
+
+def configure(budget: float = None, verbose: bool = False):
+    """set the memory budget and the verbosity of scopes
+
+    Args:
+        budget (float, optional): memory budget in MB of paraview data. Defaults to None.
+        verbose (bool, optional): print released proxies. Defaults to False.
+    """
+
+    _arena["budget"] = budget
+    _arena["verbose"] = verbose
+    _arena["reports"] = []
+
+
+def _registered() -> dict:
+    """returns the registered proxies of the owned groups
+
+    Returns:
+        dict: global id -> (group, name, proxy)
+    """
+
+    from paraview import servermanager
+
+    pxm = servermanager.ProxyManager()
+    registered = {}
+    for group in _groups:
+        for (name, gid), proxy in pxm.GetProxiesInGroup(group).items():
+            registered[gid] = (group, name, proxy)
+    return registered
+
+
+def _upstream(proxies: list) -> set:
+    """returns the global ids of proxies and of all their producers"""
+
+    ids = set()
+    stack = [proxy.SMProxy for proxy in proxies if proxy is not None]
+    while stack:
+        smproxy = stack.pop()
+        gid = smproxy.GetGlobalIDAsString()
+        if gid in ids:
+            continue
+        ids.add(gid)
+        for i in range(smproxy.GetNumberOfProducers()):
+            stack.append(smproxy.GetProducerProxy(i))
+    return ids
+
+
+def keep(proxy):
+    """hand proxy over to the enclosing scope instead of deleting it
+
+    Args:
+        proxy: paraview proxy created in the current scope
+
+    Returns:
+        proxy
+    """
+
+    if _arena["scopes"]:
+        _arena["scopes"][-1]["kept"].append(proxy)
+    return proxy
+
+
+def largest(count: int = 3) -> list[tuple]:
+    """returns the sources holding the most data
+
+    Args:
+        count (int, optional): number of sources. Defaults to 3.
+
+    Returns:
+        list[tuple]: (name, memory in MB), largest first
+    """
+
+    from paraview.simple import GetSources
+
+    sizes = [
+        (name, proxy.GetDataInformation().DataInformation.GetMemorySize() / 1024)
+        for (name, gid), proxy in GetSources().items()
+    ]
+    return sorted(sizes, key=lambda item: item[1], reverse=True)[:count]
+
+
+def _release(name: str, known: set, kept: list) -> dict:
+    """delete the proxies registered since known, except kept and cached ones
+
+    Args:
+        name (str): scope name
+        known (set): global ids registered at scope start
+        kept (list): proxies handed over to the enclosing scope
+
+    Returns:
+        dict: scope report
+    """
+
+    from paraview import servermanager
+    from paraview.simple import Delete
+
+    preserved = _upstream(kept + cache.proxies())
+    owned = {
+        gid: item
+        for gid, item in _registered().items()
+        if gid not in known and gid not in preserved
+    }
+
+    # downstream first: representations, views, then sources latest first
+    pxm = servermanager.ProxyManager()
+    released = []
+    order = sorted(owned, key=lambda gid: (_groups.index(owned[gid][0]), -int(gid)))
+    for gid in order:
+        (group, pname, proxy) = owned[gid]
+        # representations are removed with their view
+        if not pxm.GetProxyName(group, proxy):
+            continue
+        Delete(proxy)
+        released.append(f"{group}/{pname}")
+    if released and _arena["verbose"]:
+        print(f"arena {name}: released {len(released)} proxies {released}", flush=True)
+
+    report = {"name": name, "released": released, "memory": None}
+    budget = _arena["budget"]
+    if budget is not None:
+        (_, memory) = profiling.vtkinfo()
+        report["memory"] = memory
+        if memory > budget:
+            print(
+                f"arena {name}: paraview data {memory:.1f} MB exceeds memory budget {budget} MB, largest sources: {largest()}",
+                flush=True,
+            )
+    return report
+
+
+@contextlib.contextmanager
+def scope(name: str):
+    """own the paraview proxies and views created in a stage
+
+    Every source, view and representation registered in the scope is deleted
+    when the scope ends, downstream first, unless it is handed over to the
+    enclosing scope with keep or shared through cache.get.
+    The proxies released are reported as leaks and the memory budget is checked.
+
+    Args:
+        name (str): scope name
+    """
+
+    known = set(_registered())
+    current = {"name": name, "kept": []}
+    _arena["scopes"].append(current)
+    try:
+        yield current
+    finally:
+        _arena["scopes"].pop()
+        _arena["reports"].append(_release(name, known, current["kept"]))
+
+
+def owned(name: str):
+    """decorator running each call of a function in its own scope
+
+    the function must not return proxies (see keep)
+
+    Args:
+        name (str): scope name
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with scope(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def leaks() -> dict:
+    """returns the number of proxies released at scope end per scope name"""
+
+    counts = {}
+    for report in _arena["reports"]:
+        if report["released"]:
+            counts[report["name"]] = counts.get(report["name"], 0) + len(
+                report["released"]
+            )
+    return counts
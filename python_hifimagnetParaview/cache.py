@@ -0,0 +1,66 @@
+# cache of derived pipeline objects (conversion, clip, slice, deformed warp)
+#   proxies: dict of (builder, input, parameters) -> [input, proxy]
+#
+# the input is kept with the proxy so that its id is not reused while cached
+_cache = {
+    "proxies": {},
+}
+
+
+def _hashable(value):
+    """returns a hashable version of value (lists are turned into tuples)"""
+
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _hashable(item)) for key, item in value.items()))
+    return value
+
+
+def get(builder, input, *args, **kwargs):
+    """returns builder(input, *args, **kwargs), built once per run
+
+    Identical intermediate filters (same builder, same input and same parameters)
+    are shared by all consumers (stats, plots, views) until release is called.
+    Cached proxies must not be deleted by consumers.
+
+    Args:
+        builder: function creating a paraview filter from input (eg. view.makeclip)
+        input: paraview reader
+
+    Returns:
+        paraview filter
+    """
+
+    # the builder itself: builders of different modules may share a name
+    # (eg. meshinfo.derive and meshinfoAxi.derive)
+    key = (builder, id(input), _hashable(args), _hashable(kwargs))
+    if key not in _cache["proxies"]:
+        _cache["proxies"][key] = [input, builder(input, *args, **kwargs)]
+    return _cache["proxies"][key][1]
+
+
+def size() -> int:
+    """returns the number of cached proxies"""
+
+    return len(_cache["proxies"])
+
+
+def release():
+    """delete all cached proxies, downstream filters first"""
+
+    if not _cache["proxies"]:
+        return
+
+    from paraview.simple import Delete
+
+    for input, proxy in reversed(list(_cache["proxies"].values())):
+        if proxy is not input:
+            Delete(proxy)
+    _cache["proxies"] = {}
+
+
+def proxies() -> list:
+    """returns the cached proxies and their inputs"""
+
+    return [item for entry in _cache["proxies"].values() for item in entry]
@@ -1,10 +1,8 @@
 import os
-import gc
 
 from paraview.simple import (
     BoundingRuler,
     Text,
-    Delete,
     CreateView,
     Show,
     GetScalarBar,
@@ -12,14 +10,183 @@ from paraview.simple import (
     ColorBy,
     HideScalarBarIfNotNeeded,
     GetOpacityTransferFunction,
-    SaveScreenshot,
     ExtractBlock,
+    ProgrammableFilter,
 )
 
-from ..method import selectBlocks, keyinfo
-from ..view import rangeHisto
+from .. import cache, profiling, arena, scheduler, viewcache, animation
+from .. import combine as combined
+from ..writer import saveScreenshot, submit
+from ..raster import snapshot
+from ..method import selectBlocks, keyinfo, blockRange, gatherSurface
+from ..view import deformed, rangeHisto, histogramFile
 
 
+# render sessions: view global id -> {display, text, lut, axes, displays}
+#   display: representation of the input shown, text: comment source,
+#   lut: color map of the last field displayed, axes: grids of the view,
+#   displays: input global id -> representation (see switchGeometry)
+_sessions = {}
+
+# size of views and screenshots
+_resolution = [1600, 1200]
+
+
+def _axes(display, polargrid: bool = False, background: bool = False):
+    """add the polar grid of a view to display (see renderSession)"""
+
+    if polargrid:
+        display.PolarAxes.Visibility = 1
+        # display.PolarAxes.MaximumAngle = 360.0
+        if background:
+            display.PolarAxes.PolarAxisColor = [0.0, 0.0, 0.0]
+            display.PolarAxes.PolarArcsColor = [0.0, 0.0, 0.0]
+            display.PolarAxes.LastRadialAxisColor = [0.0, 0.0, 0.0]
+            display.PolarAxes.SecondaryPolarArcsColor = [0.0, 0.0, 0.0]
+            display.PolarAxes.SecondaryRadialAxesColor = [0.0, 0.0, 0.0]
+            display.PolarAxes.PolarAxisTitleColor = [0.0, 0.0, 0.0]
+            display.PolarAxes.PolarAxisLabelColor = [0.0, 0.0, 0.0]
+            display.PolarAxes.LastRadialAxisTextColor = [0.0, 0.0, 0.0]
+            display.PolarAxes.SecondaryRadialAxesTextColor = [0.0, 0.0, 0.0]
+        display.PolarAxes.Use2DMode = 0
+
+
+def renderSession(
+    input,
+    renderView=None,
+    addruler: bool = True,
+    polargrid: bool = False,
+    printed: bool = True,
+    background: bool = False,
+):
+    """create a render view of input with its comment, axes, ruler and camera
+
+    the view is built once per geometry (see cache.get):
+    displayField only switches the colored field and the comment
+
+    Args:
+        input: paraview reader
+        renderView (optional): pre-existing renderview. Defaults to None.
+        see displayField for the other arguments
+
+    Returns:
+        renderView
+    """
+
+    if renderView is None:
+        renderView = CreateView("RenderView")
+        print("createrenderView", flush=True)
+
+    text = Text(registrationName="Text1")
+    textDisplay = Show(text, renderView)
+    textDisplay.WindowLocation = "Upper Center"
+    textDisplay.FontSize = 24
+    textDisplay.Bold = 1
+    textDisplay.Italic = 1
+    if background:
+        textDisplay.Color = [0.0, 0.0, 0.0]
+
+    display = Show(input, renderView)
+    _axes(display, polargrid=polargrid, background=background)
+
+    renderView.ResetCamera()
+    renderView.GetActiveCamera()
+
+    # Add BoundingRuler filter to get an idea of the dimension
+    if addruler:
+        print("Add ruler to see dimensions", flush=True)
+        ruler = BoundingRuler(registrationName="BoundingRuler1", Input=input)
+        ruler.Axis = "Y Axis"
+        if not printed:
+            for prop in ruler.ListProperties():
+                print(f"ruler: {prop}={ruler.GetPropertyValue(prop)}", flush=True)
+        Show(ruler, renderView)  # Reset Camera
+
+    renderView.ViewSize = _resolution
+    if not printed:
+        for prop in renderView.ListProperties():
+            print(f"renderView: {prop}={renderView.GetPropertyValue(prop)}", flush=True)
+    renderView.OrientationAxesVisibility = 1
+
+    _sessions[renderView.GetGlobalIDAsString()] = {
+        "display": display,
+        "text": text,
+        "lut": None,
+        "axes": {"polargrid": polargrid, "background": background},
+        "displays": {input.GetGlobalIDAsString(): display},
+    }
+    return renderView
+
+
+def switchGeometry(renderView, input):
+    """show input in renderView in place of the geometry shown, the camera is kept
+
+    paired views (see make2Dview): the deformed geometry is rendered in the
+    render view of the undeformed one, each geometry is shown once
+
+    Args:
+        renderView: render view of a session (see renderSession)
+        input: paraview reader
+
+    Returns:
+        display of the geometry previously shown
+    """
+
+    session = _sessions[renderView.GetGlobalIDAsString()]
+    previous = session["display"]
+    display = session["displays"].get(input.GetGlobalIDAsString())
+    if display is None:
+        camera = {
+            prop: renderView.GetPropertyValue(prop)
+            for prop in [
+                "CameraPosition",
+                "CameraFocalPoint",
+                "CameraViewUp",
+                "CameraViewAngle",
+                "CameraParallelScale",
+            ]
+        }
+        display = Show(input, renderView)
+        _axes(display, **session["axes"])
+        for prop, value in camera.items():
+            renderView.SetPropertyWithName(prop, value)
+        session["displays"][input.GetGlobalIDAsString()] = display
+
+    if display is not previous:
+        ColorBy(previous, None)
+        previous.Visibility = 0
+        display.Visibility = 1
+        session["display"] = display
+    return previous
+
+
+def saveOverlay(renderView, display, filename: str, background: bool = False):
+    """save renderView with the edges of display over the geometry shown
+
+    Args:
+        renderView: render view of a session (see renderSession)
+        display: hidden display, eg. of the undeformed geometry (see switchGeometry)
+        filename (str): name and path of the view file
+        background (bool, optional): transparent background (& edges black). Defaults to False.
+    """
+
+    representation = display.Representation
+    display.Representation = "Feature Edges"
+    display.AmbientColor = [0.0, 0.0, 0.0] if background else [1.0, 1.0, 1.0]
+    display.DiffuseColor = display.AmbientColor
+    display.Visibility = 1
+    renderView.Update()
+    saveScreenshot(
+        filename,
+        renderView,
+        ImageResolution=_resolution,
+        TransparentBackground=background,
+    )
+    display.Visibility = 0
+    display.Representation = representation
+
+
+@profiling.profiled("render")
 def displayField(
     input,
     selectedblocks: list[str],
@@ -35,6 +202,7 @@ def displayField(
     excludeBlocks: bool = False,
     background: bool = False,
     customRangeHisto: bool = False,
+    range: tuple = None,
 ):
     """display field in renderview
 
@@ -53,94 +221,55 @@ def displayField(
         excludeBlocks (bool, optional): field excluded blocks. Defaults to False.
         background (bool, optional): transparent background (& text black). Defaults to False.
         customRangeHisto (bool, optional): create custom range from field histogram. Defaults to False.
+        range (tuple, optional): color range, eg. of an animation. Defaults to None.
 
     Returns:
         renderView
     """
 
     print(f"displayField: field={field}, renderView={renderView}", flush=True)
+    setup = {
+        "addruler": addruler,
+        "polargrid": polargrid,
+        "printed": printed,
+        "background": background,
+    }
     if renderView is None:
-        renderView = CreateView("RenderView")
-        print("createrenderView", flush=True)
+        # one view per geometry, reused for all fields
+        renderView = cache.get(renderSession, input, **setup)
+    elif renderView.GetGlobalIDAsString() not in _sessions:
+        renderView = renderSession(input, renderView=renderView, **setup)
+    session = _sessions[renderView.GetGlobalIDAsString()]
+    display = session["display"]
 
     if comment is not None:
         print(f"add comment: {comment}", flush=True)
-        text = Text(registrationName="Text1")
-        text.Text = rf"{comment}"
-        textDisplay = Show(text, renderView)
-        textDisplay.WindowLocation = "Upper Center"
-        textDisplay.FontSize = 24
-        textDisplay.Bold = 1
-        textDisplay.Italic = 1
-        if background:
-            textDisplay.Color = [0.0, 0.0, 0.0]
-
-    display = Show(input, renderView)
+    session["text"].Text = rf"{comment}" if comment is not None else ""
 
     # TODO if args.field is not Magnetic something
     display.BlockSelectors = selectedblocks
-    display.ColorArrayName = color
-    if polargrid:
-        display.PolarAxes.Visibility = 1
-        # display.PolarAxes.MaximumAngle = 360.0
-        if background:
-            display.PolarAxes.PolarAxisColor = [0.0, 0.0, 0.0]
-            display.PolarAxes.PolarArcsColor = [0.0, 0.0, 0.0]
-            display.PolarAxes.LastRadialAxisColor = [0.0, 0.0, 0.0]
-            display.PolarAxes.SecondaryPolarArcsColor = [0.0, 0.0, 0.0]
-            display.PolarAxes.SecondaryRadialAxesColor = [0.0, 0.0, 0.0]
-            display.PolarAxes.PolarAxisTitleColor = [0.0, 0.0, 0.0]
-            display.PolarAxes.PolarAxisLabelColor = [0.0, 0.0, 0.0]
-            display.PolarAxes.LastRadialAxisTextColor = [0.0, 0.0, 0.0]
-            display.PolarAxes.SecondaryRadialAxesTextColor = [0.0, 0.0, 0.0]
-        display.PolarAxes.Use2DMode = 0
 
     # for vector: ColorBy(display, ('CELLS', 'magnetic_field', 'Z'))
     ColorBy(display, tuple(color))
+    if session["lut"] is not None:
+        HideScalarBarIfNotNeeded(session["lut"], renderView)
 
-    renderView.ResetCamera()
-    renderView.GetActiveCamera()
-
-    # Add BoundingRuler filter to get an idea of the dimension
-    if addruler:
-        print("Add ruler to see dimensions", flush=True)
-        ruler = BoundingRuler(registrationName="BoundingRuler1", Input=input)
-        ruler.Axis = "Y Axis"
-        if not printed:
-            for prop in ruler.ListProperties():
-                print(f"ruler: {prop}={ruler.GetPropertyValue(prop)}", flush=True)
-        Show(ruler, renderView)  # Reset Camera
-
-    resolution = [1600, 1200]
-    renderView.ViewSize = resolution
-    if not printed:
-        for prop in renderView.ListProperties():
-            print(f"renderView: {prop}={renderView.GetPropertyValue(prop)}", flush=True)
-    renderView.OrientationAxesVisibility = 1
     display.SetScalarBarVisibility(renderView, True)
     display.RescaleTransferFunctionToDataRange(True, False)
     # get color transfer function/color map for 'thermo_electricheattemperature'
     field_name = field.replace(".", "")
     LUT = GetColorTransferFunction(field_name)
     LUT.ScalarRangeInitialized = 1.0
+    session["lut"] = LUT
 
     if input.GetDataInformation().DataInformation.GetNumberOfUniqueBlockTypes() == 0:
         excludeBlocks = False
         print("only one block: excludeBlocks= False", flush=True)
     if excludeBlocks:
-        print(f"Extract block: {selectedblocks}", flush=True)
-        extractBlock1 = ExtractBlock(registrationName="insert", Input=input)
-        extractBlock1.Selectors = selectedblocks
-        extractBlock1.UpdatePipeline()
-        if field in list(extractBlock1.CellData.keys()):
-            arrayInfo = extractBlock1.CellData[field]
-        if field in list(extractBlock1.PointData.keys()):
-            arrayInfo = extractBlock1.PointData[field]
-        r = arrayInfo.GetRange(0)
-        LUT.RescaleTransferFunction(r[0], r[1])
-        Delete(extractBlock1)
-        del extractBlock1
-        collected = gc.collect()
+        # range over the selected blocks, from the block data information
+        r = blockRange(input, selectedblocks, field, color)
+        if r:
+            LUT.RescaleTransferFunction(r[0], r[1])
 
     # valid range for temperature but where do the range come from?
     # see post https://stackoverflow.com/questions/63028755/paraview-rescaling-colour-scheme-to-visible-data-in-range-in-python
@@ -171,6 +300,8 @@ def displayField(
         r = rangeHisto(field, fieldname, fieldunits, filename)
         if r:
             LUT.RescaleTransferFunction(r[0], r[1])
+    if range:
+        LUT.RescaleTransferFunction(range[0], range[1])
 
     # Properties modified on LUTColorBar
     if background:
@@ -207,21 +338,137 @@ def displayField(
     # save screenshot
     # TransparentBackground=1, need to set title and label colors to black
     if filename:
-        save = SaveScreenshot(
+        saveScreenshot(
             filename,
             renderView,
-            ImageResolution=resolution,
+            ImageResolution=_resolution,
             TransparentBackground=background,
         )
 
-    if comment is not None:
-        Delete(textDisplay)
-    Delete(display)
     return renderView
 
 
+# script of the direct rasterizer (see rasterField): blocks are triangulated where
+# the data are, only the triangles and the field are kept for the client
+#   field: name of the array, pointdata: PointData or CellData
+_rasterScript = """
+from vtkmodules.vtkCommonDataModel import vtkPolyData
+from vtkmodules.vtkFiltersGeometry import vtkDataSetSurfaceFilter
+from vtkmodules.vtkFiltersCore import vtkAppendPolyData, vtkTriangleFilter
+
+blocks = [inputs[0]]
+if inputs[0].VTKObject.IsA("vtkCompositeDataSet"):
+    blocks = list(inputs[0])
+
+append = vtkAppendPolyData()
+for block in blocks:
+    if block.GetNumberOfCells() == 0:
+        continue
+
+    surface = vtkDataSetSurfaceFilter()
+    surface.SetInputData(block.VTKObject)
+    triangle = vtkTriangleFilter()
+    triangle.SetInputConnection(surface.GetOutputPort())
+    triangle.PassVertsOff()
+    triangle.PassLinesOff()
+    triangle.Update()
+    mesh = triangle.GetOutput()
+    data = mesh.GetPointData() if {pointdata} else mesh.GetCellData()
+    array = data.GetArray({field!r})
+    if array is None or mesh.GetNumberOfPolys() == 0:
+        continue
+
+    triangles = vtkPolyData()
+    triangles.SetPoints(mesh.GetPoints())
+    triangles.SetPolys(mesh.GetPolys())
+    data = triangles.GetPointData() if {pointdata} else triangles.GetCellData()
+    data.AddArray(array)
+    append.AddInputData(triangles)
+
+if append.GetNumberOfInputConnections(0):
+    append.Update()
+    output.VTKObject.ShallowCopy(append.GetOutput())
+"""
+
+
+@profiling.profiled("render")
+def rasterField(
+    input,
+    selectedblocks: list[str],
+    field: str,
+    fieldunits: dict,
+    color,
+    filename: str,
+    comment: str = None,
+    excludeBlocks: bool = False,
+    background: bool = False,
+    customRangeHisto: bool = False,
+):
+    """rasterize field without a render view (see raster)
+
+    same color map, range and scalar bar title as displayField
+
+    Args:
+        input: paraview reader
+        selectedblocks (list[str]): list of markers of field
+        field (str): field name
+        fieldunits (dict): dict of field units
+        color (_type_): color PointData or CellData
+        filename (str): name and path of futur view file
+        comment (str, optional): add comment. Defaults to None.
+        excludeBlocks (bool, optional): field excluded blocks. Defaults to False.
+        background (bool, optional): transparent background (& text black). Defaults to False.
+        customRangeHisto (bool, optional): create custom range from field histogram. Defaults to False.
+    """
+
+    print(f"rasterField: field={field}", flush=True)
+    (toolbox, physic, fieldname) = keyinfo(field)
+    msymbol = fieldunits[fieldname].get("mSymbol", fieldunits[fieldname]["Symbol"])
+    [in_unit, out_unit] = fieldunits[fieldname]["Units"]
+
+    source = input
+    if selectedblocks:
+        source = ExtractBlock(registrationName="insert", Input=input)
+        source.Selectors = selectedblocks
+        source.UpdatePipeline()
+
+    # data range as RescaleTransferFunctionToDataRange (of selected blocks if excluded)
+    arrays = input.PointData if color[0] == "POINTS" else input.CellData
+    component = 0 if arrays[field].GetNumberOfComponents() == 1 else -1
+    r = arrays[field].GetRange(component)
+    if excludeBlocks:
+        r = blockRange(input, selectedblocks, field, color, component) or r
+    if customRangeHisto:
+        r = rangeHisto(field, fieldname, fieldunits, filename) or r
+
+    pointdata = color[0] == "POINTS"
+    rasterfilter = ProgrammableFilter(registrationName="Raster", Input=source)
+    rasterfilter.OutputDataSetType = "vtkPolyData"
+    rasterfilter.Script = _rasterScript.format(field=field, pointdata=pointdata)
+    rasterfilter.UpdatePipeline()
+
+    # the image is rasterized and saved on the client
+    (points, triangles, PointData, CellData) = gatherSurface(rasterfilter)
+    values = (PointData if pointdata else CellData).get(field)
+    if values is None:
+        return
+    snapshot(
+        points[:, :2],
+        triangles,
+        values,
+        pointdata,
+        filename,
+        rf"{msymbol} [{in_unit:~P}]",
+        comment=comment or "",
+        range=(float(r[0]), float(r[1])),
+        resolution=tuple(_resolution),
+        background=background,
+    )
+
+
 ################################################################
 # create a 2D view
+@arena.owned("view")
 def make2Dview(
     input,
     blockdata,
@@ -234,9 +481,17 @@ def make2Dview(
     printed: bool = True,
     background: bool = False,
     customRangeHisto: bool = False,
+    raster: bool = False,
+    deformedfactor: int = None,
+    combine: list[str] = None,
 ):
     """create a 2D view
 
+    with deformedfactor, the deformed view is paired with the view: the dataset
+    is warped once for all fields and rendered in the render view of the
+    dataset, with the same camera (see switchGeometry); combine adds the
+    combined views of the pair (see combine), not overlay when rasterized
+
     Args:
         input: paraview reader
         blockdata: blockdata from meshinfo
@@ -249,6 +504,9 @@ def make2Dview(
         printed (bool, optional): Defaults to True.
         background (bool, optional): transparent background (& text black). Defaults to False.
         customRangeHisto (bool, optional):  create custom range from field histogram. Defaults to False.
+        raster (bool, optional): rasterize without a render view (see rasterField). Defaults to False.
+        deformedfactor (int, optional): factor of the paired deformed view. Defaults to None.
+        combine (list[str], optional): "sidebyside", "overlay" views of the pair. Defaults to None.
     """
     os.makedirs(f"{basedir}/views", exist_ok=True)
     print(f"make2Dview: field={field}", end="")
@@ -269,10 +527,6 @@ def make2Dview(
     if selectedblocks:
         print(f"input.Selectors = {selectedblocks}", flush=True)
 
-    filename = f"{basedir}/views/{field}.png"
-    if suffix is not None:
-        filename = f"{basedir}/views/{field}{suffix}.png"
-
     comm = ""
     if fieldunits["Current"]["Val"]:
         comm = f'I={fieldunits["Current"]["Val"]}'
@@ -280,24 +534,107 @@ def make2Dview(
         comm = comm + f'\nB0={fieldunits["B0"]["Val"]}T'
     if fieldunits["Bbg"]["Val"]:
         comm = comm + f'\nBackground field: {fieldunits["Bbg"]["Val"]}'
-    renderView = displayField(
-        input,
-        selectedblocks,
-        field,
-        fieldunits,
-        color,
-        addruler=addruler,
-        filename=filename,
-        comment=comm,
-        excludeBlocks=excludeBlocks,
-        background=background,
-        customRangeHisto=customRangeHisto,
-    )
-
-    Delete(renderView)
-    del renderView
-
 
+    # variants of the view: the view, then the deformed view and the combined views
+    variants = [suffix]
+    if deformedfactor is not None:
+        variants.append(f"-deformed_factor{deformedfactor}")
+        modes = combined.modes(combine)
+        if raster and "overlay" in modes:
+            print("make2Dview: no overlay view without a render view", flush=True)
+            modes.remove("overlay")
+        variants += [f"{variants[1]}-{mode}" for mode in modes]
+
+    # views up to date (see viewcache)
+    (files, keys, stale) = ({}, {}, [])
+    for i, variant in enumerate(variants):
+        files[variant] = f"{basedir}/views/{field}{variant or ''}.png"
+        key = {
+            "view": ["2D", None, variant, raster],
+            "field": [field, color, fieldunits[fieldname]],
+            "blocks": selectedblocks,
+            "comment": comm,
+            "resolution": _resolution,
+            "addruler": addruler,
+            "background": background,
+            "histogram": customRangeHisto
+            and viewcache.stamp(histogramFile(files[variant])),
+        }
+        if i:
+            # warped geometry, combined views are made of the pair
+            key["pair"] = [keys[pair] for pair in variants[1:i]]
+        keys[variant] = viewcache.fingerprint(key)
+        if viewcache.fresh(files[variant], keys[variant]):
+            print(f"{files[variant]}: up to date", flush=True)
+            continue
+        stale.append(variant)
+    if not stale:
+        return
+
+    options = {
+        "comment": comm,
+        "excludeBlocks": excludeBlocks,
+        "background": background,
+        "customRangeHisto": customRangeHisto,
+    }
+    if suffix in stale:
+        if raster:
+            rasterField(
+                input, selectedblocks, field, fieldunits, color, files[suffix], **options
+            )
+        else:
+            displayField(
+                input,
+                selectedblocks,
+                field,
+                fieldunits,
+                color,
+                addruler=addruler,
+                filename=files[suffix],
+                **options,
+            )
+        viewcache.record(files[suffix], keys[suffix])
+    if not set(stale) - {suffix}:
+        return
+
+    # deformed view: a small increment over the view, in the same render view
+    warped = cache.get(deformed, input, factor=deformedfactor)
+    (left, right) = (files[variants[0]], files[variants[1]])
+    if raster:
+        rasterField(warped, selectedblocks, field, fieldunits, color, right, **options)
+    else:
+        renderView = cache.get(
+            renderSession,
+            input,
+            addruler=addruler,
+            polargrid=False,
+            printed=True,
+            background=background,
+        )
+        undeformed = switchGeometry(renderView, warped)
+        displayField(
+            warped,
+            selectedblocks,
+            field,
+            fieldunits,
+            color,
+            addruler=addruler,
+            renderView=renderView,
+            filename=right,
+            **options,
+        )
+        if f"{variants[1]}-overlay" in variants:
+            saveOverlay(
+                renderView, undeformed, files[f"{variants[1]}-overlay"], background
+            )
+        switchGeometry(renderView, input)
+    for variant in variants[1:]:
+        if variant.endswith("-sidebyside"):
+            submit(files[variant], combined.save, left, right, files[variant])
+        viewcache.record(files[variant], keys[variant])
+
+
+@profiling.profiled("makeview")
 def makeview(
     args,
     input,
@@ -341,3 +678,186 @@ def makeview(
         background=background,
         customRangeHisto=customRangeHisto,
     )
+
+
+def viewgroups(args, fields: list[tuple]) -> list[dict]:
+    """returns the view groups of fields (see scheduler)
+
+    2D views have no slice: a single group with all fields
+
+    Args:
+        args: options
+        fields (list[tuple]): (field, color) to display
+
+    Returns:
+        list[dict]: groups {kind, value, fields}
+    """
+
+    return scheduler.schedule(scheduler.requests(fields, kind="2D"))
+
+
+@profiling.profiled("makeview")
+def makeviews(
+    args,
+    input,
+    blockdata,
+    fields: list[tuple],
+    fieldunits: dict,
+    basedir: str,
+    suffix: str = None,
+    addruler: bool = False,
+    printed: bool = True,
+    background: bool = False,
+    customRangeHisto: bool = False,
+    deformedfactor: int = None,
+    combine: list[str] = None,
+):
+    """create views of all fields
+
+    2D views have no slice: all fields are rendered in the render view of input
+    (see renderSession)
+    if args.raster: fields are rasterized without a render view (see rasterField)
+    with deformedfactor, the deformed views are paired with the views (see make2Dview)
+
+    Args:
+        args: options
+        input: paraview reader
+        blockdata: blockdata from meshinfo
+        fields (list[tuple]): (field, color) to display
+        fieldunits (dict): dict of field units
+        basedir (str):  result directory
+        suffix (str, optional):  None or -deformed. Defaults to None.
+        addruler (bool, optional): add ruler to view. Defaults to False.
+        printed (bool, optional): Defaults to True.
+        background (bool, optional): transparent background (& text black). Defaults to False.
+        customRangeHisto (bool, optional):  create custom range from field histogram. Defaults to False.
+        deformedfactor (int, optional): factor of the paired deformed views. Defaults to None.
+        combine (list[str], optional): "sidebyside", "overlay" views of pairs. Defaults to None.
+    """
+
+    for field, color in fields:
+        make2Dview(
+            input,
+            blockdata,
+            field,
+            fieldunits,
+            color,
+            basedir,
+            suffix=suffix,
+            addruler=addruler,
+            background=background,
+            customRangeHisto=customRangeHisto,
+            raster=getattr(args, "raster", False),
+            deformedfactor=deformedfactor,
+            combine=combine,
+        )
+
+
+@profiling.profiled("animation")
+@arena.owned("animation")
+def makeanimations(
+    args,
+    input,
+    blockdata,
+    fields: list[tuple],
+    fieldunits: dict,
+    basedir: str,
+    fps: int = 5,
+    format: str = "mp4",
+    background: bool = False,
+):
+    """create animations of fields over the time steps
+
+    2D views have no slice: the render view of input is built once, each time
+    step only updates the field arrays and renders a frame of each field;
+    the color range of a field is the range over all time steps (a first pass
+    reads the time steps without rendering)
+
+    frames are saved in basedir/animations/{field}/ and assembled in
+    basedir/animations/{field}.{format}
+
+    Args:
+        args: options
+        input: paraview reader
+        blockdata: blockdata from meshinfo
+        fields (list[tuple]): (field, color) to animate
+        fieldunits (dict): dict of field units
+        basedir (str): result directory
+        fps (int, optional): frames per second. Defaults to 5.
+        format (str, optional): "mp4" or "gif". Defaults to "mp4".
+        background (bool, optional): transparent background (& text black). Defaults to False.
+    """
+
+    times = animation.timesteps(input)
+    print(f"makeanimations: {len(times)} time steps, fields={fields}", flush=True)
+    if len(times) < 2:
+        print("makeanimations: no time steps to animate", flush=True)
+        return
+
+    comm = ""
+    if fieldunits["Current"]["Val"]:
+        comm = f'I={fieldunits["Current"]["Val"]}\n'
+    if fieldunits["B0"]["Val"]:
+        comm = comm + f'B0={fieldunits["B0"]["Val"]}T\n'
+    if fieldunits["Bbg"]["Val"]:
+        comm = comm + f'Background field: {fieldunits["Bbg"]["Val"]}\n'
+
+    movies = []
+    for field, color in fields:
+        (toolbox, physic, fieldname) = keyinfo(field)
+        movies.append(
+            {
+                "field": field,
+                "color": color,
+                "blocks": selectBlocks(
+                    list(blockdata.keys()), fieldunits[fieldname]["Exclude"]
+                ),
+                "exclude": bool(fieldunits[fieldname]["Exclude"]),
+                "range": None,
+            }
+        )
+
+    # color ranges over the time steps
+    for time in times:
+        input.UpdatePipeline(time)
+        for movie in movies:
+            r = blockRange(input, movie["blocks"], movie["field"], movie["color"])
+            if r and movie["range"]:
+                r = (min(r[0], movie["range"][0]), max(r[1], movie["range"][1]))
+            movie["range"] = r or movie["range"]
+
+    # the render view of input, as displayField builds it
+    renderView = cache.get(
+        renderSession,
+        input,
+        addruler=False,
+        polargrid=False,
+        printed=True,
+        background=background,
+    )
+    for i, time in enumerate(times):
+        print(f"makeanimations: time={time} ({i + 1}/{len(times)})", flush=True)
+        renderView.ViewTime = time
+        for movie in movies:
+            os.makedirs(f"{basedir}/animations/{movie['field']}", exist_ok=True)
+            displayField(
+                input,
+                movie["blocks"],
+                movie["field"],
+                fieldunits,
+                movie["color"],
+                addruler=False,
+                renderView=renderView,
+                filename=f"{basedir}/animations/{movie['field']}/{i:04d}.png",
+                comment=f"{comm}t={time:g} s",
+                excludeBlocks=movie["exclude"],
+                background=background,
+                range=movie["range"],
+            )
+
+    for movie in movies:
+        animation.save(
+            f"{basedir}/animations/{movie['field']}/%04d.png",
+            f"{basedir}/animations/{movie['field']}.{format}",
+            fps,
+        )
@@ -457,6 +457,10 @@ def create_dicts_fromjson(field_dict: dict, ureg, distance_unit: str, basedir: s
     ignored_keys = [
         "Area",
         "Volume",
+        "NodalArea",
+        "NodalVolume",
+        "BlockId",
+        "CellCenters",
         "r",
         "Cos",
         "Sin",
@@ -852,6 +856,10 @@ def create_dicts(ureg, distance_unit: str, basedir: str):
         "cfpdes.expr.EE",
         "Area",
         "Volume",
+        "NodalArea",
+        "NodalVolume",
+        "BlockId",
+        "CellCenters",
         "r",
         "Cos",
         "Sin",
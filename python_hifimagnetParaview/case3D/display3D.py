@@ -1,10 +1,8 @@
 import os
-import gc
 
 from paraview.simple import (
     BoundingRuler,
     Text,
-    Delete,
     CreateView,
     Show,
     GetScalarBar,
@@ -12,20 +10,229 @@ from paraview.simple import (
     ColorBy,
     HideScalarBarIfNotNeeded,
     GetOpacityTransferFunction,
-    SaveScreenshot,
-    ExtractBlock,
 )
 
-from ..method import selectBlocks, convert_data, keyinfo
+from ..writer import saveScreenshot, submit
+from .. import cache, profiling, arena, scheduler, viewcache, animation
+from .. import combine as combined
+from ..method import selectBlocks, convert_data, keyinfo, blockRange
 from ..view import (
+    deformed,
     setCamera,
     makeboxclip,
     makeplaneslice,
     makeplaneOrOzslice,
+    makefamilyslice,
     rangeHisto,
+    histogramFile,
 )
 
 
+# render sessions: view global id -> {display, text, lut, axes, displays}
+#   display: representation of the input shown, text: comment source,
+#   lut: color map of the last field displayed, axes: grids of the view,
+#   displays: input global id -> representation (see switchGeometry)
+_sessions = {}
+
+# size of views and screenshots
+_resolution = [1400, 1200]
+
+
+def _axes(
+    display, grid: bool = False, polargrid: bool = False, background: bool = False
+):
+    """add the grid or polar grid of a view to display (see renderSession)"""
+
+    if grid:
+        display.DataAxesGrid.GridAxesVisibility = 1
+        if background:
+            display.DataAxesGrid.GridColor = [0.0, 0.0, 0.0]
+            display.DataAxesGrid.XTitleColor = [0.0, 0.0, 0.0]
+            display.DataAxesGrid.YTitleColor = [0.0, 0.0, 0.0]
+            display.DataAxesGrid.ZTitleColor = [0.0, 0.0, 0.0]
+            display.DataAxesGrid.XLabelColor = [0.0, 0.0, 0.0]
+            display.DataAxesGrid.YLabelColor = [0.0, 0.0, 0.0]
+            display.DataAxesGrid.ZLabelColor = [0.0, 0.0, 0.0]
+        # display.DataAxesGrid.XTitleFontSize = 20
+        # display.DataAxesGrid.YTitleFontSize = 20
+        # display.DataAxesGrid.ZTitleFontSize = 20
+        # display.DataAxesGrid.ZLabelFontSize = 20
+        # display.DataAxesGrid.XLabelFontSize = 20
+        # display.DataAxesGrid.YLabelFontSize = 20
+    if polargrid:
+        display.PolarAxes.Visibility = 1
+        display.PolarAxes.MaximumAngle = 360.0
+        if background:
+            display.PolarAxes.PolarAxisColor = [0.0, 0.0, 0.0]
+            display.PolarAxes.PolarArcsColor = [0.0, 0.0, 0.0]
+            display.PolarAxes.LastRadialAxisColor = [0.0, 0.0, 0.0]
+            display.PolarAxes.SecondaryPolarArcsColor = [0.0, 0.0, 0.0]
+            display.PolarAxes.SecondaryRadialAxesColor = [0.0, 0.0, 0.0]
+            display.PolarAxes.PolarAxisTitleColor = [0.0, 0.0, 0.0]
+            display.PolarAxes.PolarAxisLabelColor = [0.0, 0.0, 0.0]
+            display.PolarAxes.LastRadialAxisTextColor = [0.0, 0.0, 0.0]
+            display.PolarAxes.SecondaryRadialAxesTextColor = [0.0, 0.0, 0.0]
+        display.PolarAxes.Use2DMode = 0
+        # display.PolarAxes.PolarAxisTitleFontSize = 20
+        # display.PolarAxes.PolarAxisLabelFontSize = 20
+        # display.PolarAxes.LastRadialAxisTextFontSize = 20
+        # display.PolarAxes.SecondaryRadialAxesTextFontSize = 20
+
+
+def renderSession(
+    input,
+    renderView=None,
+    addruler: bool = True,
+    position: tuple = None,
+    focal: tuple = None,
+    viewUp: tuple = None,
+    viewAngle: float = 30,
+    parallelProjection: bool = False,
+    roll: float = 0,
+    elevation: float = 0,
+    azimuth: float = 0,
+    grid: bool = False,
+    polargrid: bool = False,
+    printed: bool = True,
+    background: bool = False,
+):
+    """create a render view of input with its comment, axes, ruler and camera
+
+    the view is built once per geometry and camera setup (see cache.get):
+    displayField only switches the colored field and the comment
+
+    Args:
+        input: paraview reader
+        renderView (optional): pre-existing renderview. Defaults to None.
+        see displayField for the other arguments
+
+    Returns:
+        renderView
+    """
+
+    if renderView is None:
+        renderView = CreateView("RenderView")
+        print("createrenderView", flush=True)
+
+    text = Text(registrationName="Text1")
+    textDisplay = Show(text, renderView)
+    textDisplay.WindowLocation = "Upper Center"
+    textDisplay.FontSize = 24
+    textDisplay.Bold = 1
+    textDisplay.Italic = 1
+    if background:
+        textDisplay.Color = [0.0, 0.0, 0.0]
+
+    display = Show(input, renderView)
+    _axes(display, grid=grid, polargrid=polargrid, background=background)
+
+    # Add BoundingRuler filter to get an idea of the dimension
+    if addruler:
+        print("Add ruler to see dimensions", flush=True)
+        ruler = BoundingRuler(registrationName="BoundingRuler1", Input=input)
+        ruler.Axis = "Y Axis"
+        if not printed:
+            for prop in ruler.ListProperties():
+                print(f"ruler: {prop}={ruler.GetPropertyValue(prop)}", flush=True)
+        Show(ruler, renderView)  # Reset Camera
+
+    setCamera(
+        renderView,
+        Position=position,
+        Focal=focal,
+        Up=viewUp,
+        Angle=viewAngle,
+        pProjection=parallelProjection,
+        roll=roll,
+        elevation=elevation,
+        azimuth=azimuth,
+    )  # adjustCamera)
+
+    renderView.ViewSize = _resolution
+    if not printed:
+        for prop in renderView.ListProperties():
+            print(f"renderView: {prop}={renderView.GetPropertyValue(prop)}", flush=True)
+    renderView.OrientationAxesVisibility = 1
+
+    _sessions[renderView.GetGlobalIDAsString()] = {
+        "display": display,
+        "text": text,
+        "lut": None,
+        "axes": {"grid": grid, "polargrid": polargrid, "background": background},
+        "displays": {input.GetGlobalIDAsString(): display},
+    }
+    return renderView
+
+
+def switchGeometry(renderView, input):
+    """show input in renderView in place of the geometry shown, the camera is kept
+
+    paired views (see renderGroup): the deformed geometry is rendered in the
+    render view of the undeformed one, each geometry is shown once
+
+    Args:
+        renderView: render view of a session (see renderSession)
+        input: paraview reader
+
+    Returns:
+        display of the geometry previously shown
+    """
+
+    session = _sessions[renderView.GetGlobalIDAsString()]
+    previous = session["display"]
+    display = session["displays"].get(input.GetGlobalIDAsString())
+    if display is None:
+        camera = {
+            prop: renderView.GetPropertyValue(prop)
+            for prop in [
+                "CameraPosition",
+                "CameraFocalPoint",
+                "CameraViewUp",
+                "CameraViewAngle",
+                "CameraParallelScale",
+            ]
+        }
+        display = Show(input, renderView)
+        _axes(display, **session["axes"])
+        for prop, value in camera.items():
+            renderView.SetPropertyWithName(prop, value)
+        session["displays"][input.GetGlobalIDAsString()] = display
+
+    if display is not previous:
+        ColorBy(previous, None)
+        previous.Visibility = 0
+        display.Visibility = 1
+        session["display"] = display
+    return previous
+
+
+def saveOverlay(renderView, display, filename: str, background: bool = False):
+    """save renderView with the edges of display over the geometry shown
+
+    Args:
+        renderView: render view of a session (see renderSession)
+        display: hidden display, eg. of the undeformed geometry (see switchGeometry)
+        filename (str): name and path of the view file
+        background (bool, optional): transparent background (& edges black). Defaults to False.
+    """
+
+    representation = display.Representation
+    display.Representation = "Feature Edges"
+    display.AmbientColor = [0.0, 0.0, 0.0] if background else [1.0, 1.0, 1.0]
+    display.DiffuseColor = display.AmbientColor
+    display.Visibility = 1
+    renderView.Update()
+    saveScreenshot(
+        filename,
+        renderView,
+        ImageResolution=_resolution,
+        TransparentBackground=background,
+    )
+    display.Visibility = 0
+    display.Representation = representation
+
+
+@profiling.profiled("render")
 def displayField(
     input,
     selectedblocks: list[str],
@@ -50,6 +257,7 @@ def displayField(
     excludeBlocks: bool = False,
     background: bool = False,
     customRangeHisto: bool = False,
+    range: tuple = None,
 ):
     """display field in renderview
 
@@ -77,99 +285,48 @@ def displayField(
         excludeBlocks (bool, optional): field excluded blocks. Defaults to False.
         background (bool, optional): transparent background (& text black). Defaults to False.
         customRangeHisto (bool, optional): create custom range from field histogram. Defaults to False.
+        range (tuple, optional): color range, eg. of an animation. Defaults to None.
 
     Returns:
         renderView
     """
 
     print(f"displayField: field={field}, renderView={renderView}", flush=True)
+    setup = {
+        "addruler": addruler,
+        "position": position,
+        "focal": focal,
+        "viewUp": viewUp,
+        "viewAngle": viewAngle,
+        "parallelProjection": parallelProjection,
+        "roll": roll,
+        "elevation": elevation,
+        "azimuth": azimuth,
+        "grid": grid,
+        "polargrid": polargrid,
+        "printed": printed,
+        "background": background,
+    }
     if renderView is None:
-        renderView = CreateView("RenderView")
-        print("createrenderView", flush=True)
+        # one view per geometry and camera setup, reused for all fields
+        renderView = cache.get(renderSession, input, **setup)
+    elif renderView.GetGlobalIDAsString() not in _sessions:
+        renderView = renderSession(input, renderView=renderView, **setup)
+    session = _sessions[renderView.GetGlobalIDAsString()]
+    display = session["display"]
 
     if comment is not None:
         print(f"add comment: {comment}", flush=True)
-        text = Text(registrationName="Text1")
-        text.Text = rf"{comment}"
-        textDisplay = Show(text, renderView)
-        textDisplay.WindowLocation = "Upper Center"
-        textDisplay.FontSize = 24
-        textDisplay.Bold = 1
-        textDisplay.Italic = 1
-        if background:
-            textDisplay.Color = [0.0, 0.0, 0.0]
-
-    display = Show(input, renderView)
+    session["text"].Text = rf"{comment}" if comment is not None else ""
 
     # TODO if args.field is not Magnetic something
     display.BlockSelectors = selectedblocks
-    display.ColorArrayName = color
-    if grid:
-        display.DataAxesGrid.GridAxesVisibility = 1
-        if background:
-            display.DataAxesGrid.GridColor = [0.0, 0.0, 0.0]
-            display.DataAxesGrid.XTitleColor = [0.0, 0.0, 0.0]
-            display.DataAxesGrid.YTitleColor = [0.0, 0.0, 0.0]
-            display.DataAxesGrid.ZTitleColor = [0.0, 0.0, 0.0]
-            display.DataAxesGrid.XLabelColor = [0.0, 0.0, 0.0]
-            display.DataAxesGrid.YLabelColor = [0.0, 0.0, 0.0]
-            display.DataAxesGrid.ZLabelColor = [0.0, 0.0, 0.0]
-        # display.DataAxesGrid.XTitleFontSize = 20
-        # display.DataAxesGrid.YTitleFontSize = 20
-        # display.DataAxesGrid.ZTitleFontSize = 20
-        # display.DataAxesGrid.ZLabelFontSize = 20
-        # display.DataAxesGrid.XLabelFontSize = 20
-        # display.DataAxesGrid.YLabelFontSize = 20
-    if polargrid:
-        display.PolarAxes.Visibility = 1
-        display.PolarAxes.MaximumAngle = 360.0
-        if background:
-            display.PolarAxes.PolarAxisColor = [0.0, 0.0, 0.0]
-            display.PolarAxes.PolarArcsColor = [0.0, 0.0, 0.0]
-            display.PolarAxes.LastRadialAxisColor = [0.0, 0.0, 0.0]
-            display.PolarAxes.SecondaryPolarArcsColor = [0.0, 0.0, 0.0]
-            display.PolarAxes.SecondaryRadialAxesColor = [0.0, 0.0, 0.0]
-            display.PolarAxes.PolarAxisTitleColor = [0.0, 0.0, 0.0]
-            display.PolarAxes.PolarAxisLabelColor = [0.0, 0.0, 0.0]
-            display.PolarAxes.LastRadialAxisTextColor = [0.0, 0.0, 0.0]
-            display.PolarAxes.SecondaryRadialAxesTextColor = [0.0, 0.0, 0.0]
-        display.PolarAxes.Use2DMode = 0
-        # display.PolarAxes.PolarAxisTitleFontSize = 20
-        # display.PolarAxes.PolarAxisLabelFontSize = 20
-        # display.PolarAxes.LastRadialAxisTextFontSize = 20
-        # display.PolarAxes.SecondaryRadialAxesTextFontSize = 20
 
     # for vector: ColorBy(display, ('CELLS', 'magnetic_field', 'Z'))
     ColorBy(display, tuple(color))
+    if session["lut"] is not None:
+        HideScalarBarIfNotNeeded(session["lut"], renderView)
 
-    # Add BoundingRuler filter to get an idea of the dimension
-    if addruler:
-        print("Add ruler to see dimensions", flush=True)
-        ruler = BoundingRuler(registrationName="BoundingRuler1", Input=input)
-        ruler.Axis = "Y Axis"
-        if not printed:
-            for prop in ruler.ListProperties():
-                print(f"ruler: {prop}={ruler.GetPropertyValue(prop)}", flush=True)
-        Show(ruler, renderView)  # Reset Camera
-
-    setCamera(
-        renderView,
-        Position=position,
-        Focal=focal,
-        Up=viewUp,
-        Angle=viewAngle,
-        pProjection=parallelProjection,
-        roll=roll,
-        elevation=elevation,
-        azimuth=azimuth,
-    )  # adjustCamera)
-
-    resolution = [1400, 1200]
-    renderView.ViewSize = resolution
-    if not printed:
-        for prop in renderView.ListProperties():
-            print(f"renderView: {prop}={renderView.GetPropertyValue(prop)}", flush=True)
-    renderView.OrientationAxesVisibility = 1
     display.SetScalarBarVisibility(renderView, True)
     display.RescaleTransferFunctionToDataRange(True, False)
 
@@ -177,22 +334,15 @@ def displayField(
     field_name = field.replace(".", "")
     LUT = GetColorTransferFunction(field_name)
     LUT.ScalarRangeInitialized = 1.0
+    session["lut"] = LUT
 
     if input.GetDataInformation().DataInformation.GetNumberOfUniqueBlockTypes() == 0:
         excludeBlocks = False
     if excludeBlocks:
-        extractBlock1 = ExtractBlock(registrationName="insert", Input=input)
-        extractBlock1.Selectors = selectedblocks
-        extractBlock1.UpdatePipeline()
-        if field in list(extractBlock1.CellData.keys()):
-            arrayInfo = extractBlock1.CellData[field]
-        if field in list(extractBlock1.PointData.keys()):
-            arrayInfo = extractBlock1.PointData[field]
-        r = arrayInfo.GetRange(0)
-        LUT.RescaleTransferFunction(r[0], r[1])
-        Delete(extractBlock1)
-        del extractBlock1
-        collected = gc.collect()
+        # range over the selected blocks, from the block data information
+        r = blockRange(input, selectedblocks, field, color)
+        if r:
+            LUT.RescaleTransferFunction(r[0], r[1])
     # LUT.RescaleTransferFunction(293.6058044433594, 397.88848876953125)
     # valid range for temperature but where do the range come from?
     # see post https://stackoverflow.com/questions/63028755/paraview-rescaling-colour-scheme-to-visible-data-in-range-in-python
@@ -222,6 +372,8 @@ def displayField(
         r = rangeHisto(field, fieldname, fieldunits, filename)
         if r:
             LUT.RescaleTransferFunction(r[0], r[1])
+    if range:
+        LUT.RescaleTransferFunction(range[0], range[1])
 
     # Properties modified on LUTColorBar
     if background:
@@ -258,104 +410,302 @@ def displayField(
     # save screenshot
     # TransparentBackground=1, need to set title and label colors to black
     if filename:
-        save = SaveScreenshot(
+        saveScreenshot(
             filename,
             renderView,
-            ImageResolution=resolution,
+            ImageResolution=_resolution,
             TransparentBackground=background,
         )
 
-    if comment is not None:
-        Delete(textDisplay)
-    Delete(display)
     return renderView
 
 
+def _comment(fieldunits: dict, prefix: str = "") -> str:
+    """returns the comment of views (current, B0 and background field)"""
+
+    comm = ""
+    if fieldunits["Current"]["Val"]:
+        comm = f'{prefix}I={fieldunits["Current"]["Val"]}'
+    if fieldunits["B0"]["Val"]:
+        comm = comm + f'\nB0={fieldunits["B0"]["Val"]}T'
+    if fieldunits["Bbg"]["Val"]:
+        comm = comm + f'\nBackground field: {fieldunits["Bbg"]["Val"]}'
+    return comm
+
+
+def viewSetup(
+    input, kind: str, value: float, fieldunits: dict, family: list[float] = None
+) -> tuple:
+    """returns the geometry and camera of a view group (see renderGroup)
+
+    Args:
+        input: paraview reader
+        kind (str): "3D", "OxOy" or "OrOz"
+        value (float): z in m for OxOy, theta in deg for OrOz, None for 3D
+        fieldunits (dict): dict of field units
+        family (list[float], optional): values of the slices of kind. Defaults to None.
+
+    Returns:
+        tuple: (tag, cut, comment, setup), cut is (builder, args, kwargs) building
+        the geometry, setup the camera (see renderSession)
+    """
+    from math import pi, cos, sin
+
+    r_units = {"coord": fieldunits["coord"]["Units"]}
+    mm = f'{fieldunits["coord"]["Units"][1]:~P}'
+    comm = _comment(fieldunits, "\n")
+    match kind:
+        case "3D":
+            tag = ""
+            cut = (makeboxclip, (input, "boxclip"), {})
+            comment = _comment(fieldunits)
+            setup = {
+                "viewUp": (0, 1, 0),
+                "viewAngle": 30,
+                "parallelProjection": False,
+                "roll": 90,
+                "elevation": 300,
+            }
+        case "OxOy":
+            z_mm = convert_data(r_units, value, "coord")
+            tag = f"-OxOy-z={z_mm}{mm}"
+            cut = (makeplaneslice, (input, tag[1:]), {"z": value})
+            comment = rf"z={z_mm} {mm}{comm}"
+            setup = {
+                "position": (0, 0, 1),
+                "focal": (0, 0, value),
+                "roll": 0,
+                "polargrid": True,
+            }
+        case "OrOz":
+            angle = value + 90
+            radian = angle * pi / 180.0
+            print(f"theta={value} deg, angle={angle} deg = {radian} rad", flush=True)
+            tag = f"-OrOz-theta={value}deg"
+            cut = (makeplaneOrOzslice, (input, tag[1:]), {"theta": angle})
+            comment = rf"theta={value} deg{comm}"
+            setup = {
+                "position": (cos(radian - pi / 2.0), sin(radian - pi / 2.0), 0),
+                "roll": 90 if value > 90 else -90,
+                "grid": True,
+            }
+        case _:
+            raise RuntimeError(f"viewSetup: unsupported view {kind}")
+    if family and kind != "3D" and value in family:
+        cut = (makefamilyslice, (input, tag[1:], kind, family, value), {})
+
+    return (tag, cut, comment, setup)
+
+
 ################################################################
-# create a 3D view
-def make3Dview(
+# render a group of views (see scheduler)
+@arena.owned("view")
+def renderGroup(
     input,
     blockdata,
-    field: str,
+    kind: str,
+    value: float,
+    fields: list[tuple],
     fieldunits: dict,
-    color,
     basedir: str,
     suffix: str = None,
     addruler: bool = False,
     printed: bool = True,
     background: bool = False,
     customRangeHisto: bool = False,
+    family: list[float] = None,
+    deformedfactor: int = None,
+    combine: list[str] = None,
 ):
-    """create a 3D view
+    """cut a slice once and render it for all fields
+
+    kind:
+        3D: 3D view with 1/4 cut out
+        OxOy: slice at z=value
+        OrOz: slice at theta=value (angle of normal in degrees)
+
+    with family, the slices of all the values of the family are cut together
+    once (see view.makeslices) and the slice at value is extracted
+
+    with deformedfactor, the deformed views are paired with the views: the cut
+    geometry is warped by the displacement interpolated at its points (no new
+    cut) and rendered in the same render view and camera (see switchGeometry);
+    combine adds the combined views of the pairs (see combine)
+
+    the slice and its render view are released once all fields are rendered
 
     Args:
         input: paraview reader
         blockdata: blockdata from meshinfo
-        field (str): field name
+        kind (str): "3D", "OxOy" or "OrOz"
+        value (float): z in m for OxOy, theta in deg for OrOz, None for 3D
+        fields (list[tuple]): (field, color) to display
         fieldunits (dict): dict of field units
-        color: color for PointData or CellData
         basedir (str): result directory
         suffix (str, optional): None or -deformed. Defaults to None.
         addruler (bool, optional): add ruler to view. Defaults to False.
         printed (bool, optional): Defaults to True.
         background (bool, optional): transparent background (& text black). Defaults to False.
         customRangeHisto (bool, optional):  create custom range from field histogram. Defaults to False.
+        family (list[float], optional): values of the slices of kind. Defaults to None.
+        deformedfactor (int, optional): factor of the paired deformed views. Defaults to None.
+        combine (list[str], optional): "sidebyside", "overlay" views of pairs. Defaults to None.
     """
+
     os.makedirs(f"{basedir}/views", exist_ok=True)
-    print(f"make3Dview: field={field}", end="")
+    print(f"renderGroup: {kind}", end="")
+    if value is not None:
+        print(f"={value}", end="")
     if suffix:
         print(f", suffix={suffix}", end="")
-    print(flush=True)
+    if deformedfactor is not None:
+        print(f", deformedfactor={deformedfactor}", end="")
+    print(f", fields={[field for (field, color) in fields]}", flush=True)
 
-    (toolbox, physic, fieldname) = keyinfo(field)
-    excludeBlocks = False
-    if fieldunits[fieldname]["Exclude"]:
-        excludeBlocks = True
+    (tag, cut, comment, setup) = viewSetup(input, kind, value, fieldunits, family)
+
+    # variants of a view: the view, then the deformed view and the combined views
+    variants = [suffix]
+    if deformedfactor is not None:
+        variants.append(f"-deformed_factor{deformedfactor}")
+        variants += [f"{variants[1]}-{mode}" for mode in combined.modes(combine)]
+
+    # views up to date (see viewcache) are skipped, the slice is cut only if needed
+    views = []
+    for field, color in fields:
+        (toolbox, physic, fieldname) = keyinfo(field)
         print(f"Exclude blocks = {fieldunits[fieldname]['Exclude']}", flush=True)
+        selectedblocks = selectBlocks(
+            list(blockdata.keys()), fieldunits[fieldname]["Exclude"]
+        )
+        print(f"{kind}.Selectors = {selectedblocks}", flush=True)
 
-    boxclip = makeboxclip(input, "boxclip")
-    selectedblocks = selectBlocks(
-        list(blockdata.keys()), fieldunits[fieldname]["Exclude"]
+        (files, keys, stale) = ({}, {}, [])
+        for i, variant in enumerate(variants):
+            files[variant] = f"{basedir}/views/{field}{variant or ''}{tag}.png"
+            key = {
+                "view": [kind, value, variant],
+                "field": [field, color, fieldunits[fieldname]],
+                "blocks": selectedblocks,
+                "comment": comment,
+                "camera": setup,
+                "resolution": _resolution,
+                "addruler": addruler,
+                "background": background,
+                "histogram": customRangeHisto
+                and viewcache.stamp(histogramFile(files[variant])),
+            }
+            if i:
+                # warped geometry, combined views are made of the pair
+                key["pair"] = [keys[pair] for pair in variants[1:i]]
+            keys[variant] = viewcache.fingerprint(key)
+            if viewcache.fresh(files[variant], keys[variant]):
+                print(f"{files[variant]}: up to date", flush=True)
+                continue
+            stale.append(variant)
+        if stale:
+            views.append((field, color, fieldname, selectedblocks, files, keys, stale))
+    if not views:
+        return
+
+    (builder, args, kwargs) = cut
+    geometry = builder(*args, **kwargs)
+    renderView = renderSession(
+        geometry, addruler=addruler, background=background, **setup
     )
-    print(f"boxclip.Selectors = {selectedblocks}", flush=True)
+    options = {
+        "addruler": addruler,
+        "renderView": renderView,
+        "comment": comment,
+        "background": background,
+        "customRangeHisto": customRangeHisto,
+        **setup,
+    }
+    for field, color, fieldname, selectedblocks, files, keys, stale in views:
+        if suffix not in stale:
+            continue
+        displayField(
+            geometry,
+            selectedblocks,
+            field,
+            fieldunits,
+            color,
+            filename=files[suffix],
+            excludeBlocks=kind == "3D" and bool(fieldunits[fieldname]["Exclude"]),
+            **options,
+        )
+        viewcache.record(files[suffix], keys[suffix])
 
-    filename = f"{basedir}/views/{field}.png"
-    if suffix is not None:
-        filename = f"{basedir}/views/{field}{suffix}.png"
+    # deformed views: a small increment over the views, the geometry is not cut again
+    pairs = [view for view in views if set(view[6]) - {suffix}]
+    if not pairs:
+        return
+    warped = deformed(geometry, factor=deformedfactor)
+    undeformed = switchGeometry(renderView, warped)
+    for field, color, fieldname, selectedblocks, files, keys, stale in pairs:
+        (left, right) = (files[variants[0]], files[variants[1]])
+        displayField(
+            warped,
+            selectedblocks,
+            field,
+            fieldunits,
+            color,
+            filename=right,
+            excludeBlocks=kind == "3D" and bool(fieldunits[fieldname]["Exclude"]),
+            **options,
+        )
+        for variant in variants[1:]:
+            if variant.endswith("-overlay"):
+                saveOverlay(renderView, undeformed, files[variant], background)
+            elif variant.endswith("-sidebyside"):
+                submit(files[variant], combined.save, left, right, files[variant])
+            viewcache.record(files[variant], keys[variant])
 
-    comm = ""
-    if fieldunits["Current"]["Val"]:
-        comm = f'I={fieldunits["Current"]["Val"]}'
-    if fieldunits["B0"]["Val"]:
-        comm = comm + f'\nB0={fieldunits["B0"]["Val"]}T'
-    if fieldunits["Bbg"]["Val"]:
-        comm = comm + f'\nBackground field: {fieldunits["Bbg"]["Val"]}'
-    # position is None
-    renderView = displayField(
-        boxclip,
-        selectedblocks,
-        field,
+
+################################################################
+# create a 3D view
+def make3Dview(
+    input,
+    blockdata,
+    field: str,
+    fieldunits: dict,
+    color,
+    basedir: str,
+    suffix: str = None,
+    addruler: bool = False,
+    printed: bool = True,
+    background: bool = False,
+    customRangeHisto: bool = False,
+):
+    """create a 3D view
+
+    Args:
+        input: paraview reader
+        blockdata: blockdata from meshinfo
+        field (str): field name
+        fieldunits (dict): dict of field units
+        color: color for PointData or CellData
+        basedir (str): result directory
+        suffix (str, optional): None or -deformed. Defaults to None.
+        addruler (bool, optional): add ruler to view. Defaults to False.
+        printed (bool, optional): Defaults to True.
+        background (bool, optional): transparent background (& text black). Defaults to False.
+        customRangeHisto (bool, optional):  create custom range from field histogram. Defaults to False.
+    """
+    renderGroup(
+        input,
+        blockdata,
+        "3D",
+        None,
+        [(field, color)],
         fieldunits,
-        color,
+        basedir,
+        suffix=suffix,
         addruler=addruler,
-        filename=filename,
-        position=None,
-        viewUp=(0, 1, 0),
-        viewAngle=30,
-        parallelProjection=False,
-        roll=90,
-        elevation=300,
-        comment=comm,
-        excludeBlocks=excludeBlocks,
         background=background,
         customRangeHisto=customRangeHisto,
     )
 
-    Delete(renderView)
-    del renderView
-    Delete(boxclip)
-    del boxclip
-
 
 #################################################################
 # view on slice OxOz
@@ -389,65 +739,20 @@ def makeOxOyview(
         background (bool, optional): transparent background (& text black). Defaults to False.
         customRangeHisto (bool, optional):  create custom range from field histogram. Defaults to False.
     """
-    print(f"makeOxOyview: field={field}", end="")
-    if suffix:
-        print(f", suffix={suffix}", end="")
-    print(f", z={z}", flush=True)
-
-    (toolbox, physic, fieldname) = keyinfo(field)
-    print(f"Exclude blocks = {fieldunits[fieldname]['Exclude']}", flush=True)
-
-    r_units = {"coord": fieldunits["coord"]["Units"]}
-    mm = f'{fieldunits["coord"]["Units"][1]:~P}'
-    z_mm = convert_data(r_units, z, "coord")
-    slice = makeplaneslice(input, f"OxOy-z={z_mm}{mm}", z=z)
-    selectedblocks = selectBlocks(
-        list(blockdata.keys()), fieldunits[fieldname]["Exclude"]
-    )
-    print(f"slice.Selectors = {selectedblocks}", flush=True)
-
-    filename = f"{basedir}/views/{field}-OxOy-z={z_mm}{mm}.png"
-    if suffix is not None:
-        filename = f"{basedir}/views/{field}{suffix}-OxOy-z={z_mm}{mm}.png"
-
-    comm = ""
-    if fieldunits["Current"]["Val"]:
-        comm = f'\nI={fieldunits["Current"]["Val"]}'
-    if fieldunits["B0"]["Val"]:
-        comm = comm + f'\nB0={fieldunits["B0"]["Val"]}T'
-    if fieldunits["Bbg"]["Val"]:
-        comm = comm + f'\nBackground field: {fieldunits["Bbg"]["Val"]}'
-    # position is None
-    renderView = displayField(
-        slice,
-        selectedblocks,
-        field,
+    renderGroup(
+        input,
+        blockdata,
+        "OxOy",
+        z,
+        [(field, color)],
         fieldunits,
-        color,
+        basedir,
+        suffix=suffix,
         addruler=addruler,
-        filename=filename,
-        position=(0, 0, 1),
-        focal=(0, 0, z),
-        roll=0,
-        polargrid=True,
-        comment=rf"z={z_mm} {mm}{comm}",
         background=background,
         customRangeHisto=customRangeHisto,
     )
 
-    """
-    viewUp=(0, 1, 0),
-    viewAngle=30,
-    parallelProjection=False,
-    roll=0,
-    elevation=0,
-    """
-
-    Delete(renderView)
-    del renderView
-    Delete(slice)
-    del slice
-
 
 #################################################################
 # view on slice OxOz
@@ -481,71 +786,107 @@ def makeOrOzview(
         background (bool, optional): transparent background (& text black). Defaults to False.
         customRangeHisto (bool, optional):  create custom range from field histogram. Defaults to False.
     """
-    from math import pi, cos, sin
+    renderGroup(
+        input,
+        blockdata,
+        "OrOz",
+        theta,
+        [(field, color)],
+        fieldunits,
+        basedir,
+        suffix=suffix,
+        addruler=addruler,
+        background=background,
+        customRangeHisto=customRangeHisto,
+    )
 
-    print(f"makeOrOzview: field={field}", end="")
-    if suffix:
-        print(f", suffix={suffix}", end="")
-    print(f", theta={theta}", flush=True)
 
-    (toolbox, physic, fieldname) = keyinfo(field)
-    print(f"Exclude blocks = {fieldunits[fieldname]['Exclude']}", flush=True)
+#################################################################
 
-    angle = theta + 90
-    radian = angle * pi / 180.0
 
-    slice = makeplaneOrOzslice(input, f"OrOz-theta={theta}deg", theta=angle)
-    selectedblocks = selectBlocks(
-        list(blockdata.keys()), fieldunits[fieldname]["Exclude"]
-    )
-    print(f"slice.Selectors = {selectedblocks}", flush=True)
+def viewgroups(args, fields: list[tuple]) -> list[dict]:
+    """returns the view groups of fields (see scheduler)
 
-    filename = f"{basedir}/views/{field}-OrOz-theta={theta}deg.png"
-    if suffix is not None:
-        filename = f"{basedir}/views/{field}{suffix}-OrOz-theta={theta}deg.png"
+    3D view with 1/4 cut out
+    if args.z : OxOy views
+    if args.thetaviews: OrOz views for theta in args.thetaviews
+    else if args.theta: OrOz views for theta in range(0, 180, 30)
 
-    print(f"theta={theta} deg, angle={angle} deg = {radian} rad", flush=True)
+    Args:
+        args: options
+        fields (list[tuple]): (field, color) to display
 
-    roll = -90
-    if theta > 90:
-        roll = 90
+    Returns:
+        list[dict]: groups {kind, value, fields}
+    """
 
-    comm = ""
-    if fieldunits["Current"]["Val"]:
-        comm = f'\nI={fieldunits["Current"]["Val"]}'
-    if fieldunits["B0"]["Val"]:
-        comm = comm + f'\nB0={fieldunits["B0"]["Val"]}T'
-    if fieldunits["Bbg"]["Val"]:
-        comm = comm + f'\nBackground field: {fieldunits["Bbg"]["Val"]}'
-    # position is None
-    renderView = displayField(
-        slice,
-        selectedblocks,
-        field,
-        fieldunits,
-        color,
-        addruler=addruler,
-        filename=filename,
-        position=(cos(radian - pi / 2.0), sin(radian - pi / 2.0), 0),
-        roll=roll,
-        grid=True,
-        comment=rf"theta={theta} deg{comm}",
-        background=background,
-        customRangeHisto=customRangeHisto,
-    )
-    # viewUp=(0, 1, 0),
-    # viewAngle=30,
-    # roll=angle,
-    # elevation=270,
-    # parallelProjection=False,
+    thetas = getattr(args, "thetaviews", None)
+    if not thetas:
+        thetas = list(range(0, 181, 30)) if args.theta else []
+    return scheduler.schedule(scheduler.requests(fields, args.z, thetas))
 
-    Delete(renderView)
-    del renderView
-    Delete(slice)
-    del slice
 
+@profiling.profiled("makeview")
+def makeviews(
+    args,
+    input,
+    blockdata,
+    fields: list[tuple],
+    fieldunits: dict,
+    basedir: str,
+    suffix: str = None,
+    addruler: bool = False,
+    printed: bool = True,
+    background: bool = False,
+    customRangeHisto: bool = False,
+    deformedfactor: int = None,
+    combine: list[str] = None,
+):
+    """create views of all fields, each slice is cut once for all fields
 
-#################################################################
+    3D view with 1/4 cut out
+    if args.z : make OxOy view
+    if args.theta or args.thetaviews: make OrOz views (see viewgroups)
+
+    the slices of a kind (all z, all theta) are cut in a single pass, the
+    deformed views are warped from the slices (see renderGroup)
+
+    Args:
+        args: options
+        input: paraview reader
+        blockdata: blockdata from meshinfo
+        fields (list[tuple]): (field, color) to display
+        fieldunits (dict): dict of field units
+        basedir (str):  result directory
+        suffix (str, optional):  None or -deformed. Defaults to None.
+        addruler (bool, optional): add ruler to view. Defaults to False.
+        printed (bool, optional): Defaults to True.
+        background (bool, optional): transparent background (& text black). Defaults to False.
+        customRangeHisto (bool, optional):  create custom range from field histogram. Defaults to False.
+        deformedfactor (int, optional): factor of the paired deformed views. Defaults to None.
+        combine (list[str], optional): "sidebyside", "overlay" views of pairs. Defaults to None.
+    """
+
+    groups = viewgroups(args, fields)
+    families = scheduler.families(groups)
+    print(f"Make {len(groups)} view groups for {len(fields)} fields", flush=True)
+    for group in groups:
+        renderGroup(
+            input,
+            blockdata,
+            group["kind"],
+            group["value"],
+            group["fields"],
+            fieldunits,
+            basedir,
+            suffix=suffix,
+            addruler=addruler,
+            background=background,
+            customRangeHisto=customRangeHisto,
+            family=families.get(group["kind"]),
+            deformedfactor=deformedfactor,
+            combine=combine,
+        )
 
 
 def makeview(
@@ -562,10 +903,7 @@ def makeview(
     background: bool = False,
     customRangeHisto: bool = False,
 ):
-    """create views
-
-    if args.z : make OxOy view
-    if args.theta: make OrOz view
+    """create views of a field (see makeviews)
 
     Args:
         args: options
@@ -582,48 +920,133 @@ def makeview(
         customRangeHisto (bool, optional):  create custom range from field histogram. Defaults to False.
     """
 
-    print("Make 3D view with 1/4 cut out:")
-    make3Dview(
+    makeviews(
+        args,
         input,
         blockdata,
-        field,
+        [(field, color)],
         fieldunits,
-        color,
         basedir,
         suffix=suffix,
         addruler=addruler,
         background=background,
         customRangeHisto=customRangeHisto,
     )
-    if args.z:
-        for z in args.z:
-            makeOxOyview(
-                input,
-                blockdata,
-                field,
-                fieldunits,
-                color,
-                z,
-                basedir,
-                suffix=suffix,
-                addruler=addruler,
-                background=background,
-                customRangeHisto=customRangeHisto,
+
+
+@profiling.profiled("animation")
+@arena.owned("animation")
+def makeanimations(
+    args,
+    input,
+    blockdata,
+    fields: list[tuple],
+    fieldunits: dict,
+    basedir: str,
+    fps: int = 5,
+    format: str = "mp4",
+    background: bool = False,
+):
+    """create animations of fields over the time steps, for the views of makeviews
+
+    the geometry and the camera of each view are set once, at the first time step
+    (see animation.freeze), then each time step only updates the field arrays
+    and renders a frame of each field; the color range of a field is the range
+    over all time steps (a first pass reads the time steps without rendering)
+
+    frames are saved in basedir/animations/{field}{tag}/ and assembled in
+    basedir/animations/{field}{tag}.{format}
+
+    Args:
+        args: options (see viewgroups)
+        input: paraview reader, with a static mesh
+        blockdata: blockdata from meshinfo
+        fields (list[tuple]): (field, color) to animate
+        fieldunits (dict): dict of field units
+        basedir (str): result directory
+        fps (int, optional): frames per second. Defaults to 5.
+        format (str, optional): "mp4" or "gif". Defaults to "mp4".
+        background (bool, optional): transparent background (& text black). Defaults to False.
+    """
+
+    times = animation.timesteps(input)
+    print(f"makeanimations: {len(times)} time steps, fields={fields}", flush=True)
+    if len(times) < 2:
+        print("makeanimations: no time steps to animate", flush=True)
+        return
+
+    # geometry, camera and render view of each view group, built once
+    groups = viewgroups(args, fields)
+    families = scheduler.families(groups)
+    cellids = cache.get(animation.cellIds, input)
+    (geometries, movies) = ([], [])
+    for group in groups:
+        (kind, value) = (group["kind"], group["value"])
+        (tag, cut, comment, setup) = viewSetup(
+            cellids, kind, value, fieldunits, families.get(kind)
+        )
+        (builder, cutargs, kwargs) = cut
+        key = f"{kind}{tag}"
+        animation.freeze(builder(*cutargs, **kwargs), cellids, key, times[0])
+        geometry = animation.remap(input, key)
+        geometries.append(geometry)
+        renderView = renderSession(geometry, background=background, **setup)
+        for field, color in group["fields"]:
+            (toolbox, physic, fieldname) = keyinfo(field)
+            movies.append(
+                {
+                    "field": field,
+                    "color": color,
+                    "name": f"{field}{tag}",
+                    "blocks": selectBlocks(
+                        list(blockdata.keys()), fieldunits[fieldname]["Exclude"]
+                    ),
+                    "exclude": kind == "3D" and bool(fieldunits[fieldname]["Exclude"]),
+                    "geometry": geometry,
+                    "view": renderView,
+                    "comment": comment,
+                    "setup": setup,
+                    "range": None,
+                }
+            )
+
+    # color ranges over the time steps
+    for time in times:
+        for geometry in geometries:
+            geometry.UpdatePipeline(time)
+        for movie in movies:
+            r = blockRange(
+                movie["geometry"], movie["blocks"], movie["field"], movie["color"]
             )
+            if r and movie["range"]:
+                r = (min(r[0], movie["range"][0]), max(r[1], movie["range"][1]))
+            movie["range"] = r or movie["range"]
 
-    if args.theta:
-        print("Make 2D view for theta in range(0, 180, 30):")
-        for theta in range(0, 181, 30):
-            makeOrOzview(
-                input,
-                blockdata,
-                field,
+    for i, time in enumerate(times):
+        print(f"makeanimations: time={time} ({i + 1}/{len(times)})", flush=True)
+        for movie in movies:
+            movie["view"].ViewTime = time
+            os.makedirs(f"{basedir}/animations/{movie['name']}", exist_ok=True)
+            displayField(
+                movie["geometry"],
+                movie["blocks"],
+                movie["field"],
                 fieldunits,
-                color,
-                theta,
-                basedir,
-                suffix=suffix,
-                addruler=addruler,
+                movie["color"],
+                addruler=False,
+                renderView=movie["view"],
+                filename=f"{basedir}/animations/{movie['name']}/{i:04d}.png",
+                comment=f"{movie['comment']}\nt={time:g} s",
+                excludeBlocks=movie["exclude"],
                 background=background,
-                customRangeHisto=customRangeHisto,
+                range=movie["range"],
+                **movie["setup"],
             )
+
+    for movie in movies:
+        animation.save(
+            f"{basedir}/animations/{movie['name']}/%04d.png",
+            f"{basedir}/animations/{movie['name']}.{format}",
+            fps,
+        )
+    animation.release()
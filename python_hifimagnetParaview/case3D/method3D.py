@@ -2,6 +2,8 @@ import os
 import json
 import copy
 
+from ..tensors import suffixes as _tensorSuffixes
+
 
 def dictTypeUnits(ureg, distance_unit: str):
     """create dict of units per Type for 3D
@@ -581,6 +583,73 @@ def dictTypeUnits(ureg, distance_unit: str):
     return TypeUnits
 
 
+def addTensorToFieldunits(
+    fieldunits: dict, name: str, letter: str, Units: list, Exclude: list[str]
+):
+    """add derived fields of a 3D tensor to fieldunits dict
+
+    Args:
+        fieldunits (dict): dict of field units
+        name (str): name of tensor field
+        letter (str): latex symbol of tensor (eg. sigma)
+        Units (list): units of tensor
+        Exclude (list[str]): list of excluded marker of field
+
+    Returns:
+        dict: updated fieldunits
+    """
+
+    for suffix in _tensorSuffixes:
+        fieldunits[f"{name}_{suffix}"] = {
+            "Symbol": f"{name}_{suffix}",
+            "mSymbol": rf"$\bar{{\bar{{\{letter}}}}}_{{{suffix}}}$",
+            "Units": Units,
+            "Exclude": Exclude if Exclude else ["Air"],
+        }
+    return fieldunits
+
+
+def addTensorsFromReader(input, fieldunits: dict, ignored_keys: list[str]):
+    """add derived fields of the 3D tensors of a dataset to fieldunits dict
+
+    used when fieldunits are not created from the json export (see create_dicts):
+    tensors with units get their derived fields (see meshinfo.createTensorFields),
+    tensors without units are ignored with their derived fields
+
+    Args:
+        input: paraview reader
+        fieldunits (dict): dict of field units
+        ignored_keys (list[str]): list of ignored fields, updated
+
+    Returns:
+        dict: updated fieldunits
+    """
+
+    from ..method import keyinfo
+
+    for fields in [input.PointData, input.CellData]:
+        for field in fields:
+            if field.GetNumberOfComponents() not in [6, 9]:
+                continue
+            (toolbox, physic, fieldname) = keyinfo(field.Name)
+            if fieldname in fieldunits:
+                fieldunits = addTensorToFieldunits(
+                    fieldunits,
+                    fieldname,
+                    "epsilon" if "strain" in fieldname.lower() else "sigma",
+                    fieldunits[fieldname]["Units"],
+                    fieldunits[fieldname].get("Exclude", []),
+                )
+                continue
+            print(f"{field.Name} tensor: no units, ignored", flush=True)
+            for key in [field.Name] + [
+                f"{field.Name}_{suffix}" for suffix in _tensorSuffixes
+            ]:
+                if key not in ignored_keys:
+                    ignored_keys.append(key)
+    return fieldunits
+
+
 def addFieldToFieldunits(
     fieldunits: dict, name: str, Type: str, Exclude: list[str], TypeUnits: dict
 ):
@@ -614,12 +683,18 @@ def addFieldToFieldunits(
             fieldunits[f"{name}_{suffix}"] = TypeUnits[f"{Type}_{suffix}"]
             if Exclude:
                 fieldunits[f"{name}_{suffix}"]["Exclude"] = Exclude
+        fieldunits = addTensorToFieldunits(
+            fieldunits, name, "sigma", TypeUnits["VonMises"]["Units"], Exclude
+        )
     elif Type in ["Strain"]:
         for i in range(3):
             for j in range(3):
                 fieldunits[f"{name}_{i}{j}"] = TypeUnits[f"{Type}_{i}{j}"]
                 if Exclude:
                     fieldunits[f"{name}_{i}{j}"]["Exclude"] = Exclude
+        fieldunits = addTensorToFieldunits(
+            fieldunits, name, "epsilon", TypeUnits["Strain_00"]["Units"], Exclude
+        )
     else:
         fieldunits[name] = TypeUnits[Type]
         if Exclude:
@@ -704,6 +779,9 @@ def create_dicts_fromjson(field_dict: dict, ureg, distance_unit: str, basedir: s
         "elasticity.PoissonCoefficient",
         "elasticity.YoungModulus",
         "Volume",
+        "NodalVolume",
+        "BlockId",
+        "CellCenters",
         "r",
         "Cos",
         "Sin",
@@ -1044,6 +1122,9 @@ def create_dicts(ureg, distance_unit: str, basedir: str):
         "elasticity.PoissonCoefficient",
         "elasticity.YoungModulus",
         "Volume",
+        "NodalVolume",
+        "BlockId",
+        "CellCenters",
         "r",
         "Cos",
         "Sin",
@@ -1,6 +1,5 @@
 import pandas as pd
 import os
-import gc
 import matplotlib.pyplot as plt
 from matplotlib.ticker import MaxNLocator
 from numpy import pi, arctan2
@@ -8,17 +7,18 @@ from math import pi, cos, sin
 
 from paraview.simple import (
     PlotOnIntersectionCurves,
-    CellDatatoPointData,
     PlotOverLine,
-    Delete,
     CreateWriter,
     SetActiveSource,
 )
 
 from ..method import convert_data, resultinfo, showplot, plot_greySpace, keyinfo
-from ..view import makeclip, makecylinderslice
+from ..writer import toCSV
+from .. import cache, profiling, arena
+from ..view import makeclip, makecylinderslice, makefamilyslice
 
 
+@arena.owned("plot")
 def plotOr(
     input,
     r: list[float],
@@ -36,7 +36,7 @@ def plotOr(
     """plot vs r for a given theta and a given z
 
     Args:
-        input: paraview reader
+        input: paraview reader with PointData
         r (list[float]): [r_start, r_end]
         theta (float): angle of the plot in degree
         z (float): z coordinate of the plot in m
@@ -55,11 +55,7 @@ def plotOr(
     [r0, r1] = r
     radian = theta * pi / 180.0
 
-    cellDatatoPointData1 = CellDatatoPointData(
-        registrationName="CellDatatoPointData", Input=input
-    )
-
-    plotOverLine = PlotOverLine(registrationName="Oz", Input=cellDatatoPointData1)
+    plotOverLine = PlotOverLine(registrationName="Oz", Input=input)
     # get params list
     if not printed:
         for prop in plotOverLine.ListProperties():
@@ -136,12 +132,14 @@ def plotOr(
         if greyspace:
             legend = plot_greySpace(keycsv, "r", key, ax, legend)
 
-        keycsv.to_csv(f"{basedir}/plots/{key}-vs-r-theta={theta}deg-z={z_mm}{mm}.csv")
+        toCSV(
+            keycsv, f"{basedir}/plots/{key}-vs-r-theta={theta}deg-z={z_mm}{mm}.csv"
+        )
         return legend
 
-    # requirements: create PointData from CellData
+    # requirements: PointData (see method.pointData)
     # for field in input.PointData.keys():
-    datadict = resultinfo(cellDatatoPointData1, ignored_keys)
+    datadict = resultinfo(input, ignored_keys)
     for field in datadict["PointData"]["Arrays"]:
         if not field in ignored_keys and (not argsfield or field.startswith(argsfield)):
             kdata = datadict["PointData"]["Arrays"][field]
@@ -169,14 +167,10 @@ def plotOr(
     # remove temporary csv files
     os.remove(filename)
 
-    Delete(plotOverLine)
-    del plotOverLine
-
-    Delete(cellDatatoPointData1)
-    del cellDatatoPointData1
     return axs
 
 
+@arena.owned("plot")
 def plotOz(
     input,
     r: float,
@@ -193,7 +187,7 @@ def plotOz(
     """plot along z for a given r and for a given theta
 
     Args:
-        input: paraview reader
+        input: paraview reader with PointData
         r (float): r coordinates in m
         theta (float): angle of the plot in degrees
         z (list[float]): [z_start, z_end]
@@ -211,11 +205,7 @@ def plotOz(
     [z0, z1] = z
     radian = theta * pi / 180.0
 
-    cellDatatoPointData1 = CellDatatoPointData(
-        registrationName="CellDatatoPointData", Input=input
-    )
-
-    plotOverLine = PlotOverLine(registrationName="Oz", Input=cellDatatoPointData1)
+    plotOverLine = PlotOverLine(registrationName="Oz", Input=input)
 
     # init the 'Line' selected for 'Source'
     plotOverLine.Point1 = [r * cos(radian), r * sin(radian), z0]
@@ -279,12 +269,14 @@ def plotOz(
         mm = f'{fieldunits["coord"]["Units"][1]:~P}'
         r_mm = convert_data(r_units, r, "coord")
 
-        keycsv.to_csv(f"{basedir}/plots/{key}-vs-z-theta={theta}deg-r={r_mm}{mm}.csv")
+        toCSV(
+            keycsv, f"{basedir}/plots/{key}-vs-z-theta={theta}deg-r={r_mm}{mm}.csv"
+        )
         return legend
 
-    # requirements: create PointData from CellData
+    # requirements: PointData (see method.pointData)
     # for field in input.PointData.keys():
-    datadict = resultinfo(cellDatatoPointData1, ignored_keys)
+    datadict = resultinfo(input, ignored_keys)
     for field in datadict["PointData"]["Arrays"]:
         if not field in ignored_keys and (not argsfield or field.startswith(argsfield)):
             kdata = datadict["PointData"]["Arrays"][field]
@@ -311,15 +303,11 @@ def plotOz(
     # remove temporary csv files
     os.remove(filename)
 
-    Delete(plotOverLine)
-    del plotOverLine
-
-    Delete(cellDatatoPointData1)
-    del cellDatatoPointData1
     return axs
 
 
 # @profile
+@arena.owned("plot")
 def plotTheta(
     input,
     r: float,
@@ -332,11 +320,12 @@ def plotTheta(
     marker: str = None,
     axs: dict = None,  # dict of fig,ax for each field
     argsfield: str = None,
+    radii: list[float] = None,
 ) -> dict:
     """plot along theta for a given r and for a given z
 
     Args:
-        input: paraview reader
+        input: paraview reader with PointData
         r (float): r coordinates in m
         z (float): z coordinates in m
         fieldunits (dict): dict of field units
@@ -347,24 +336,26 @@ def plotTheta(
         marker (str, optional): plot on specific marker. Defaults to None.
         axs (dict, optional): dict containing fig,ax,legend for each exported fields. Defaults to None.
         argsfield (str, optional): selected field to display. Defaults to None.
+        radii (list[float], optional): r of all theta plots, sliced together. Defaults to None.
 
     Returns:
         dict: contains fig,ax,legend for each exported fields
     """
 
     print(f"plotTheta: r={r}, z={z}", flush=True)
-    cellDatatoPointData1 = CellDatatoPointData(
-        registrationName="CellDatatoPointData", Input=input
-    )
-
     # create clip with plane (howto give a color for each clip)
     print("cellDatatoPointDatalip up and down", flush=True)
-    clip_down = makeclip(cellDatatoPointData1, "clip_down", invert=False)
-    clip_up = makeclip(cellDatatoPointData1, "clip_up", invert=True)
+    clip_down = cache.get(makeclip, input, "clip_down", invert=False)
+    clip_up = cache.get(makeclip, input, "clip_up", invert=True)
 
     files = []
     for i, clip in enumerate([clip_down, clip_up]):
-        slice = makecylinderslice(clip, f"slice{i}", r)
+        if radii and r in radii:
+            slice = cache.get(
+                makefamilyslice, clip, f"slice{i}-r={r}m", "Cylinder", radii, r
+            )
+        else:
+            slice = cache.get(makecylinderslice, clip, f"slice{i}", r)
         SetActiveSource(slice)
 
         plotOnIntersectionCurve = PlotOnIntersectionCurves(
@@ -457,7 +448,9 @@ def plotTheta(
         mm = f'{fieldunits["coord"]["Units"][1]:~P}'
         r_mm = convert_data(r_units, r, "coord")
         z_mm = convert_data(r_units, z, "coord")
-        df.to_csv(f"{basedir}/plots/{key}-vs-theta-r={r_mm}{mm}-z={z_mm}{mm}.csv")
+        toCSV(
+            df, f"{basedir}/plots/{key}-vs-theta-r={r_mm}{mm}-z={z_mm}{mm}.csv"
+        )
         # print(f"df keys: {df.columns.values.tolist()}", flush=True)
         # assert key in df.columns.values.tolist(), f"{key} not in df_keys"
         # print(f"df={df}", flush=True)
@@ -478,8 +471,8 @@ def plotTheta(
         print(f"{df[key].describe()}", flush=True)
         return legend
 
-    # requirements: create PointData from CellData
-    datadict = resultinfo(cellDatatoPointData1, ignored_keys)
+    # requirements: PointData (see method.pointData)
+    datadict = resultinfo(input, ignored_keys)
     for field in datadict["PointData"]["Arrays"]:
         if not field in ignored_keys and (not argsfield or field.startswith(argsfield)):
             kdata = datadict["PointData"]["Arrays"][field]
@@ -509,17 +502,10 @@ def plotTheta(
     for file in files:
         os.remove(file)
 
-    Delete(cellDatatoPointData1)
-    del cellDatatoPointData1
-
-    # Force a garbage collection
-    collected = gc.collect()
-    if verbose:
-        print(f"Garbage collector: collected {collected} objects.", flush=True)
-
     return axs
 
 
+@profiling.profiled("makeplot")
 def makeplot(args, cellsize, fieldunits: dict, ignored_keys: list[str], basedir: str):
     """different plot situations for 3D
 
@@ -555,6 +541,7 @@ def makeplot(args, cellsize, fieldunits: dict, ignored_keys: list[str], basedir:
                     marker=args.plotsMarker,
                     axs=figaxs,
                     argsfield=args.field,
+                    radii=args.r,
                 )
 
             showplot(
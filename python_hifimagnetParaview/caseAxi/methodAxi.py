@@ -418,6 +418,9 @@ def create_dicts_fromjson(field_dict: dict, ureg, distance_unit: str, basedir: s
     ignored_keys = [
         "Area",
         "AxiVolume",
+        "NodalArea",
+        "BlockId",
+        "CellCenters",
         "r",
         "Cos",
         "Sin",
@@ -748,6 +751,9 @@ def create_dicts(ureg, distance_unit: str, basedir: str):
         "elasticity.YoungModulus",
         "Area",
         "AxiVolume",
+        "NodalArea",
+        "BlockId",
+        "CellCenters",
         "r",
         "Cos",
         "Sin",
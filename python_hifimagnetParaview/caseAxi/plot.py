@@ -2,11 +2,14 @@ import pandas as pd
 import os
 import matplotlib.pyplot as plt
 
-from paraview.simple import CellDatatoPointData, PlotOverLine, CreateWriter, Delete
+from paraview.simple import PlotOverLine, CreateWriter
 
+from .. import profiling, arena
 from ..method import convert_data, resultinfo, showplot, plot_greySpace, keyinfo
+from ..writer import toCSV
 
 
+@arena.owned("plot")
 def plotOr(
     input,
     r: list[float],
@@ -23,7 +26,7 @@ def plotOr(
     """plot vs r for a given z
 
     Args:
-        input: paraview reader
+        input: paraview reader with PointData
         r (list[float]): [r_start, r_end]
         z (float): z coordinate of the plot in m
         fieldunits (dict): dict of field units
@@ -40,11 +43,7 @@ def plotOr(
     """
     [r0, r1] = r
 
-    cellDatatoPointData1 = CellDatatoPointData(
-        registrationName="CellDatatoPointData", Input=input
-    )
-
-    plotOverLine = PlotOverLine(registrationName="Oz", Input=cellDatatoPointData1)
+    plotOverLine = PlotOverLine(registrationName="Oz", Input=input)
     # get params list
     if not printed:
         for prop in plotOverLine.ListProperties():
@@ -114,14 +113,14 @@ def plotOr(
 
         ax.set_xlabel("r [m]", fontsize=18)
         ax.set_ylabel(rf"{symbol} [{out_unit:~P}]", fontsize=18)
-        keycsv.to_csv(f"{basedir}/plots/{key}-vs-r-z={z_mm}mm.csv")
+        toCSV(keycsv, f"{basedir}/plots/{key}-vs-r-z={z_mm}mm.csv")
 
         # ax.yaxis.set_major_locator(MaxNLocator(10))
         return legend
 
-    # requirements: create PointData from CellData
+    # requirements: PointData (see method.pointData)
     # for field in input.PointData.keys():
-    datadict = resultinfo(cellDatatoPointData1, ignored_keys)
+    datadict = resultinfo(input, ignored_keys)
     for field in datadict["PointData"]["Arrays"]:
         if not field in ignored_keys and (not argsfield or field.startswith(argsfield)):
             kdata = datadict["PointData"]["Arrays"][field]
@@ -146,14 +145,10 @@ def plotOr(
 
     os.remove(filename)
 
-    Delete(plotOverLine)
-    del plotOverLine
-
-    Delete(cellDatatoPointData1)
-    del cellDatatoPointData1
     return axs
 
 
+@arena.owned("plot")
 def plotOz(
     input,
     r: float,
@@ -169,7 +164,7 @@ def plotOz(
     """plot along z for a given r
 
     Args:
-        input: paraview reader
+        input: paraview reader with PointData
         r (float): r coordinates in m
         z (list[float]): [z_start, z_end]
         fieldunits (dict): dict of field units
@@ -185,11 +180,7 @@ def plotOz(
     """
     [z0, z1] = z
 
-    cellDatatoPointData1 = CellDatatoPointData(
-        registrationName="CellDatatoPointData", Input=input
-    )
-
-    plotOverLine = PlotOverLine(registrationName="Oz", Input=cellDatatoPointData1)
+    plotOverLine = PlotOverLine(registrationName="Oz", Input=input)
 
     # init the 'Line' selected for 'Source'
     plotOverLine.Point1 = [r, z0, 0]
@@ -246,14 +237,14 @@ def plotOz(
 
         ax.set_xlabel("z [m]", fontsize=18)
         ax.set_ylabel(rf"{symbol} [{out_unit:~P}]", fontsize=18)
-        keycsv.to_csv(f"{basedir}/plots/{key}-vs-z-r={r_mm}mm.csv")
+        toCSV(keycsv, f"{basedir}/plots/{key}-vs-z-r={r_mm}mm.csv")
 
         # ax.yaxis.set_major_locator(MaxNLocator(10))
         return legend
 
-    # requirements: create PointData from CellData
+    # requirements: PointData (see method.pointData)
     # for field in input.PointData.keys():
-    datadict = resultinfo(cellDatatoPointData1, ignored_keys)
+    datadict = resultinfo(input, ignored_keys)
     for field in datadict["PointData"]["Arrays"]:
         if not field in ignored_keys and (not argsfield or field.startswith(argsfield)):
             kdata = datadict["PointData"]["Arrays"][field]
@@ -277,6 +268,7 @@ def plotOz(
     return axs
 
 
+@profiling.profiled("makeplot")
 def makeplot(args, cellsize, fieldunits: dict, ignored_keys: list[str], basedir: str):
     """different plot situations for Axi
 
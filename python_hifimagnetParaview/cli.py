@@ -1,32 +1,18 @@
 # import vtk
-import pandas as pd
-
-from paraview.simple import (
-    ExtractBlock,
-    ExtractSurface,
-    GetParaViewVersion,
-    Delete,
-    SaveData,
-)
-
-from .method import load, info, getbounds, resultinfo, getcurrent, getB0
-from .view import deformed, makethetaclip
-from .json import returnExportFields
-
-pd.options.mode.copy_on_write = True
-
-import argparse, argcomplete
+# paraview, pandas and pint are only imported by the operations using them
+# to keep options parsing, completion and --listfields fast
+import argparse
 import os
 import sys
+import json
 
-from pint import UnitRegistry, Quantity
+from .json import returnExportFields
+from . import writer, cache, profiling, arena, jobspec, expressions, renderpool
+from . import viewcache
 
 # Ignore warning for pint
 import warnings
 
-with warnings.catch_warnings():
-    warnings.simplefilter("ignore")
-    Quantity([])
 warnings.filterwarnings("ignore")
 
 
@@ -48,12 +34,73 @@ def options(description: str, epilog: str):
         allparsers.add_argument(
             "--json", type=str, help="input json file for fieldunits", default=None
         )
+        allparsers.add_argument(
+            "--listfields",
+            help="print fields detected from --json and exit (no paraview)",
+            action="store_true",
+        )
+        allparsers.add_argument(
+            "--dryrun",
+            "--dry-run",
+            nargs="?",
+            const=True,
+            metavar="PROFILE",
+            help="print planned work, estimated cost and recommended options and exit "
+            "(no paraview), PROFILE: profile.json of a previous run to calibrate costs",
+            default=None,
+        )
+        allparsers.add_argument(
+            "--job",
+            type=str,
+            help="run the outputs of a json/yaml job spec instead of the flags",
+            default=None,
+        )
         allparsers.add_argument(
             "--views", help="activate views calculations", action="store_true"
         )
         allparsers.add_argument(
             "--field", type=str, help="select field to display", default=""
         )
+        allparsers.add_argument(
+            "--scene",
+            nargs="?",
+            const=200000,
+            type=int,
+            metavar="TRIANGLES",
+            help="export a decimated surface with its fields as glTF (scene/*.glb), "
+            "TRIANGLES: triangle budget (default 200000)",
+            default=None,
+        )
+        allparsers.add_argument(
+            "--animate",
+            nargs="*",
+            metavar="FIELD",
+            help="animate fields over the time steps (animations/*), "
+            "all view fields if no FIELD is given",
+            default=None,
+        )
+        allparsers.add_argument(
+            "--fps", type=int, help="frames per second of animations", default=5
+        )
+        allparsers.add_argument(
+            "--movieformat",
+            choices=["mp4", "gif"],
+            help="movie format of animations (ffmpeg)",
+            default="mp4",
+        )
+        allparsers.add_argument(
+            "--forceviews",
+            "--force-views",
+            help="render all views, even those up to date in views/manifest.json",
+            action="store_true",
+        )
+        allparsers.add_argument(
+            "--renderjobs",
+            "--render-jobs",
+            type=int,
+            help="render views in N offscreen worker processes (3D and 2D)",
+            default=1,
+        )
         allparsers.add_argument(
             "--transparentBG",
             help="transparent background for views",
@@ -70,6 +117,14 @@ def options(description: str, epilog: str):
             help="select factor for deformed views",
             default=1,
         )
+        allparsers.add_argument(
+            "--combine",
+            nargs="+",
+            choices=["sidebyside", "overlay"],
+            help="combine deformed views with views: side by side, or deformed "
+            "views with the edges of the undeformed geometry",
+            default=[],
+        )
         allparsers.add_argument(
             "--cliptheta",
             type=float,
@@ -79,6 +134,11 @@ def options(description: str, epilog: str):
         allparsers.add_argument(
             "--stats", help="activate stats calculations", action="store_true"
         )
+        allparsers.add_argument(
+            "--compact",
+            help="store derived fields in float32 (stats are accumulated in float64)",
+            action="store_true",
+        )
         allparsers.add_argument(
             "--histos", help="activate histograms calculations", action="store_true"
         )
@@ -101,6 +161,31 @@ def options(description: str, epilog: str):
             allparsers.add_argument(
                 "--theta", nargs="*", type=float, help="select theta in deg to display"
             )
+            allparsers.add_argument(
+                "--byparts",
+                help="bounded memory mode: compute stats block by block",
+                action="store_true",
+            )
+            allparsers.add_argument(
+                "--memorylimit",
+                type=float,
+                help="memory ceiling in MB for blocks loaded together with --byparts",
+                default=None,
+            )
+        if allparsers == parser_3D:
+            allparsers.add_argument(
+                "--thetaviews",
+                nargs="*",
+                type=float,
+                help="select theta in deg of OrOz views (default 0 to 180 by 30)",
+                default=None,
+            )
+        if allparsers != parser_3D:
+            allparsers.add_argument(
+                "--raster",
+                help="rasterize views with numpy, without a render view (quick looks)",
+                action="store_true",
+            )
         if allparsers != parser_2D:
             allparsers.add_argument(
                 "--channels", help="activate views calculations", action="store_true"
@@ -123,6 +208,20 @@ def options(description: str, epilog: str):
             help="activate verbose mode",
             action="store_true",
         )
+        allparsers.add_argument(
+            "--memorybudget",
+            type=float,
+            help="memory budget in MB of paraview data, checked at each stage end",
+            default=None,
+        )
+        allparsers.add_argument(
+            "--profile",
+            nargs="?",
+            const="report",
+            choices=["report", "trace"],
+            help="save stages timing and memory (trace: add a Chrome trace)",
+            default=None,
+        )
 
         allparsers.add_argument(
             "--current", type=str, help="input current value or csv", default=None
@@ -137,6 +236,23 @@ def options(description: str, epilog: str):
     return parser
 
 
+def getbasedir(file: str) -> str:
+    """create results directory
+
+    Args:
+        file (str): paraview result file
+
+    Returns:
+        str: result directory
+    """
+
+    basedir = f"{os.path.dirname(file)}/paraview.exports"
+    # basedir = os.path.dirname(args.file).replace(f"{toolbox}.export", "paraview.export")
+    print("Results are stored in: ", basedir, flush=True)
+    os.makedirs(basedir, exist_ok=True)
+    return basedir
+
+
 def init(file: str):
     """initialize paraview reader, pint units, results directory
 
@@ -151,15 +267,20 @@ def init(file: str):
         reader : paraview reader file
     """
 
+    from paraview.simple import GetParaViewVersion
+    from pint import UnitRegistry, Quantity
+
+    from .method import load, info, getbounds
+
     # get current working directory
     cwd = os.getcwd()
     print("workingdir=", cwd)
-    basedir = f"{os.path.dirname(file)}/paraview.exports"
-    # basedir = os.path.dirname(args.file).replace(f"{toolbox}.export", "paraview.export")
-    print("Results are stored in: ", basedir, flush=True)
-    os.makedirs(basedir, exist_ok=True)
+    basedir = getbasedir(file)
 
     # Pint configuration
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        Quantity([])
     ureg = UnitRegistry()
     ureg.define("percent = 0.01 = %")
     ureg.define("ppm = 1e-6")
@@ -187,40 +308,95 @@ def init(file: str):
 
 def main():
 
+    import argcomplete
+
     parser = options("", "")
     argcomplete.autocomplete(parser)
     args = parser.parse_args()
     print(f"args: {args}")
 
+    if args.listfields:
+        if not args.json:
+            parser.error("--listfields requires --json")
+        fieldtype = returnExportFields(args.json, getbasedir(args.file))
+        print(json.dumps(fieldtype, indent=4), flush=True)
+        return
+
+    if args.dryrun:
+        from .estimate import dryrun
+
+        dryrun(args, getbasedir(args.file))
+        return
+
+    if args.profile:
+        profiling.start()
+    arena.configure(args.memorybudget, args.verbose)
+
+    # outputs are written in background, write errors are reported at exit
+    writer.start()
+    try:
+        with profiling.stage("main"):
+            try:
+                process(args)
+            finally:
+                renderpool.close()
+                # shared pipeline objects (see cache.get) are released once all is done
+                cache.release()
+                leaks = arena.leaks()
+                if leaks:
+                    print(f"arena: proxies released at stage end {leaks}", flush=True)
+                with profiling.stage("writer.flush"):
+                    errors = writer.flush()
+                viewcache.save(errors)
+    finally:
+        if args.profile:
+            basedir = getbasedir(args.file)
+            trace = None
+            if args.profile == "trace":
+                trace = f"{basedir}/profile-trace.json"
+            profiling.report(f"{basedir}/profile.json", trace)
+
+    if errors:
+        print(f"{len(errors)} output files could not be written", flush=True)
+        return 1
+
+
+def prepare(args) -> dict:
+    """load the dataset and the field units selected in args
+
+    shared by process and the render workers (see renderpool)
+
+    Args:
+        args: parsed command line options
+
+    Returns:
+        dict: {dim, axis, basedir, ureg, reader, fieldunits, ignored_keys}
+    """
+
+    from .method import getcurrent, getB0
+    from .view import makethetaclip
+
     match args.dimmension:
         case "3D":
-            from .meshinfo import meshinfo
-            from .case3D.plot import makeplot
-            from .case3D.display3D import makeview
             from .case3D.method3D import create_dicts, create_dicts_fromjson
 
             dim = 3
             axis = False
         case "2D":
-            from .meshinfo import meshinfo
-            from .case2D.plot import makeplot
-            from .case2D.display2D import makeview
             from .case2D.method2D import create_dicts, create_dicts_fromjson
 
             dim = 2
             axis = False
         case "Axi":
-            from .meshinfoAxi import meshinfo
-            from .caseAxi.plot import makeplot
-            from .case2D.display2D import makeview
             from .caseAxi.methodAxi import create_dicts, create_dicts_fromjson
 
             dim = 2
             axis = True
         case _:
-            pass
+            raise RuntimeError(f"unsupported dimmension {args.dimmension}")
 
-    (cwd, basedir, ureg, distance_unit, reader) = init(args.file)
+    with profiling.stage("load"):
+        (cwd, basedir, ureg, distance_unit, reader) = init(args.file)
 
     if args.json:
         fieldtype = returnExportFields(args.json, basedir)
@@ -229,6 +405,19 @@ def main():
         )
     else:
         fieldunits, ignored_keys = create_dicts(ureg, distance_unit, basedir)
+        if dim == 3:
+            from .case3D.method3D import addTensorsFromReader
+
+            fieldunits = addTensorsFromReader(reader, fieldunits, ignored_keys)
+
+    # views rendered by a previous run on the same dataset are skipped
+    viewcache.configure(
+        basedir,
+        args.file,
+        args.forceviews,
+        cliptheta=args.cliptheta,
+        compact=args.compact,
+    )
 
     if dim == 2 and args.cliptheta:
         reader = makethetaclip(reader, args.cliptheta, invert=False)
@@ -249,6 +438,55 @@ def main():
         print(f"Background Field: {Bbg}")
         fieldunits["Bbg"]["Val"] = Bbg
 
+    return {
+        "dim": dim,
+        "axis": axis,
+        "basedir": basedir,
+        "ureg": ureg,
+        "reader": reader,
+        "fieldunits": fieldunits,
+        "ignored_keys": ignored_keys,
+    }
+
+
+def process(args):
+    """run post-processing operations selected in args
+
+    Args:
+        args: parsed command line options
+    """
+
+    import pandas as pd
+    from paraview.simple import ExtractBlock, ExtractSurface
+
+    from .method import pointData
+    from .view import deformed, viewGeometry
+    from .scene import exportScene
+    from .estimate import readcase
+
+    pd.options.mode.copy_on_write = True
+
+    match args.dimmension:
+        case "3D":
+            from .meshinfo import meshinfo
+            from .case3D.plot import makeplot
+            from .case3D.display3D import makeviews, viewgroups, makeanimations
+        case "2D":
+            from .meshinfo import meshinfo
+            from .case2D.plot import makeplot
+            from .case2D.display2D import makeviews, viewgroups, makeanimations
+        case "Axi":
+            from .meshinfoAxi import meshinfo
+            from .caseAxi.plot import makeplot
+            from .case2D.display2D import makeviews, viewgroups, makeanimations
+        case _:
+            pass
+
+    context = prepare(args)
+    (dim, axis, basedir) = (context["dim"], context["axis"], context["basedir"])
+    (ureg, reader) = (context["ureg"], context["reader"])
+    (fieldunits, ignored_keys) = (context["fieldunits"], context["ignored_keys"])
+
     if args.field:
         if args.field in list(reader.CellData.keys()):
             field = reader.CellData[args.field]
@@ -263,30 +501,18 @@ def main():
             # if field.GetNumberOfComponents() == dim:
             #    color = ["POINTS", args.field, "Magnitude"]
 
-    # get Block info
-    cellsize, blockdata, statsdict = meshinfo(
-        reader,
-        dim,
-        fieldunits,
-        ignored_keys,
-        basedir,
-        ureg,
-        ComputeStats=args.stats,
-        ComputeHisto=args.histos,
-        BinCount=args.bins,
-        show=args.show,
-        verbose=args.verbose,
-    )
-
-    # Plots
-    if args.plots:
-        os.makedirs(f"{basedir}/plots", exist_ok=True)
-        makeplot(args, cellsize, fieldunits, ignored_keys, basedir)
+    # outputs: job spec from --job, or generated from the flags
+    generated = jobspec.fromargs(args)
+    spec = jobspec.load(args.job) if args.job else generated
+    spec = jobspec.normalize(spec, generated["options"])
+    if not args.job:
+        jobspec.save(spec, f"{basedir}/job.json")
+    expressions.configure(spec["fields"], fieldunits, ureg)
+    renderpool.configure(args, spec["fields"], 1 if axis else args.renderjobs)
+    stages = jobspec.plan(spec)
+    jobspec.describe(stages)
 
     # When dealing with elasticity
-    suffix = ""
-    cellsize_deformed = None
-    datadict = resultinfo(cellsize, ignored_keys)
     found = False
     for field in list(reader.PointData.keys()):
         if field.endswith("displacement"):
@@ -294,46 +520,149 @@ def main():
             break
     print(f"displacement found={found} in {list(reader.PointData.keys())}", flush=True)
 
-    if found and (dim == 3 or axis):
-        # make3Dview(cellsize, blockdata, key, color, addruler=True)
-        if args.channels:
-            os.makedirs(f"{basedir}/stl", exist_ok=True)
-            print("Save stl for original geometries:", flush=True)
-            for i, block in enumerate(blockdata.keys()):
-                name = blockdata[block]["name"]
-                actual_name = name.replace("/root/", "")
-                print(f"\t{name}: actual_name={actual_name}", end="")
-                if not actual_name.endswith("Isolant") and not "Air" in actual_name:
-                    print(" saved", end="", flush=True)
-                    extractBlock1 = ExtractBlock(registrationName=name, Input=cellsize)
-                    extractBlock1.Selectors = [block]
-                    extractBlock1.UpdatePipeline()
-                    extractSurface1 = ExtractSurface(
-                        registrationName="ExtractSurface1", Input=extractBlock1
-                    )
+    def run_meshinfo(
+        blocks: bool,
+        histos: bool,
+        bins: int,
+        show: bool,
+        compact: bool,
+        byparts: bool,
+        memorylimit: float,
+    ):
+        # get Block info
+        options = {}
+        if not axis:
+            options = {"byparts": byparts, "memorylimit": memorylimit}
+        return meshinfo(
+            reader,
+            dim,
+            fieldunits,
+            ignored_keys,
+            basedir,
+            ureg,
+            ComputeStats=blocks,
+            ComputeHisto=histos,
+            BinCount=bins,
+            compact=compact,
+            show=show,
+            verbose=args.verbose,
+            **options,
+        )
+
+    def run_derive(info: tuple, compact: bool):
+        # geometry built by meshinfo, or on the whole dataset with byparts
+        # (only for plots and views), as in the render workers
+        return viewGeometry(reader, dim, axis, compact)
 
-                    print(f" file={basedir}/stl/{actual_name}.stl", flush=True)
-                    SaveData(f"{basedir}/stl/{actual_name}.stl", proxy=extractSurface1)
-                    Delete(extractBlock1)
-                    del extractBlock1
-                else:
-                    print(" ignored", flush=True)
-
-        geometry = deformed(cellsize, factor=args.deformedfactor)
-
-        # compute channel deformation
-        # use MeshLib see test-meshlib example
-        if args.channels:
-            geometryfactor1 = deformed(cellsize, factor=1)
-            print("Save stl for deformed geometries:", flush=True)
-            for i, block in enumerate(blockdata.keys()):
-                name = blockdata[block]["name"]
-                actual_name = name.replace("/root/", "")
-                print(f"\t{name}: actual_name={actual_name}", end="")
-                if not actual_name.endswith("Isolant") and not "Air" in actual_name:
-                    print(" saved", flush=True)
+    def run_pointdata(cellsize):
+        return cache.get(pointData, cellsize, ignored_keys)
+
+    def run_deformed(cellsize, factor: int):
+        if not found:
+            return None
+        return cache.get(deformed, cellsize, factor=factor)
+
+    def run_plots(pointdata, **params):
+        os.makedirs(f"{basedir}/plots", exist_ok=True)
+        plotargs = argparse.Namespace(**params)
+        makeplot(plotargs, pointdata, fieldunits, ignored_keys, basedir)
+
+    def fieldcolors(geometry, selected: list[str]) -> list[tuple]:
+        # (field, color) of the selected fields, all but ignored ones if none
+        vkeys = list(geometry.PointData.keys()) + list(geometry.CellData.keys())
+        if selected:
+            vkeys = [vkey for vkey in selected if vkey in vkeys]
+        fields = []
+        for vkey in vkeys:
+            if not selected and vkey in ignored_keys:
+                continue
+            if vkey in list(geometry.CellData.keys()):
+                color = ["CELLS", vkey]
+            if vkey in list(geometry.PointData.keys()):
+                color = ["POINTS", vkey]
+            fields.append((vkey, color))
+        return fields
+
+    def run_views(
+        geometry,
+        info: tuple,
+        factor: int,
+        field: str,
+        transparentBG: bool,
+        customRangeHisto: bool,
+        paired: bool,
+        combine: list[str],
+        **params,
+    ):
+        if geometry is None:
+            return
+        blockdata = info[1]
+        suffix = ""
+        deformedfactor = None
+        if paired:
+            # deformed views are warped from the views, when dealing with elasticity
+            deformedfactor = factor if found else None
+        elif factor is not None:
+            suffix = f"-deformed_factor{factor}"
+
+        fields = fieldcolors(geometry, [field] if field else [])
+
+        # views are grouped by slice: each slice is cut once for all fields
+        viewargs = argparse.Namespace(field=field, **params)
+        if renderpool.jobs() > 1:
+            renderpool.render(
+                viewgroups(viewargs, fields),
+                blockdata,
+                factor=factor,
+                suffix=suffix,
+                compact=spec["options"]["compact"],
+                axis=axis,
+                background=transparentBG,
+                customRangeHisto=customRangeHisto,
+                raster=params.get("raster", False),
+                deformedfactor=deformedfactor,
+                combine=combine,
+            )
+            return
+        makeviews(
+            viewargs,
+            geometry,
+            blockdata,
+            fields,
+            fieldunits,
+            basedir,
+            suffix=suffix,
+            addruler=False,
+            background=transparentBG,
+            customRangeHisto=customRangeHisto,
+            deformedfactor=deformedfactor,
+            combine=combine,
+        )
+
+    def run_stl(geometry, info: tuple, factor: int):
+        # stl for test-meshlib.py, only when dealing with elasticity
+        if geometry is None or not found or not (dim == 3 or axis):
+            return
+        blockdata = info[1]
+        suffix = ""
+        if factor is not None:
+            # compute channel deformation
+            # use MeshLib see test-meshlib example
+            suffix = "-deformed"
+
+        os.makedirs(f"{basedir}/stl", exist_ok=True)
+        geometries = "deformed" if suffix else "original"
+        print(f"Save stl for {geometries} geometries:", flush=True)
+        for i, block in enumerate(blockdata.keys()):
+            name = blockdata[block]["name"]
+            actual_name = name.replace("/root/", "")
+            print(f"\t{name}: actual_name={actual_name}", end="")
+            if not actual_name.endswith("Isolant") and not "Air" in actual_name:
+                filename = f"{basedir}/stl/{actual_name}{suffix}.stl"
+                print(f" saved file={filename}", flush=True)
+                with arena.scope("stl"):
                     extractBlock1 = ExtractBlock(
-                        registrationName=name, Input=geometryfactor1
+                        registrationName=name, Input=geometry
                     )
                     extractBlock1.Selectors = [block]
                     extractBlock1.UpdatePipeline()
@@ -341,119 +670,73 @@ def main():
                         registrationName="ExtractSurface1", Input=extractBlock1
                     )
 
-                    SaveData(
-                        f"{basedir}/stl/{actual_name}-deformed.stl",
-                        proxy=extractSurface1,
-                    )
-                    Delete(extractBlock1)
-                    del extractBlock1
-                else:
-                    print(" ignored", flush=True)
-
-        suffix = f"-deformed_factor{args.deformedfactor}"
-        cellsize_deformed = geometry
-    elif found and dim == 2 and not axis:
-        cellsize_deformed = deformed(cellsize, factor=args.deformedfactor)
-
-        suffix = f"-deformed_factor{args.deformedfactor}"
-        # cellsize = geometry
-
-    # Views
-    if args.views:
-        if not args.field:
-            for vkey in list(cellsize.PointData.keys()) + list(
-                cellsize.CellData.keys()
-            ):
-
-                if not vkey in ignored_keys:
-                    if vkey in list(cellsize.CellData.keys()):
-                        color = ["CELLS", vkey]
-                    if vkey in list(cellsize.PointData.keys()):
-                        color = ["POINTS", vkey]
-
-                    makeview(
-                        args,
-                        cellsize,
-                        blockdata,
-                        vkey,
-                        fieldunits,
-                        color,
-                        basedir,
-                        suffix="",
-                        addruler=False,
-                        background=args.transparentBG,
-                        customRangeHisto=args.customRangeHisto,
-                    )
+                    writer.saveData(filename, proxy=extractSurface1)
+            else:
+                print(" ignored", flush=True)
+
+    def run_scene(geometry, info: tuple, factor: int, field: str, triangles: int):
+        # interactive alternative to views: one small file for all fields
+        if geometry is None:
+            return
+        suffix = ""
+        if factor is not None:
+            suffix = f"-deformed_factor{factor}"
+
+        vkeys = list(geometry.PointData.keys()) + list(geometry.CellData.keys())
+        fields = [field] if field in vkeys else []
+        if not field:
+            fields = [vkey for vkey in vkeys if vkey not in ignored_keys]
+
+        os.makedirs(f"{basedir}/scene", exist_ok=True)
+        with arena.scope("scene"):
+            exportScene(
+                geometry,
+                f"{basedir}/scene/scene{suffix}.glb",
+                fields,
+                fieldunits,
+                triangles=triangles,
+                color=field or None,
+            )
+
+    def run_animation(
+        geometry,
+        info: tuple,
+        fields: list[str],
+        fps: int,
+        format: str,
+        transparentBG: bool,
+        **params,
+    ):
+        # the geometry of views is cut once: the mesh must not change over time
+        if args.file.endswith(".case") and "*" in readcase(args.file)["geometry"]:
+            raise RuntimeError(f"{args.file}: animations require a static mesh")
+        blockdata = info[1]
+        makeanimations(
+            argparse.Namespace(**params),
+            geometry,
+            blockdata,
+            fieldcolors(geometry, fields),
+            fieldunits,
+            basedir,
+            fps=fps,
+            format=format,
+            background=transparentBG,
+        )
 
-            if found:
-                for vkey in list(cellsize_deformed.PointData.keys()) + list(
-                    cellsize_deformed.CellData.keys()
-                ):
-
-                    if not vkey in ignored_keys:
-                        if vkey in list(cellsize_deformed.CellData.keys()):
-                            color = ["CELLS", vkey]
-                        if vkey in list(cellsize_deformed.PointData.keys()):
-                            color = ["POINTS", vkey]
-
-                        makeview(
-                            args,
-                            cellsize_deformed,
-                            blockdata,
-                            vkey,
-                            fieldunits,
-                            color,
-                            basedir,
-                            suffix=suffix,
-                            addruler=False,
-                            background=args.transparentBG,
-                            customRangeHisto=args.customRangeHisto,
-                        )
-
-        else:
-            if args.field in list(cellsize.PointData.keys()) + list(
-                cellsize.CellData.keys()
-            ):
-                if args.field in list(cellsize.CellData.keys()):
-                    color = ["CELLS", args.field]
-                if args.field in list(cellsize.PointData.keys()):
-                    color = ["POINTS", args.field]
-                makeview(
-                    args,
-                    cellsize,
-                    blockdata,
-                    args.field,
-                    fieldunits,
-                    color,
-                    basedir,
-                    suffix="",
-                    addruler=False,
-                    background=args.transparentBG,
-                    customRangeHisto=args.customRangeHisto,
-                )
-
-            if found and (
-                args.field
-                in list(cellsize_deformed.PointData.keys())
-                + list(cellsize_deformed.CellData.keys())
-            ):
-                if args.field in list(cellsize_deformed.CellData.keys()):
-                    color = ["CELLS", args.field]
-                if args.field in list(cellsize_deformed.PointData.keys()):
-                    color = ["POINTS", args.field]
-                makeview(
-                    args,
-                    cellsize_deformed,
-                    blockdata,
-                    args.field,
-                    fieldunits,
-                    color,
-                    basedir,
-                    suffix=suffix,
-                    addruler=False,
-                    background=args.transparentBG,
-                    customRangeHisto=args.customRangeHisto,
-                )
+    jobspec.run(
+        stages,
+        {
+            "meshinfo": run_meshinfo,
+            "derive": run_derive,
+            "pointdata": run_pointdata,
+            "deformed": run_deformed,
+            "plots": run_plots,
+            "views": run_views,
+            "stl": run_stl,
+            "scene": run_scene,
+            "animation": run_animation,
+        },
+    )
 
     # for magnetfield:
     #   - view contour for magnetic potential (see pv-contours.py)
@@ -0,0 +1,85 @@
+import numpy as np
+
+# combined views of paired undeformed and deformed views (see display3D.renderGroup)
+#   sidebyside: undeformed view on the left, deformed view on the right,
+#       composed from the saved images (see save)
+#   overlay: edges of the undeformed geometry over the deformed view, rendered
+#       in the render view of the pair (see display3D.saveOverlay)
+_combined = ["sidebyside", "overlay"]
+
+
+def modes(combine: list[str]) -> list[str]:
+    """check combined view modes
+
+    Args:
+        combine (list[str]): modes of combined views
+
+    Returns:
+        list[str]: modes
+    """
+
+    unknown = set(combine or []) - set(_combined)
+    if unknown:
+        raise RuntimeError(
+            f"combine: unsupported views {sorted(unknown)} (use {_combined})"
+        )
+    return list(combine or [])
+
+
+def rgba(image):
+    """returns an image as float rgba in [0, 1]
+
+    Args:
+        image: (h, w), (h, w, 3) or (h, w, 4) image, uint8 or float in [0, 1]
+
+    Returns:
+        np.ndarray: (h, w, 4) image
+    """
+
+    image = np.asarray(image)
+    if image.dtype == np.uint8:
+        image = image / 255.0
+    image = image.astype(np.float64)
+    if image.ndim == 2:
+        image = np.repeat(image[..., None], 3, axis=2)
+    if image.shape[2] == 3:
+        image = np.concatenate([image, np.ones(image.shape[:2] + (1,))], axis=2)
+    return image
+
+
+def sidebyside(left, right):
+    """returns two images next to each other, top aligned
+
+    the shorter image is padded with transparent pixels
+
+    Args:
+        left: left image (see rgba)
+        right: right image (see rgba)
+
+    Returns:
+        np.ndarray: (max height, left width + right width, 4) image
+    """
+
+    (left, right) = (rgba(left), rgba(right))
+    height = max(left.shape[0], right.shape[0])
+    image = np.zeros((height, left.shape[1] + right.shape[1], 4))
+    image[: left.shape[0], : left.shape[1]] = left
+    image[: right.shape[0], left.shape[1] :] = right
+    return image
+
+
+def save(left: str, right: str, filename: str):
+    """save two png images side by side
+
+    run by the writer after the images are written (see writer.submit)
+
+    Args:
+        left (str): left png file name
+        right (str): right png file name
+        filename (str): png file name
+    """
+
+    import matplotlib.image
+
+    image = sidebyside(matplotlib.image.imread(left), matplotlib.image.imread(right))
+    matplotlib.image.imsave(filename, np.clip(image, 0.0, 1.0))
@@ -1,10 +1,9 @@
-import argparse, argcomplete
+# pandas, matplotlib and PIL are imported when needed
+# to keep options parsing and completion fast
+import argparse
 import os
 import sys
 import json
-import pandas as pd
-import matplotlib.pyplot as plt
-from PIL import Image
 
 import warnings
 
@@ -58,7 +57,7 @@ def options(description: str, epilog: str):
     return parser
 
 
-def key_dataframe(dirs: list[str]) -> pd.DataFrame:
+def key_dataframe(dirs: list[str]) -> "pd.DataFrame":
     """create a DataFrame, containing the key names corresponding to physical measures.
     Only takes the measures in common in all the directories.
 
@@ -68,6 +67,8 @@ def key_dataframe(dirs: list[str]) -> pd.DataFrame:
     Returns:
         pd.DataFrame: translator measures<->key names
     """
+    import pandas as pd
+
     with open(f"{dirs[0]}/FieldType.json", "r") as jsonfile:
         data1 = json.load(jsonfile)
     with open(f"{dirs[1]}/FieldType.json", "r") as jsonfile:
@@ -217,6 +218,8 @@ def merge_images(files: list[str], savefile: str):
         files (list[str]): list of images names
         savefile (str): name of the comparison result image
     """
+    from PIL import Image
+
     images = [Image.open(x) for x in files]
     widths, heights = zip(*(i.size for i in images))
 
@@ -234,9 +237,15 @@ def merge_images(files: list[str], savefile: str):
 
 
 def main():
+    import argcomplete
+
     parser = options("", "")
     argcomplete.autocomplete(parser)
     args = parser.parse_args()
+
+    import pandas as pd
+    import matplotlib.pyplot as plt
+
     color_cycler = [
         "#E69F00",
         "#56B4E9",
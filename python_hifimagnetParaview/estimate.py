@@ -0,0 +1,511 @@
+import os
+import re
+import glob
+import json
+import struct
+
+# dry run: planned work and cost of a run, from the Ensight case header and
+# the geometry sizes only (no paraview)
+#
+# default costs per unit, calibrated on cfpdes 3D exports (see calibrate)
+#   load: s per million cells read
+#   derive: s per million values of derived fields
+#   stats: s per block and field, plus s per million values
+#   histo: s per block and field, plus s per million values
+#   view: s per view, plus s per million cells rendered
+#   plot: s per plot line
+_costs = {
+    "load": 2.0,
+    "derive": 0.5,
+    "stats": 0.05,
+    "stats_values": 0.2,
+    "histo": 0.08,
+    "histo_values": 0.3,
+    "view": 1.5,
+    "view_cells": 1.0,
+    "plot": 0.5,
+}
+
+# profiled stages (see profiling) measuring each cost
+_stages = {
+    "load": "load",
+    "derive": "derive",
+    "stats": "stats.key",
+    "histo": "getresultHisto",
+    "view": "render",
+    "plot": "makeplot",
+}
+
+# number of nodes of Ensight elements (nsided and nfaced are variable)
+_elements = {
+    "point": 1,
+    "bar2": 2,
+    "bar3": 3,
+    "tria3": 3,
+    "tria6": 6,
+    "quad4": 4,
+    "quad8": 8,
+    "tetra4": 4,
+    "tetra10": 10,
+    "pyramid5": 5,
+    "pyramid13": 13,
+    "penta6": 6,
+    "penta15": 15,
+    "hexa8": 8,
+    "hexa20": 20,
+    "nsided": None,
+    "nfaced": None,
+}
+
+# derived fields per variable type (see meshinfo.derive)
+#   vector: norm and 2 cylindrical components, tensor: 3 principal values,
+#   VonMises, Tresca and 3 cylindrical components
+_derived = {"scalar": 0, "vector": 3, "tensor": 8}
+
+
+def readcase(filename: str) -> dict:
+    """read the sections of an Ensight Gold case file
+
+    Args:
+        filename (str): case file name (ex. Export.case)
+
+    Returns:
+        dict: {geometry, variables: [{name, type, association, file}], timesteps}
+    """
+
+    case = {"geometry": None, "variables": [], "timesteps": 1}
+    section = None
+    with open(filename, "r") as f:
+        for line in f:
+            line = line.split("#")[0].strip()
+            if not line:
+                continue
+            if line.isupper() and ":" not in line:
+                section = line
+                continue
+
+            (key, _, value) = line.partition(":")
+            words = value.split()
+            if section == "GEOMETRY" and key.strip() == "model":
+                # [ts] [fs] filename
+                case["geometry"] = words[-1]
+            elif section == "VARIABLE":
+                # type per node|element: [ts] [fs] name filename
+                match = re.match(r"(.+) per (node|element)", key.strip())
+                if match is None or len(words) < 2:
+                    continue
+                vtype = match.group(1).replace("complex ", "").split()[0]
+                case["variables"].append(
+                    {
+                        "name": words[-2],
+                        "type": vtype,
+                        "association": "PointData"
+                        if match.group(2) == "node"
+                        else "CellData",
+                        "file": words[-1],
+                    }
+                )
+            elif section == "TIME" and key.strip() == "number of steps":
+                case["timesteps"] = int(words[0])
+
+    if case["geometry"] is None:
+        raise RuntimeError(f"{filename}: no geometry in case file")
+    return case
+
+
+def _geometryfile(filename: str, geometry: str) -> str:
+    """returns the geometry file of the first timestep (wildcards are replaced)"""
+
+    path = os.path.join(os.path.dirname(filename), geometry)
+    if "*" not in path:
+        return path
+    pattern = re.sub(r"\*+", lambda match: "[0-9]" * len(match.group()), path)
+    files = sorted(glob.glob(pattern))
+    if not files:
+        raise RuntimeError(f"{filename}: no geometry file {geometry}")
+    return files[0]
+
+
+class _Binary:
+    """sequential reader of Ensight C Binary records"""
+
+    def __init__(self, f):
+        self.f = f
+        self.endian = "<"
+
+    def string(self) -> str:
+        data = self.f.read(80)
+        if len(data) < 80:
+            return ""
+        return data.decode("ascii", errors="replace").strip("\x00 ").strip()
+
+    def int(self) -> int:
+        return struct.unpack(f"{self.endian}i", self.f.read(4))[0]
+
+    def ints(self, count: int) -> list[int]:
+        return list(struct.unpack(f"{self.endian}{count}i", self.f.read(4 * count)))
+
+    def skip(self, count: int):
+        self.f.seek(4 * count, os.SEEK_CUR)
+
+
+def _readbinary(f, parts: list[dict]):
+    """read part sizes of a C Binary geometry, data arrays are skipped"""
+
+    reader = _Binary(f)
+    reader.string()  # C Binary
+    reader.string()
+    reader.string()
+    nodeids = reader.string().split()[-1] in ["given", "ignore"]
+    elementids = reader.string().split()[-1] in ["given", "ignore"]
+
+    word = reader.string()
+    if word.startswith("extents"):
+        reader.skip(6)
+        word = reader.string()
+
+    part = None
+    while word:
+        if word.startswith("part"):
+            number = f.read(4)
+            # part numbers are small: detect big endian files on the first part
+            if not parts and struct.unpack("<i", number)[0] > 1 << 24:
+                reader.endian = ">"
+            part = {
+                "part": struct.unpack(f"{reader.endian}i", number)[0],
+                "name": reader.string(),
+                "nodes": 0,
+                "cells": 0,
+            }
+            parts.append(part)
+        elif word.startswith("coordinates"):
+            part["nodes"] = reader.int()
+            reader.skip(part["nodes"] * (4 if nodeids else 3))
+        elif word.startswith("block"):
+            raise RuntimeError("structured Ensight parts are not supported")
+        else:
+            etype = word.split()[0].removeprefix("g_")
+            if etype not in _elements:
+                raise RuntimeError(f"unknown Ensight element type {word}")
+            count = reader.int()
+            part["cells"] += count
+            if elementids:
+                reader.skip(count)
+            if etype == "nsided":
+                reader.skip(sum(reader.ints(count)))
+            elif etype == "nfaced":
+                faces = sum(reader.ints(count))
+                reader.skip(sum(reader.ints(faces)))
+            else:
+                reader.skip(count * _elements[etype])
+        word = reader.string()
+
+
+def _readascii(f, parts: list[dict]):
+    """read part sizes of an ascii geometry, data lines are skipped"""
+
+    lines = (line.strip() for line in f)
+    next(lines)
+    next(lines)
+    nodeids = next(lines).split()[-1] in ["given", "ignore"]
+    elementids = next(lines).split()[-1] in ["given", "ignore"]
+
+    def skip(count: int):
+        for _ in range(count):
+            next(lines)
+
+    part = None
+    for word in lines:
+        if not word:
+            continue
+        if word.startswith("extents"):
+            skip(3)
+        elif word.startswith("part"):
+            number = int(next(lines))
+            part = {"part": number, "name": next(lines), "nodes": 0, "cells": 0}
+            parts.append(part)
+        elif word.startswith("coordinates"):
+            part["nodes"] = int(next(lines))
+            skip(part["nodes"] * (4 if nodeids else 3))
+        elif word.startswith("block"):
+            raise RuntimeError("structured Ensight parts are not supported")
+        else:
+            etype = word.split()[0].removeprefix("g_")
+            if etype not in _elements:
+                raise RuntimeError(f"unknown Ensight element type {word}")
+            count = int(next(lines))
+            part["cells"] += count
+            if elementids:
+                skip(count)
+            if etype == "nsided":
+                skip(2 * count)
+            elif etype == "nfaced":
+                faces = sum(int(next(lines)) for _ in range(count))
+                skip(2 * faces)
+            else:
+                skip(count)
+
+
+def readgeometry(filename: str) -> list[dict]:
+    """read the parts of an Ensight Gold geometry (C Binary or ascii)
+
+    Args:
+        filename (str): geometry file name
+
+    Returns:
+        list[dict]: parts {part, name, nodes, cells}
+    """
+
+    parts = []
+    with open(filename, "rb") as f:
+        binary = f.read(80).lower().startswith(b"c binary")
+    if binary:
+        with open(filename, "rb") as f:
+            _readbinary(f, parts)
+    else:
+        with open(filename, "r") as f:
+            _readascii(f, parts)
+    return parts
+
+
+def available() -> float:
+    """returns the available memory in MB (None where /proc is not available)"""
+
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def workload(case: dict, parts: list[dict], args) -> dict:
+    """count the work planned by the options
+
+    Args:
+        case (dict): case file sections (see readcase)
+        parts (list[dict]): geometry parts (see readgeometry)
+        args: parsed command line options
+
+    Returns:
+        dict: work units
+    """
+
+    nodes = sum(part["nodes"] for part in parts)
+    cells = sum(part["cells"] for part in parts)
+    fields = 0
+    values = 0
+    components = {"scalar": 1, "vector": 3, "tensor": 9}
+    for variable in case["variables"]:
+        vtype = variable["type"] if variable["type"] in _derived else "scalar"
+        count = 1 + _derived[vtype]
+        fields += count
+        size = nodes if variable["association"] == "PointData" else cells
+        values += size * (components[vtype] + _derived[vtype])
+
+    r = getattr(args, "r", None) or []
+    z = getattr(args, "z", None) or []
+    theta = getattr(args, "theta", None) or []
+    displacement = any(
+        variable["name"].endswith("displacement") for variable in case["variables"]
+    )
+
+    views = 0
+    if args.views:
+        views = fields * (1 + len(z) + (7 if theta else 0))
+        if displacement:
+            views *= 2
+
+    lines = 0
+    if args.plots:
+        lines = len(r) * len(z)
+        if len(z) == 2:
+            lines += len(theta) * len(r)
+        if len(r) == 2:
+            lines += len(theta) * len(z)
+        lines *= fields
+
+    return {
+        "blocks": len(parts),
+        "nodes": nodes,
+        "cells": cells,
+        "variables": len(case["variables"]),
+        "fields": fields,
+        "values": values,
+        "stats": len(parts) * fields if args.stats else 0,
+        "histos": len(parts) * fields if args.histos else 0,
+        "views": views,
+        "lines": lines,
+        "timesteps": case["timesteps"],
+    }
+
+
+def estimate(work: dict, costs: dict = None) -> dict:
+    """estimate time and memory of the planned work
+
+    memory is the resident paraview data: geometry, exported fields and derived
+    fields (float32 values, 8 nodes per cell on average for connectivity)
+
+    Args:
+        work (dict): work units (see workload)
+        costs (dict, optional): costs per unit (see calibrate). Defaults to _costs.
+
+    Returns:
+        dict: {time: s per stage, total, memory: MB, block memory: MB}
+    """
+
+    costs = {**_costs, **(costs or {})}
+    mcells = work["cells"] / 1.0e6
+    mvalues = work["values"] / 1.0e6
+    time = {
+        "load": costs["load"] * mcells,
+        "derive": costs["derive"] * mvalues,
+        "stats": costs["stats"] * work["stats"],
+        "histo": costs["histo"] * work["histos"],
+        "view": work["views"] * (costs["view"] + costs["view_cells"] * mcells),
+        "plot": costs["plot"] * work["lines"],
+    }
+    if work["stats"]:
+        time["stats"] += costs["stats_values"] * mvalues
+    if work["histos"]:
+        time["histo"] += costs["histo_values"] * mvalues
+
+    geometry = work["nodes"] * 3 * 4 + work["cells"] * (8 * 8 + 8)
+    memory = (geometry + work["values"] * 4) / 1024**2
+    return {
+        "time": time,
+        "total": sum(time.values()),
+        "memory": memory,
+        "block_memory": memory / max(work["blocks"], 1),
+    }
+
+
+def recommend(work: dict, cost: dict, memory: float = None) -> dict:
+    """recommend memory mode, memory limit, chunk size and number of jobs
+
+    Args:
+        work (dict): work units (see workload)
+        cost (dict): estimated cost (see estimate)
+        memory (float, optional): available memory in MB. Defaults to None.
+
+    Returns:
+        dict: recommended options
+    """
+
+    advice = {
+        "byparts": False,
+        "compact": False,
+        "memorylimit": None,
+        "chunk": 65536,
+        "jobs": 1,
+    }
+    # derived fields are about 4 times the raw data (see meshinfo.partBatches)
+    peak = 4 * cost["memory"]
+    if memory is not None:
+        if peak > 0.5 * memory:
+            advice["compact"] = True
+            peak = 0.75 * peak
+        if peak > 0.5 * memory:
+            advice["byparts"] = True
+            advice["memorylimit"] = round(0.5 * memory)
+            peak = min(peak, max(advice["memorylimit"], 4 * cost["block_memory"]))
+        advice["jobs"] = max(1, min(os.cpu_count() or 1, int(memory // max(peak, 1))))
+
+    # expression kernels: chunks of about 8 MB of float64 values per field
+    chunk = 1024**2 / max(work["fields"], 1)
+    advice["chunk"] = int(min(65536, max(1024, chunk)))
+    return advice
+
+
+def calibrate(work: dict, profile: str) -> dict:
+    """per unit costs measured by a profiled run (see profiling.report)
+
+    the profiled run must have the same options as work, the measured costs
+    include the costs per value (eg. stats_values is 0)
+
+    Args:
+        work (dict): work units of the profiled run (see workload)
+        profile (str): json report of the profiled run
+
+    Returns:
+        dict: calibrated costs
+    """
+
+    with open(profile, "r") as f:
+        records = json.load(f)["stages"]
+    wall = {}
+    for record in records:
+        wall[record["name"]] = wall.get(record["name"], 0) + record["wall"]
+
+    mcells = max(work["cells"] / 1.0e6, 1.0e-6)
+    mvalues = max(work["values"] / 1.0e6, 1.0e-6)
+    units = {
+        "load": mcells,
+        "derive": mvalues,
+        "stats": work["stats"],
+        "histo": work["histos"],
+        "view": work["views"],
+        "plot": work["lines"],
+    }
+    costs = {}
+    for key, stage in _stages.items():
+        if wall.get(stage) and units[key]:
+            costs[key] = wall[stage] / units[key]
+            for extra in [f"{key}_values", f"{key}_cells"]:
+                if extra in _costs:
+                    costs[extra] = 0
+    return costs
+
+
+def dryrun(args, basedir: str) -> dict:
+    """report the planned work of a run, its estimated cost and recommended options
+
+    Args:
+        args: parsed command line options (args.dryrun: profile report to calibrate)
+        basedir (str): result directory
+
+    Returns:
+        dict: dry run report, also saved in basedir/dryrun.json
+    """
+
+    case = readcase(args.file)
+    parts = readgeometry(_geometryfile(args.file, case["geometry"]))
+    work = workload(case, parts, args)
+    costs = None
+    if isinstance(args.dryrun, str):
+        costs = calibrate(work, args.dryrun)
+        print(f"dryrun: costs calibrated from {args.dryrun}: {costs}", flush=True)
+    cost = estimate(work, costs)
+    advice = recommend(work, cost, available())
+
+    print(
+        f"dryrun: {work['blocks']} blocks, {work['nodes']} nodes, {work['cells']} cells, "
+        f"{work['variables']} variables ({work['fields']} fields with derived ones), "
+        f"{work['timesteps']} timesteps",
+        flush=True,
+    )
+    for part in parts:
+        print(
+            f"\tpart {part['part']}: {part['name']}, nodes={part['nodes']}, cells={part['cells']}",
+            flush=True,
+        )
+    print(
+        f"dryrun: planned {work['stats']} block stats, {work['histos']} block histograms, "
+        f"{work['views']} views, {work['lines']} plot lines",
+        flush=True,
+    )
+    for stage, seconds in cost["time"].items():
+        if seconds:
+            print(f"\t{stage}: {seconds:.1f} s", flush=True)
+    print(
+        f"dryrun: estimated {cost['total']:.0f} s, paraview data {cost['memory']:.0f} MB",
+        flush=True,
+    )
+    print(f"dryrun: recommended {advice}", flush=True)
+
+    report = {"work": work, "parts": parts, "cost": cost, "recommended": advice}
+    with open(f"{basedir}/dryrun.json", "w") as f:
+        json.dump(report, f, indent=4)
+    return report
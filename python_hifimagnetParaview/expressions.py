@@ -0,0 +1,416 @@
+import ast
+
+# derived fields declared by users (job spec "fields" or fieldunits "Expr")
+#   P = J·E or {"name": "T_C", "expr": "T - 273.15", "units": "degC"}
+#
+# declarations are parsed once, sorted by dependencies and compiled into a
+# single kernel evaluated chunk by chunk on numpy arrays (see
+# method.createExpressionFields)
+#   program: compiled declarations (see build), None if no field is declared
+_expressions = {
+    "program": None,
+}
+
+# functions available in expressions: number of arguments
+_functions = {
+    "sqrt": 1,
+    "abs": 1,
+    "exp": 1,
+    "log": 1,
+    "log10": 1,
+    "sin": 1,
+    "cos": 1,
+    "tan": 1,
+    "arctan2": 2,
+    "minimum": 2,
+    "maximum": 2,
+    "norm": 1,
+    "dot": 2,
+}
+
+# coordinates of points (or cell centers for CellData), as in Calculator
+_coords = ["coordsX", "coordsY", "coordsZ"]
+
+_operators = {
+    ast.Add: "+",
+    ast.Sub: "-",
+    ast.Mult: "*",
+    ast.Div: "/",
+    ast.Pow: "**",
+}
+
+
+def _fieldname(node) -> str:
+    """returns the field name of a Name or of a dotted name (eg. heat.temperature)"""
+
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return f"{_fieldname(node.value)}.{node.attr}"
+    raise RuntimeError(f"expression: unsupported field name {ast.dump(node)}")
+
+
+def _check(node, expr: str) -> set:
+    """check the syntax of an expression tree
+
+    Returns:
+        set: names of the fields used
+    """
+
+    match node:
+        case ast.Expression():
+            return _check(node.body, expr)
+        case ast.Constant() if isinstance(node.value, (int, float)):
+            return set()
+        case ast.Name() | ast.Attribute():
+            return {_fieldname(node)}
+        case ast.BinOp() if type(node.op) in _operators or isinstance(
+            node.op, ast.MatMult
+        ):
+            return _check(node.left, expr) | _check(node.right, expr)
+        case ast.UnaryOp() if isinstance(node.op, (ast.USub, ast.UAdd)):
+            return _check(node.operand, expr)
+        case ast.Subscript() if isinstance(node.slice, ast.Constant) and isinstance(
+            node.slice.value, int
+        ):
+            return _check(node.value, expr)
+        case ast.Call() if (
+            isinstance(node.func, ast.Name)
+            and node.func.id in _functions
+            and not node.keywords
+        ):
+            if len(node.args) != _functions[node.func.id]:
+                raise RuntimeError(
+                    f"expression {expr}: {node.func.id} expects {_functions[node.func.id]} arguments"
+                )
+            names = set()
+            for arg in node.args:
+                names |= _check(arg, expr)
+            return names
+        case _:
+            raise RuntimeError(
+                f"expression {expr}: unsupported syntax {ast.unparse(node)}"
+            )
+
+
+def parse(declaration: str | dict) -> dict:
+    """parse a derived field declaration
+
+    "name = expr" or {"name": ..., "expr": ..., "units": ...}
+    '·' is the dot product of vectors, '^' the power
+    units (optional) are a unit string or a pair [SI, display] of unit strings,
+    by default units are inferred from the units of the fields used
+
+    Args:
+        declaration (str | dict): derived field declaration
+
+    Returns:
+        dict: {name, expr, units, tree, inputs}
+    """
+
+    if isinstance(declaration, str):
+        (name, sep, expr) = declaration.partition("=")
+        if not sep:
+            raise RuntimeError(f"expression {declaration}: expected 'name = expr'")
+        declaration = {"name": name.strip(), "expr": expr.strip()}
+
+    unknown = set(declaration) - {"name", "expr", "units"}
+    if unknown:
+        raise RuntimeError(f"expression: unknown keys {sorted(unknown)}")
+    name = declaration.get("name", "")
+    if not name.isidentifier():
+        raise RuntimeError(f"expression: invalid field name {name!r}")
+
+    expr = declaration.get("expr", "")
+    try:
+        tree = ast.parse(expr.replace("·", "@").replace("^", "**"), mode="eval")
+    except SyntaxError as e:
+        raise RuntimeError(f"expression {name} = {expr}: {e.msg}")
+
+    return {
+        "name": name,
+        "expr": expr,
+        "units": declaration.get("units"),
+        "tree": tree,
+        "inputs": sorted(_check(tree, expr)),
+    }
+
+
+def _order(fields: list[dict]) -> list[dict]:
+    """sort declarations so that fields are declared before their use"""
+
+    declared = {field["name"]: field for field in fields}
+    if len(declared) != len(fields):
+        raise RuntimeError("expression: fields declared twice")
+
+    ordered = []
+    state = {}
+
+    def visit(name: str, path: list[str]):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise RuntimeError(f"expression: circular definition {path + [name]}")
+        state[name] = "visiting"
+        for dep in declared[name]["inputs"]:
+            if dep in declared:
+                visit(dep, path + [name])
+        state[name] = "done"
+        ordered.append(declared[name])
+
+    for field in fields:
+        visit(field["name"], [])
+    return ordered
+
+
+def _emit(node, names: dict) -> str:
+    """python source of an expression tree, fields renamed by names"""
+
+    match node:
+        case ast.Expression():
+            return _emit(node.body, names)
+        case ast.Constant():
+            return repr(node.value)
+        case ast.Name() | ast.Attribute():
+            return names[_fieldname(node)]
+        case ast.BinOp() if isinstance(node.op, ast.MatMult):
+            return f"dot({_emit(node.left, names)}, {_emit(node.right, names)})"
+        case ast.BinOp():
+            (left, right) = (_emit(node.left, names), _emit(node.right, names))
+            return f"({left} {_operators[type(node.op)]} {right})"
+        case ast.UnaryOp():
+            sign = "-" if isinstance(node.op, ast.USub) else "+"
+            return f"({sign}{_emit(node.operand, names)})"
+        case ast.Subscript():
+            return f"{_emit(node.value, names)}[..., {node.slice.value}]"
+        case ast.Call():
+            args = ", ".join(_emit(arg, names) for arg in node.args)
+            return f"{node.func.id}({args})"
+
+
+def build(declarations: list) -> dict:
+    """parse declarations and compile them into a single kernel
+
+    the kernel takes the input arrays (chunks) and returns the derived fields:
+        def kernel(v0, v1, ...):
+            o0 = ...
+            o1 = ... o0 ...
+            return (o0, o1)
+
+    Args:
+        declarations (list): derived field declarations (see parse)
+
+    Returns:
+        dict: {fields, outputs, inputs, source}
+    """
+
+    fields = _order([parse(declaration) for declaration in declarations])
+    outputs = [field["name"] for field in fields]
+    inputs = sorted(
+        {name for field in fields for name in field["inputs"]} - set(outputs)
+    )
+
+    names = {name: f"v{i}" for i, name in enumerate(inputs)}
+    names.update({name: f"o{i}" for i, name in enumerate(outputs)})
+    lines = [f"def kernel({', '.join(names[name] for name in inputs)}):"]
+    for field in fields:
+        lines.append(f"    {names[field['name']]} = {_emit(field['tree'], names)}")
+    lines.append(f"    return ({''.join(names[name] + ', ' for name in outputs)})")
+
+    return {
+        "fields": fields,
+        "outputs": outputs,
+        "inputs": inputs,
+        "source": "\n".join(lines) + "\n",
+    }
+
+
+def kernel(program: dict, namespace: dict):
+    """returns the kernel function of a program
+
+    Args:
+        program (dict): compiled declarations (see build)
+        namespace (dict): implementation of the functions (eg. numpy)
+    """
+
+    scope = dict(namespace)
+    exec(program["source"], scope)
+    return scope["kernel"]
+
+
+def _temperature(unit) -> bool:
+    """returns True if unit is a temperature"""
+
+    return unit.dimensionality == {"[temperature]": 1}
+
+
+def _offset(unit) -> bool:
+    """returns True if unit is a temperature with an offset origin (eg. degC)"""
+
+    return _temperature(unit) and str(unit) not in ["kelvin", "degree_Rankine"]
+
+
+def _unit(node, units: dict, expr: str):
+    """infer the unit of an expression tree, None for dimensionless"""
+
+    match node:
+        case ast.Expression():
+            return _unit(node.body, units, expr)
+        case ast.Constant():
+            return None
+        case ast.Name() | ast.Attribute():
+            return units[_fieldname(node)]
+        case ast.BinOp() if isinstance(node.op, (ast.Add, ast.Sub)):
+            left = _unit(node.left, units, expr)
+            right = _unit(node.right, units, expr)
+            if left is None or right is None:
+                unit = right if left is None else left
+                if unit is not None and _temperature(unit):
+                    # T - 273.15 changes the origin of the temperature scale:
+                    # the inferred unit (K or degC) would apply the offset twice
+                    raise RuntimeError(
+                        f"expression {expr}: cannot add a number to {unit:~P}, declare units"
+                    )
+                return unit
+            if left.dimensionality != right.dimensionality:
+                raise RuntimeError(
+                    f"expression {expr}: cannot add {left:~P} and {right:~P}"
+                )
+            if _offset(left) or _offset(right):
+                # a difference of degC is an interval, not a degC temperature
+                raise RuntimeError(
+                    f"expression {expr}: cannot add {left:~P} and {right:~P}, declare units"
+                )
+            return left
+        case ast.BinOp() if isinstance(node.op, (ast.Mult, ast.MatMult, ast.Div)):
+            left = _unit(node.left, units, expr)
+            right = _unit(node.right, units, expr)
+            if right is None:
+                return left
+            if isinstance(node.op, ast.Div):
+                right = right**-1
+            return right if left is None else left * right
+        case ast.BinOp():
+            left = _unit(node.left, units, expr)
+            if left is not None and not isinstance(node.right, ast.Constant):
+                raise RuntimeError(f"expression {expr}: exponent must be a number")
+            return None if left is None else left**node.right.value
+        case ast.UnaryOp():
+            return _unit(node.operand, units, expr)
+        case ast.Subscript():
+            return _unit(node.value, units, expr)
+        case ast.Call():
+            args = [_unit(arg, units, expr) for arg in node.args]
+            match node.func.id:
+                case "sqrt":
+                    return None if args[0] is None else args[0] ** 0.5
+                case "dot":
+                    return _unit(
+                        ast.BinOp(node.args[0], ast.Mult(), node.args[1]), units, expr
+                    )
+                case "abs" | "norm" | "minimum" | "maximum":
+                    return next((arg for arg in args if arg is not None), None)
+                case _:
+                    return None
+
+
+def register(fieldunits: dict, program: dict, ureg) -> dict:
+    """add the derived fields to fieldunits
+
+    Units are the declared units or are inferred from the units of the fields
+    used, both for SI and display units. Fields used are looked up by their
+    field name (eg. temperature for heat.temperature). Blocks excluded for any
+    field used are excluded.
+
+    Args:
+        fieldunits (dict): dict of field units
+        program (dict): compiled declarations (see build)
+        ureg: pint unit registry
+
+    Returns:
+        dict: updated fieldunits
+    """
+
+    from .method import keyinfo
+
+    for field in program["fields"]:
+        name = field["name"]
+        if field["units"] is not None:
+            units = field["units"]
+            if isinstance(units, str):
+                units = [units, units]
+            Units = [ureg.Unit(unit) for unit in units]
+        elif "Units" in fieldunits.get(name, {}):
+            # declared in fieldunits with its units
+            Units = fieldunits[name]["Units"]
+        else:
+            Units = []
+            for i in range(2):
+                known = {}
+                for key in field["inputs"]:
+                    fieldname = keyinfo(key)[2]
+                    if key in _coords:
+                        known[key] = fieldunits["coord"]["Units"][i]
+                    elif fieldname in fieldunits:
+                        known[key] = fieldunits[fieldname]["Units"][i]
+                    else:
+                        raise RuntimeError(
+                            f"expression {name}: no units for {key}, declare units"
+                        )
+                unit = _unit(field["tree"], known, field["expr"])
+                Units.append(ureg.dimensionless if unit is None else unit)
+
+        Exclude = set()
+        for key in field["inputs"]:
+            Exclude |= set(fieldunits.get(keyinfo(key)[2], {}).get("Exclude", []))
+        fieldunits[name] = {
+            "Symbol": name,
+            "Units": Units,
+            "Exclude": sorted(Exclude),
+            "Expr": field["expr"],
+        }
+        print(f"expression: {name} = {field['expr']} [{Units[1]:~P}]", flush=True)
+    return fieldunits
+
+
+def declarations(fieldunits: dict) -> list[dict]:
+    """returns the derived fields declared in fieldunits (entries with an Expr)"""
+
+    return [
+        {"name": name, "expr": values["Expr"]}
+        for name, values in fieldunits.items()
+        if "Expr" in values
+    ]
+
+
+def configure(fields: list, fieldunits: dict, ureg) -> dict:
+    """compile the derived fields of the job spec and of fieldunits
+
+    the program is applied by derive (see configured)
+
+    Args:
+        fields (list): derived field declarations from the job spec
+        fieldunits (dict): dict of field units, updated with the derived fields
+        ureg: pint unit registry
+
+    Returns:
+        dict: program, None if no field is declared
+    """
+
+    names = {parse(field)["name"] for field in fields}
+    declared = list(fields) + [
+        declaration
+        for declaration in declarations(fieldunits)
+        if declaration["name"] not in names
+    ]
+    _expressions["program"] = None
+    if declared:
+        _expressions["program"] = build(declared)
+        register(fieldunits, _expressions["program"], ureg)
+    return _expressions["program"]
+
+
+def configured() -> dict:
+    """returns the configured program, None if no field is declared"""
+
+    return _expressions["program"]
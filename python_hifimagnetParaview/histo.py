@@ -6,17 +6,17 @@ import matplotlib.pyplot as plt
 from tabulate import tabulate
 
 from paraview.simple import (
-    CellSize,
     Histogram,
-    PointDatatoCellData,
-    Delete,
     CreateWriter,
 )
 
-from .method import convert_data, keyinfo
+from . import profiling, arena
+from .method import convert_data, keyinfo, createAnalysisCore, createNodalMeasure
+from .writer import toCSV, saveFigure
 
 
 # plot with matplotlib
+@profiling.profiled("matplotlib")
 def plotHisto(
     file: str,
     name: str,
@@ -49,6 +49,8 @@ def plotHisto(
 
     ax = plt.gca()
     csv = pd.read_csv(file)
+    # PointData histograms sum the lumped nodal measure
+    csv.rename(columns={f"Nodal{grandeur}_total": f"{grandeur}_total"}, inplace=True)
 
     csv = csv[["bin_extents", f"{grandeur}_total"]]
     keys = csv.columns.values.tolist()
@@ -101,8 +103,10 @@ def plotHisto(
         plt.show()
     else:
         plt.tight_layout()
-        plt.savefig(
-            f"{basedir}/histograms/{name}-{key}-histogram-matplotlib.png", dpi=300
+        saveFigure(
+            plt.gcf(),
+            f"{basedir}/histograms/{name}-{key}-histogram-matplotlib.png",
+            dpi=300,
         )
     plt.close()
 
@@ -130,10 +134,12 @@ def plotHisto(
         )
     # assert error <= eps, f"Check Sum(Fraction) failed : error={error}, eps={eps}"
 
-    csv.to_csv(f"{basedir}/histograms/{name}-{key}-histogram-matplotlib.csv")
+    toCSV(csv, f"{basedir}/histograms/{name}-{key}-histogram-matplotlib.csv")
     pass
 
 
+@profiling.profiled("getresultHisto")
+@arena.owned("getresultHisto")
 def getresultHisto(
     input,
     name: str,
@@ -145,10 +151,12 @@ def getresultHisto(
     basedir: str,
     Components: int = 1,
     BinCount: int = 10,
+    BinRange: list[float] = None,
+    plot: bool = True,
     printed: bool = True,
     show: bool = False,
     verbose: bool = False,
-):
+) -> str:
     """histogramms
 
     Args:
@@ -162,9 +170,14 @@ def getresultHisto(
         basedir (str): result directory
         Components (int, optional): number of components. Defaults to 1.
         BinCount (int, optional): number of bins in histogram. Defaults to 10.
+        BinRange (list[float], optional): custom bins range [min, max]. Defaults to None.
+        plot (bool, optional): plot histogram. Defaults to True.
         printed (bool, optional): Defaults to True.
         show (bool, optional): show histogramms. Defaults to False.
         verbose (bool, optional): print verbose. Defaults to False.
+
+    Returns:
+        str: csv file name
     """
     os.makedirs(f"{basedir}/histograms", exist_ok=True)
     print(
@@ -172,15 +185,19 @@ def getresultHisto(
         flush=True,
     )
 
-    # convert pointdata to celldata
-    if TypeMode == "POINT":
-        pointDatatoCellData = PointDatatoCellData(
-            registrationName="pointDatatoCellData", Input=input
-        )
+    if dim == 2:
+        grandeur = "Area"
+    elif dim == 3:
+        grandeur = "Volume"
 
+    # histogram in the native association of key, weighted by the cell measure
+    # for CellData or the lumped nodal measure for PointData
+    if TypeMode == "POINT":
+        association = "POINTS"
+        weighted = f"Nodal{grandeur}" in input.PointData.keys()
     elif TypeMode == "CELL":
-        pointDatatoCellData = input
-
+        association = "CELLS"
+        weighted = grandeur in input.CellData.keys()
     else:
         print(
             f'resultHisto: not applicable for {key["Name"]} - unsupported data type {key["Type"]}',
@@ -188,21 +205,16 @@ def getresultHisto(
         )
         return
 
-    cellSize1 = CellSize(registrationName="CellSize1", Input=pointDatatoCellData)
-    # Properties modified on cellSize1 for 3D
-    cellSize1.ComputeVertexCount = 0
-    cellSize1.ComputeLength = 0
-    if dim == 2:
-        cellSize1.ComputeArea = 1  # for 2D
-    elif dim == 3:
-        cellSize1.ComputeArea = 0
-        cellSize1.ComputeVolume = 1  # for 3D
-    cellSize1.ComputeSum = 0
-    cellSize1.UpdatePipeline()
-    # print(f"cellSize1 CellData: {cellSize1.CellData[:]}", flush=True)
+    cellSize1 = input
+    if not weighted:
+        if not grandeur in input.CellData.keys():
+            # input not derived (see meshinfo.derive)
+            cellSize1 = createAnalysisCore(input, dim)
+        if TypeMode == "POINT":
+            cellSize1 = createNodalMeasure(cellSize1, grandeur)
 
     histogram1 = Histogram(registrationName="Histogram1", Input=cellSize1)
-    histogram1.SelectInputArray = ["CELLS", key]
+    histogram1.SelectInputArray = [association, key]
     # for scalar comment out Component
     if Components > 1:
         histogram1.Component = "Magnitude"
@@ -213,8 +225,9 @@ def getresultHisto(
         # get params list
         for prop in histogram1.ListProperties():
             print(f"Histogram: {prop}={histogram1.GetPropertyValue(prop)}", flush=True)
-    # TODO from key range
-    # histogram1.CustomBinRanges = [min, max]
+    if BinRange is not None:
+        histogram1.UseCustomBinRanges = 1
+        histogram1.CustomBinRanges = BinRange
 
     # Properties modified on histogram1
     histogram1.CalculateAverages = 1
@@ -226,8 +239,70 @@ def getresultHisto(
             print(f"export: {prop}={export.GetPropertyValue(prop)}", flush=True)
     export.UpdateVTKObjects()  # is it needed?
     export.UpdatePipeline()
-    Delete(histogram1)
-    del histogram1
+    del export
+
+    if plot:
+        plotHisto(
+            filename,
+            name,
+            key,
+            fieldunits,
+            AreaorVolume,
+            basedir,
+            dim,
+            show=show,
+            verbose=verbose,
+        )
+
+    # remove temporary csv files
+    # os.remove(filename)
+
+    return filename
+
+
+def mergeHisto(
+    files: list[str],
+    name: str,
+    key: str,
+    fieldunits: dict,
+    AreaorVolume: float,
+    basedir: str,
+    dim: int,
+    show: bool = False,
+    verbose: bool = False,
+):
+    """sum histograms computed on the same bins and plot the result
+
+    Args:
+        files (list[str]): csv files of partial histograms
+        name (str): name of the merged histogram
+        key (str): field name
+        fieldunits (dict): dictionnary field units
+        AreaorVolume (float): total area or volume
+        basedir (str): result directory
+        dim (int): geometry dimmension
+        show (bool, optional): show histogramms. Defaults to False.
+        verbose (bool, optional): print verbose. Defaults to False.
+    """
+
+    if dim == 2:
+        grandeur = "Area"
+    elif dim == 3:
+        grandeur = "Volume"
+
+    # PointData histograms sum the lumped nodal measure
+    columns = {f"Nodal{grandeur}_total": f"{grandeur}_total"}
+    csv = pd.read_csv(files[0]).rename(columns=columns)
+    csv = csv[["bin_extents", "bin_values", f"{grandeur}_total"]]
+    for file in files[1:]:
+        partial = pd.read_csv(file).rename(columns=columns)
+        csv["bin_values"] += partial["bin_values"]
+        csv[f"{grandeur}_total"] += partial[f"{grandeur}_total"]
+
+    filename = f"{basedir}/histograms/{name}-{key}-histogram.csv"
+    csv.to_csv(filename, index=False)
+    for file in files:
+        os.remove(file)
 
     plotHisto(
         filename,
@@ -240,10 +315,3 @@ def getresultHisto(
         show=show,
         verbose=verbose,
     )
-
-    # remove temporary csv files
-    # os.remove(filename)
-
-    if TypeMode == "POINT":
-        Delete(pointDatatoCellData)
-        del pointDatatoCellData
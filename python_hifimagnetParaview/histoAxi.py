@@ -1,21 +1,22 @@
 import pandas as pd
 import numpy as np
 import os
-import gc
 import matplotlib.pyplot as plt
 from matplotlib.pyplot import hist
 
 from paraview.simple import (
-    Delete,
     CreateView,
     Show,
     ExportView,
 )
 
+from . import profiling, arena
 from .method import convert_data, resultinfo, keyinfo
+from .writer import toCSV, saveFigure
 
 
 # plot with matplotlib
+@profiling.profiled("matplotlib")
 def plotHistoAxi(
     filename: str,
     name: str,
@@ -97,7 +98,8 @@ def plotHistoAxi(
         plt.show()
     else:
         plt.tight_layout()
-        plt.savefig(
+        saveFigure(
+            plt.gcf(),
             f'{basedir}/histograms/{name}-{key.replace("_Magnitude", "")}-histogram-matplotlib.png',
             dpi=300,
         )
@@ -106,13 +108,16 @@ def plotHistoAxi(
     df_histo_plt = pd.DataFrame()
     df_histo_plt[rf"{symbol} [{out_unit:~P}]"] = ticks
     df_histo_plt["Fraction of total Volume [%]"] = counts
-    df_histo_plt.to_csv(
-        f"{basedir}/histograms/{name}-{key.replace('_Magnitude', '')}-histogram-matplotlib.csv"
+    toCSV(
+        df_histo_plt,
+        f"{basedir}/histograms/{name}-{key.replace('_Magnitude', '')}-histogram-matplotlib.csv",
     )
 
     pass
 
 
+@profiling.profiled("getresultHisto")
+@arena.owned("getresultHisto")
 def resultHistos(
     input,
     name: str,
@@ -194,16 +199,5 @@ def resultHistos(
                             verbose=verbose,
                         )
 
-    Delete(spreadSheetView)
-    del spreadSheetView
-
-    # Force a garbage collection
-    collected = gc.collect()
-    if verbose:
-        print(
-            f"resultsHistos: Garbage collector: collected {collected} objects.",
-            flush=True,
-        )
-
     # remove: f"{basedir}/histograms/{name}-Axi-cellcenters-all.csv"
     # os.remove(filename)
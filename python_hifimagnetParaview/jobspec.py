@@ -0,0 +1,328 @@
+import os
+import json
+
+from . import expressions
+
+# job spec: outputs requested from one export
+#   options: pipeline options shared by all outputs
+#   fields: derived fields declarations (see expressions.parse)
+#   outputs: list of outputs, each {"kind": ..., **parameters}
+#
+# the planner compiles a spec into a list of stages (a DAG in topological order),
+# stages with the same operation and parameters are shared by all outputs
+
+# default pipeline options
+_options = {
+    "compact": False,
+    "byparts": False,
+    "memorylimit": None,
+}
+
+# output kinds and their default parameters
+_outputs = {
+    "stats": {
+        "blocks": True,
+        "histos": False,
+        "bins": 20,
+        "show": False,
+    },
+    "plots": {
+        "r": None,
+        "z": None,
+        "theta": None,
+        "field": "",
+        "plotsMarker": "",
+        "greyspace": False,
+        "show": False,
+    },
+    "views": {
+        "field": "",
+        "deformed": False,
+        "paired": False,
+        "factor": 1,
+        "combine": [],
+        "z": None,
+        "theta": None,
+        "thetaviews": None,
+        "transparentBG": False,
+        "customRangeHisto": False,
+        "raster": False,
+    },
+    "stl": {
+        "deformed": False,
+        "factor": 1,
+    },
+    "scene": {
+        "field": "",
+        "deformed": False,
+        "factor": 1,
+        "triangles": 200000,
+    },
+    "animation": {
+        "fields": [],
+        "z": None,
+        "theta": None,
+        "thetaviews": None,
+        "fps": 5,
+        "format": "mp4",
+        "transparentBG": False,
+    },
+}
+
+
+def fromargs(args) -> dict:
+    """generate the job spec equivalent to the command line flags
+
+    Args:
+        args: parsed command line options
+
+    Returns:
+        dict: job spec
+    """
+
+    options = {key: getattr(args, key, value) for key, value in _options.items()}
+    outputs = []
+    if args.stats or args.histos:
+        outputs.append(
+            {
+                "kind": "stats",
+                "blocks": args.stats,
+                "histos": args.histos,
+                "bins": args.bins,
+                "show": args.show,
+            }
+        )
+    if args.plots:
+        outputs.append(
+            {
+                "kind": "plots",
+                "r": args.r,
+                "z": getattr(args, "z", None),
+                "theta": getattr(args, "theta", None),
+                "field": args.field,
+                "plotsMarker": args.plotsMarker,
+                "greyspace": args.greyspace,
+                "show": args.show,
+            }
+        )
+    if args.views:
+        view = {
+            "kind": "views",
+            "field": args.field,
+            "z": getattr(args, "z", None),
+            "theta": getattr(args, "theta", None),
+            "thetaviews": getattr(args, "thetaviews", None),
+            "transparentBG": args.transparentBG,
+            "customRangeHisto": args.customRangeHisto,
+            "raster": getattr(args, "raster", False),
+        }
+        # deformed views are paired with the views (rendered from the same slices)
+        outputs.append(
+            {
+                **view,
+                "paired": True,
+                "factor": args.deformedfactor,
+                "combine": getattr(args, "combine", None) or [],
+            }
+        )
+    if getattr(args, "scene", None):
+        outputs.append({"kind": "scene", "field": args.field, "triangles": args.scene})
+    if getattr(args, "animate", None) is not None:
+        outputs.append(
+            {
+                "kind": "animation",
+                "fields": args.animate or ([args.field] if args.field else []),
+                "z": getattr(args, "z", None),
+                "theta": getattr(args, "theta", None),
+                "thetaviews": getattr(args, "thetaviews", None),
+                "fps": args.fps,
+                "format": args.movieformat,
+                "transparentBG": args.transparentBG,
+            }
+        )
+    if getattr(args, "channels", False):
+        outputs.append({"kind": "stl", "deformed": False})
+        outputs.append({"kind": "stl", "deformed": True, "factor": 1})
+
+    return {"options": options, "outputs": outputs}
+
+
+def load(filename: str) -> dict:
+    """load a job spec from a json or yaml file
+
+    Args:
+        filename (str): job spec file name
+
+    Returns:
+        dict: job spec
+    """
+
+    with open(filename, "r") as f:
+        if filename.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError(f"job spec {filename}: yaml files require pyyaml")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def save(spec: dict, filename: str):
+    """save a job spec as json (reusable with --job)
+
+    Args:
+        spec (dict): job spec
+        filename (str): json file name
+    """
+
+    dirname = os.path.dirname(filename)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    with open(filename, "w") as f:
+        json.dump(spec, f, indent=4)
+
+
+def normalize(spec: dict, options: dict = None) -> dict:
+    """check a job spec and fill in default parameters
+
+    Args:
+        spec (dict): job spec
+        options (dict, optional): default options (eg. from fromargs). Defaults to None.
+
+    Returns:
+        dict: job spec with all options and output parameters
+    """
+
+    unknown = set(spec) - {"options", "fields", "outputs"}
+    if unknown:
+        raise RuntimeError(f"job spec: unknown sections {sorted(unknown)}")
+
+    normalized = {
+        "options": {**_options, **(options or {})},
+        "fields": list(spec.get("fields", [])),
+        "outputs": [],
+    }
+    for key, value in spec.get("options", {}).items():
+        if key not in _options:
+            raise RuntimeError(f"job spec: unknown option {key}")
+        normalized["options"][key] = value
+
+    # fields are checked here, compiled by expressions.configure
+    for field in normalized["fields"]:
+        expressions.parse(field)
+
+    for output in spec.get("outputs", []):
+        kind = output.get("kind")
+        if kind not in _outputs:
+            raise RuntimeError(
+                f"job spec: unknown output kind {kind} (expected {list(_outputs)})"
+            )
+        unknown = set(output) - set(_outputs[kind]) - {"kind"}
+        if unknown:
+            raise RuntimeError(f"job spec: unknown {kind} parameters {sorted(unknown)}")
+        if output.get("deformed") and output.get("paired"):
+            raise RuntimeError(f"job spec: {kind} are either deformed or paired")
+        normalized["outputs"].append({"kind": kind, **_outputs[kind], **output})
+    return normalized
+
+
+def _add(stages: dict, op: str, params: dict, deps: list[str]) -> str:
+    """add a stage unless an identical one is already planned
+
+    Returns:
+        str: stage name
+    """
+
+    name = op
+    if params:
+        name = f"{op}{json.dumps(params, sort_keys=True)}"
+    if name not in stages:
+        stages[name] = {"name": name, "op": op, "params": params, "deps": deps}
+    return name
+
+
+def plan(spec: dict) -> list[dict]:
+    """compile a normalized job spec into stages
+
+    Stages are:
+        meshinfo: block info, insert stats and requested stats/histograms (always run)
+        derive: dataset with derived fields for plots, views and stl
+        pointdata: CellData converted to PointData for plots
+        deformed: warped geometry, one per deformation factor (paired views warp
+            their own slices)
+        plots, views, stl, scene, animation: outputs
+
+    Args:
+        spec (dict): normalized job spec (see normalize)
+
+    Returns:
+        list[dict]: stages {name, op, params, deps}, dependencies first
+    """
+
+    options = spec["options"]
+    outputs = spec["outputs"]
+    stages = {}
+
+    # meshinfo runs once for all stats outputs
+    stats = [output for output in outputs if output["kind"] == "stats"]
+    meshinfo = _add(
+        stages,
+        "meshinfo",
+        {
+            "blocks": any(output["blocks"] for output in stats),
+            "histos": any(output["histos"] for output in stats),
+            "bins": max([output["bins"] for output in stats], default=20),
+            "show": any(output["show"] for output in stats),
+            **options,
+        },
+        [],
+    )
+
+    for output in outputs:
+        kind = output["kind"]
+        params = {key: value for key, value in output.items() if key != "kind"}
+        if kind == "stats":
+            continue
+
+        derive = _add(stages, "derive", {"compact": options["compact"]}, [meshinfo])
+        if kind == "plots":
+            pointdata = _add(stages, "pointdata", {}, [derive])
+            _add(stages, "plots", params, [pointdata])
+            continue
+
+        # animations have no deformed geometry (the geometry is fixed), paired
+        # views warp their own slices (see display3D.renderGroup)
+        geometry = derive
+        if params.pop("deformed", False):
+            geometry = _add(stages, "deformed", {"factor": params["factor"]}, [derive])
+        elif "factor" in params and not params.get("paired", False):
+            params["factor"] = None
+        _add(stages, kind, params, [geometry, meshinfo])
+
+    return list(stages.values())
+
+
+def describe(stages: list[dict]):
+    """print the planned stages"""
+
+    print(f"Job plan: {len(stages)} stages", flush=True)
+    for i, stage in enumerate(stages):
+        print(f"stage[{i}]: {stage['name']} <- {stage['deps']}", flush=True)
+
+
+def run(stages: list[dict], operations: dict) -> dict:
+    """run planned stages in order, each stage is run once
+
+    Args:
+        stages (list[dict]): stages (see plan)
+        operations (dict): op -> function(*dependencies results, **params)
+
+    Returns:
+        dict: results per stage name
+    """
+
+    results = {}
+    for stage in stages:
+        inputs = [results[dep] for dep in stage["deps"]]
+        results[stage["name"]] = operations[stage["op"]](*inputs, **stage["params"])
+    return results
@@ -1,19 +1,30 @@
-import gc
+import os
 
 from paraview.simple import (
-    CellSize,
     ExtractBlock,
-    CellDatatoPointData,
     Calculator,
     MergeBlocks,
-    Delete,
+    ProgrammableFilter,
 )
-from paraview import servermanager as sm
-from paraview.vtk.numpy_interface import dataset_adapter as dsa
-from paraview.vtk.numpy_interface import algorithms as algs
 
-from .method import convert_data, info, resultinfo
-from .stats import resultStats, createStatsTable
+from . import profiling, arena, expressions
+from .method import (
+    convert_data,
+    info,
+    resultinfo,
+    createAnalysisCore,
+    createExpressionFields,
+    createNodalMeasure,
+)
+from .stats import (
+    resultStats,
+    getresultStats,
+    statsWeights,
+    createStatsTable,
+    mergeStats,
+)
+from .histo import getresultHisto, mergeHisto
+from .view import viewGeometry
 
 
 def scaleField(input, key: str, nkey: str, AttributeType: str, factor: float):
@@ -67,7 +78,9 @@ def addField(input, key: str, nkey: str, AttributeType: str, factor: float):
     return calculator1
 
 
-def rectTocylField(input, key: str, nkey: str, AttributeType: str):
+def rectTocylField(
+    input, key: str, nkey: str, AttributeType: str, ResultArrayType: str = "Double"
+):
     """compute r and theta component of a vector Field
 
     vr = ux * cos + uy * sin
@@ -85,6 +98,7 @@ def rectTocylField(input, key: str, nkey: str, AttributeType: str):
         key (str): field name
         nkey (str): _description_
         AttributeType (str): 'Point Data'
+        ResultArrayType (str, optional): 'Double' or 'Float'. Defaults to 'Double'.
 
     Raises:
         RuntimeError: rectTocylField: key - unsupported AttributeType
@@ -111,30 +125,35 @@ def rectTocylField(input, key: str, nkey: str, AttributeType: str):
     else:
         calculator1 = Calculator(registrationName="Calculator1", Input=input)
         calculator1.AttributeType = AttributeType  # 'Cell Data'
+        calculator1.ResultArrayType = ResultArrayType
         calculator1.ResultArrayName = "r"
         calculator1.Function = "sqrt(coordsX*coordsX+coordsY*coordsY)"
         calculator1.UpdatePipeline()
 
         calculator2 = Calculator(Input=calculator1)
         calculator2.AttributeType = AttributeType  # 'Cell Data'
+        calculator2.ResultArrayType = ResultArrayType
         calculator2.ResultArrayName = "Cos"
         calculator2.Function = "coordsX/r"
         calculator2.UpdatePipeline()
 
         calculator3 = Calculator(Input=calculator2)
         calculator3.AttributeType = AttributeType  # 'Cell Data'
+        calculator3.ResultArrayType = ResultArrayType
         calculator3.ResultArrayName = "Sin"
         calculator3.Function = "coordsY/r"
         calculator3.UpdatePipeline()
 
     calculator4 = Calculator(Input=calculator3)
     calculator4.AttributeType = AttributeType  # 'Cell Data'
+    calculator4.ResultArrayType = ResultArrayType
     calculator4.ResultArrayName = f"{key}_ur"
     calculator4.Function = f'"{key}_X"*Cos+"{key}_Y"*Sin'
     calculator4.UpdatePipeline()
 
     calculator5 = Calculator(Input=calculator4)
     calculator5.AttributeType = AttributeType  # 'Cell Data'
+    calculator5.ResultArrayType = ResultArrayType
     calculator5.ResultArrayName = f"{key}_ut"
     calculator5.Function = f'-"{key}_X"*Sin+"{key}_Y"*Cos'
 
@@ -143,7 +162,12 @@ def rectTocylField(input, key: str, nkey: str, AttributeType: str):
 
 
 def createVectorNorm(
-    input, key: str, nkey: str, AttributeType: str, printed: bool = True
+    input,
+    key: str,
+    nkey: str,
+    AttributeType: str,
+    ResultArrayType: str = "Double",
+    printed: bool = True,
 ):
     """create Norm of a vector
 
@@ -152,6 +176,7 @@ def createVectorNorm(
         key (str): field name
         nkey (str): _description_
         AttributeType (str): 'Cell Data'
+        ResultArrayType (str, optional): 'Double' or 'Float'. Defaults to 'Double'.
         printed (bool, optional): Defaults to True.
 
     Returns:
@@ -160,6 +185,7 @@ def createVectorNorm(
 
     calculator1 = Calculator(registrationName="Calculator1", Input=input)
     calculator1.AttributeType = AttributeType  # 'Cell Data'
+    calculator1.ResultArrayType = ResultArrayType
     calculator1.ResultArrayName = f"{key}norm"
     calculator1.Function = f'mag("{key}")'
     if not printed:
@@ -173,6 +199,582 @@ def createVectorNorm(
     return calculator1
 
 
+# script of the fused vector stage (see createVectorFields)
+#   keys: list of vector names (PointData or CellData)
+#   axis: cylindrical components for axisymmetric geometry
+#   dtype: numpy type of derived fields
+_vectorFieldsScript = """
+import numpy
+from vtkmodules.vtkFiltersCore import vtkCellCenters
+from vtkmodules.numpy_interface import dataset_adapter as dsa
+
+keys = {keys!r}
+axis = {axis!r}
+dtype = numpy.{dtype}
+
+
+def cylindrical(coords, data, store):
+    r = numpy.hypot(coords[:, 0], coords[:, 1])
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        Cos = coords[:, 0] / r
+        Sin = coords[:, 1] / r
+    if store and "r" not in data.keys():
+        data.append(r.astype(dtype), "r")
+        data.append(Cos.astype(dtype), "Cos")
+        data.append(Sin.astype(dtype), "Sin")
+    return Cos, Sin
+
+
+output.VTKObject.ShallowCopy(inputs[0].VTKObject)
+blocks = [output]
+if output.VTKObject.IsA("vtkCompositeDataSet"):
+    blocks = list(output)
+
+for block in blocks:
+    if block.GetNumberOfPoints() == 0:
+        continue
+
+    # vectors are processed in their native association:
+    # coordinates are the points for PointData and the cell centers for CellData
+    trig = {{}}
+    for key in keys:
+        if key in block.PointData.keys():
+            association = "POINTS"
+            data = block.PointData
+        elif key in block.CellData.keys():
+            association = "CELLS"
+            data = block.CellData
+        else:
+            continue
+
+        u = numpy.asarray(data[key])
+        data.append(numpy.linalg.norm(u, axis=1).astype(dtype), key + "norm")
+        if axis:
+            data.append(u[:, 0].astype(dtype), key + "_r")
+            data.append(u[:, 1].astype(dtype), key + "_z")
+            continue
+
+        if association not in trig:
+            if association == "POINTS":
+                coords = numpy.asarray(block.Points)
+            else:
+                centers = vtkCellCenters()
+                centers.SetInputData(block.VTKObject)
+                centers.Update()
+                coords = numpy.asarray(dsa.WrapDataObject(centers.GetOutput()).Points)
+            trig[association] = cylindrical(coords, data, association == "POINTS")
+
+        (Cos, Sin) = trig[association]
+        ur = u[:, 0] * Cos + u[:, 1] * Sin
+        ut = -u[:, 0] * Sin + u[:, 1] * Cos
+        data.append(ur.astype(dtype), key + "_ur")
+        data.append(ut.astype(dtype), key + "_ut")
+"""
+
+
+def createVectorFields(
+    input,
+    keys: list[str],
+    axis: bool = False,
+    ResultArrayType: str = "Double",
+    printed: bool = True,
+):
+    """create Norm and cylindrical components of vectors in a single filter
+
+    same fields as createVectorNorm and rectTocylField (or cylField for axis):
+    {key}norm, r, Cos, Sin, {key}_ur and {key}_ut (or {key}_r and {key}_z)
+
+    derived fields keep the association of the vector (CellData vectors use
+    the cell centers, r, Cos and Sin are only stored as PointData)
+
+    Args:
+        input: paraview reader
+        keys (list[str]): list of vector PointData or CellData
+        axis (bool, optional): axisymmetric geometry. Defaults to False.
+        ResultArrayType (str, optional): 'Double' or 'Float'. Defaults to 'Double'.
+        printed (bool, optional): Defaults to True.
+
+    Returns:
+        paraview reader
+    """
+
+    dtype = "float64"
+    if ResultArrayType == "Float":
+        dtype = "float32"
+
+    vectorfields = ProgrammableFilter(registrationName="VectorFields", Input=input)
+    vectorfields.Script = _vectorFieldsScript.format(
+        keys=keys, axis=axis, dtype=dtype
+    )
+    if not printed:
+        for prop in vectorfields.ListProperties():
+            print(
+                f"VectorFields: {prop}={vectorfields.GetPropertyValue(prop)}",
+                flush=True,
+            )
+
+    vectorfields.UpdatePipeline()
+    return vectorfields
+
+
+# script of the tensor fields (see createTensorFields)
+#   keys: 3D tensors, 9 components or 6 (symmetric: XX, YY, ZZ, XY, YZ, XZ)
+#   dtype: numpy type of derived fields
+_tensorFieldsScript = """
+import numpy
+from vtkmodules.vtkFiltersCore import vtkCellCenters
+from vtkmodules.numpy_interface import dataset_adapter as dsa
+from python_hifimagnetParaview import tensors
+
+keys = {keys!r}
+dtype = numpy.{dtype}
+
+output.VTKObject.ShallowCopy(inputs[0].VTKObject)
+blocks = [output]
+if output.VTKObject.IsA("vtkCompositeDataSet"):
+    blocks = list(output)
+
+for block in blocks:
+    if block.GetNumberOfPoints() == 0:
+        continue
+
+    # tensors are processed in their native association:
+    # coordinates are the points for PointData and the cell centers for CellData
+    coords = {{}}
+    for key in keys:
+        if key in block.PointData.keys():
+            association = "POINTS"
+            data = block.PointData
+        elif key in block.CellData.keys():
+            association = "CELLS"
+            data = block.CellData
+        else:
+            continue
+
+        if association not in coords:
+            if association == "POINTS":
+                coords[association] = numpy.asarray(block.Points)
+            else:
+                centers = vtkCellCenters()
+                centers.SetInputData(block.VTKObject)
+                centers.Update()
+                coords[association] = numpy.asarray(
+                    dsa.WrapDataObject(centers.GetOutput()).Points
+                )
+        xyz = coords[association]
+
+        for suffix, value in tensors.derived(data[key], xyz).items():
+            data.append(
+                numpy.ascontiguousarray(value, dtype=dtype), f"{{key}}_{{suffix}}"
+            )
+"""
+
+
+def createTensorFields(
+    input, keys: list[str], ResultArrayType: str = "Double", printed: bool = True
+):
+    """create principal values, Von Mises, Tresca and cylindrical components of tensors
+
+    {key}_I >= {key}_II >= {key}_III, {key}_VonMises, {key}_Tresca (I - III),
+    {key}_rr, {key}_tt (hoop) and {key}_zz, computed in one pass over all cells
+    (or points) of each block (see tensors.derived)
+
+    derived fields keep the association of the tensor
+
+    Args:
+        input: paraview reader
+        keys (list[str]): list of 3D tensor PointData or CellData
+        ResultArrayType (str, optional): 'Double' or 'Float'. Defaults to 'Double'.
+        printed (bool, optional): Defaults to True.
+
+    Returns:
+        paraview reader
+    """
+
+    dtype = "float64"
+    if ResultArrayType == "Float":
+        dtype = "float32"
+
+    tensorfields = ProgrammableFilter(registrationName="TensorFields", Input=input)
+    tensorfields.Script = _tensorFieldsScript.format(keys=keys, dtype=dtype)
+    if not printed:
+        for prop in tensorfields.ListProperties():
+            print(
+                f"TensorFields: {prop}={tensorfields.GetPropertyValue(prop)}",
+                flush=True,
+            )
+
+    tensorfields.UpdatePipeline()
+    return tensorfields
+
+
+@profiling.profiled("derive")
+def derive(input, dim: int, compact: bool = False, printed: bool = True):
+    """add derived fields (vectors and tensors, see createVectorFields and
+    createTensorFields), declared fields (see expressions) and cell size
+
+    Args:
+        input: paraview reader
+        dim (int): geometry dimmension
+        compact (bool, optional): store derived fields in float32. Defaults to False.
+        printed (bool, optional): Defaults to True.
+
+    Returns:
+        cellsize: paraview filter with derived fields, analysis core arrays
+            (see createAnalysisCore) and Area or Volume
+            (CellData, lumped PointData and FieldData sum per block)
+    """
+
+    # arrays are kept in their native association (no CellDatatoPointData):
+    # derived fields of a vector have the association of the vector
+    print("Add Norm for vectors and RectToCyl:", flush=True)
+    calculator = input
+    ResultArrayType = "Double"
+    if compact:
+        ResultArrayType = "Float"
+
+    keys = []
+    for datatype, fields in [
+        ("PointData", input.PointData),
+        ("CellData", input.CellData),
+    ]:
+        for field in fields:
+            if (dim == 2 and field.GetNumberOfComponents() > 1) or (
+                field.GetNumberOfComponents() == dim
+            ):
+                print(
+                    f"create {field.Name}norm, {field.Name}_ur and {field.Name}_ut for {field.Name} {datatype} vector",
+                    flush=True,
+                )
+                keys.append(field.Name)
+    if keys:
+        calculator = createVectorFields(
+            calculator, keys, ResultArrayType=ResultArrayType, printed=printed
+        )
+
+    tensors = []
+    if dim == 3:
+        for fields in [input.PointData, input.CellData]:
+            for field in fields:
+                if field.GetNumberOfComponents() in [6, 9]:
+                    print(
+                        f"create principal values, VonMises, Tresca and cylindrical components for {field.Name} tensor",
+                        flush=True,
+                    )
+                    tensors.append(field.Name)
+    if tensors:
+        calculator = createTensorFields(
+            calculator, tensors, ResultArrayType=ResultArrayType, printed=printed
+        )
+
+    # derived fields declared in the job spec or fieldunits
+    program = expressions.configured()
+    if program:
+        calculator = createExpressionFields(
+            calculator, program, ResultArrayType=ResultArrayType, printed=printed
+        )
+
+    # block id, cell size and cell centers
+    print("Get mesh size", flush=True)
+    cellsize = createAnalysisCore(calculator, dim, printed=printed)
+
+    # weights of PointData
+    grandeur = "Area" if dim == 2 else "Volume"
+    return createNodalMeasure(cellsize, grandeur, printed)
+
+
+def partBatches(
+    blockdata: dict, memorylimit: float = None, factor: float = 4
+) -> list[list[str]]:
+    """group blocks into batches that are resident together in byparts mode
+
+    The memory of a block once derived is estimated as its raw memory
+    times factor (norm and cylindrical components, analysis core, nodal measure).
+
+    Args:
+        blockdata (dict): dict of blocks data (with raw "Memory" in kB)
+        memorylimit (float, optional): memory ceiling in MB, one block per batch if None. Defaults to None.
+        factor (float, optional): derived to raw memory ratio. Defaults to 4.
+
+    Returns:
+        list[list[str]]: list of batches of block selectors
+    """
+
+    batches = []
+    batch = []
+    batch_memory = 0
+    for block, data in blockdata.items():
+        memory = data["Memory"] * factor / 1024.0
+        if memorylimit and memory > memorylimit:
+            print(
+                f"partBatches: {data['name']} needs about {memory:.1f} MB > memorylimit={memorylimit} MB",
+                flush=True,
+            )
+
+        if batch and (not memorylimit or batch_memory + memory > memorylimit):
+            batches.append(batch)
+            batch = []
+            batch_memory = 0
+        batch.append(block)
+        batch_memory += memory
+
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+@profiling.profiled("meshinfo")
+def meshinfoByParts(
+    input,
+    dim: int,
+    fieldunits: dict,
+    ignored_keys: list[str],
+    basedir: str,
+    ureg,
+    ComputeStats: bool = True,
+    ComputeHisto: bool = False,
+    BinCount: int = 10,
+    memorylimit: float = None,
+    compact: bool = False,
+    show: bool = False,
+    verbose: bool = False,
+    printed: bool = True,
+) -> tuple:
+    """display geometric info from input dataset processing blocks batch by batch
+
+    Each batch is extracted from input, derived, reduced to per block stats and released.
+    Insert stats are merged from per block partial stats,
+    insert histograms are summed from per block histograms on common bins.
+
+    Args:
+        input: paraview reader
+        dim (int): geometry dimmension
+        fieldunits (dict): dictionnary of field units
+        ignored_keys (list[str]): list of ignored fields
+        basedir (str): result directory
+        ureg: pint unit registry
+        ComputeStats (bool, optional): compute statistics per block. Defaults to True.
+        ComputeHisto (bool, optional): compute histograms. Defaults to False.
+        BinCount (int, optional): number of bins in histograms. Defaults to 10.
+        memorylimit (float, optional): memory ceiling in MB for resident blocks. Defaults to None.
+        compact (bool, optional): store derived fields in float32. Defaults to False.
+        show (bool, optional): show histograms. Defaults to False.
+        verbose (bool, optional): print verbose. Defaults to False.
+        printed (bool, optional): Defaults to True.
+
+    Returns:
+        None: no derived dataset is kept (see derive)
+        blockdata (dict): dict of blocks data
+        stats (list | dict): list of statistics or insert statistics if not ComputeStats
+    """
+
+    if dim == 2:
+        grandeur = "Area"
+    elif dim == 3:
+        grandeur = "Volume"
+    vunits = fieldunits[grandeur]["Units"]
+    mmdim = f"{vunits[1]:~P}"
+
+    dataInfo = info(input)
+    hierarchy = dataInfo.GetHierarchy()
+    rootnode = hierarchy.GetRootNode()
+    rootSelector = f"/{hierarchy.GetRootNodeName()}"
+    blocks = hierarchy.GetNumberOfChildren(rootnode)
+    print(f"Load blocks: {blocks}", flush=True)
+
+    blockdata = {}
+    for i in range(blocks):
+        child = hierarchy.GetChild(rootnode, i)
+        name = hierarchy.GetNodeName(child)
+        child_info = input.GetSubsetDataInformation(0, child)
+        blockdata[f"{rootSelector}/{name}"] = {
+            "name": name,
+            "nodes": child_info.GetNumberOfPoints(),
+            "cells": child_info.GetNumberOfCells(),
+            "Memory": child_info.GetMemorySize(),
+        }
+
+    batches = partBatches(blockdata, memorylimit)
+    print(
+        f"Process {blocks} blocks in {len(batches)} batches (memorylimit={memorylimit} MB)",
+        flush=True,
+    )
+
+    stats = []
+    partials = {"PointData": {}, "CellData": {}}
+    histokeys = {}
+    for n, batch in enumerate(batches):
+        print(f"batch[{n}]: {batch}", flush=True)
+        # the batch is released before loading the next one
+        with arena.scope("meshinfo.batch"):
+            extractBatch = ExtractBlock(registrationName="parts", Input=input)
+            extractBatch.Selectors = batch
+            cellsize = derive(extractBatch, dim, compact, printed)
+
+            for block in batch:
+                name = blockdata[block]["name"]
+                extractBlock1 = ExtractBlock(registrationName=name, Input=cellsize)
+                extractBlock1.Selectors = [block]
+                extractBlock1.UpdatePipeline()
+                vol = extractBlock1.FieldData[grandeur].GetRange()[0]
+                blockdata[block][grandeur] = vol
+                vol_mmdim = convert_data({grandeur: vunits}, vol, grandeur)
+                print(
+                    f"block: {name}, nodes={blockdata[block]['nodes']}, cells={blockdata[block]['cells']}, vol={vol_mmdim} {mmdim}",
+                    flush=True,
+                )
+
+                insert = not "Air" in block
+                if not ComputeStats and not insert:
+                    continue
+
+                statsdict = resultStats(
+                    extractBlock1,
+                    name,
+                    dim,
+                    vol,
+                    fieldunits,
+                    ignored_keys,
+                    ureg,
+                    basedir,
+                    histo=ComputeStats and ComputeHisto,
+                    BinCount=BinCount,
+                    show=show,
+                    verbose=verbose,
+                )
+
+                # keep partial stats of every field for insert,
+                # including fields excluded or constant on this block
+                if insert:
+                    for datatype in partials:
+                        AttributeMode = statsdict[datatype]["AttributeMode"]
+                        for key, kdata in statsdict[datatype]["Arrays"].items():
+                            if key in ignored_keys:
+                                continue
+                            if "Stats" in kdata:
+                                partial = kdata["Stats"]
+                            else:
+                                partial = getresultStats(
+                                    extractBlock1,
+                                    name,
+                                    key,
+                                    AttributeMode,
+                                    basedir,
+                                    verbose=verbose,
+                                    weights=statsWeights(
+                                        extractBlock1, dim, AttributeMode
+                                    ),
+                                )
+                                # only unweighted stats export a csv
+                                filename = f"{basedir}/stats/{name}-{key}-descriptivestats.csv"
+                                if os.path.isfile(filename):
+                                    os.remove(filename)
+                            partials[datatype].setdefault(key, []).append(partial)
+
+                            (kmin, kmax) = kdata["Bounds"][0]
+                            if key in histokeys:
+                                (hmin, hmax) = histokeys[key]["Bounds"]
+                                kmin = min(kmin, hmin)
+                                kmax = max(kmax, hmax)
+                            histokeys[key] = {
+                                "TypeMode": statsdict[datatype]["TypeMode"],
+                                "Components": kdata["Components"],
+                                "Bounds": (kmin, kmax),
+                            }
+
+                if ComputeStats:
+                    stats.append(statsdict)
+                    createStatsTable([statsdict], name, fieldunits, basedir, ureg, verbose)
+                else:
+                    for datatype in partials:
+                        for key, kdata in statsdict[datatype]["Arrays"].items():
+                            filename = f"{basedir}/stats/{name}-{key}-descriptivestats.csv"
+                            if "Stats" in kdata and os.path.isfile(filename):
+                                os.remove(filename)
+
+    # merge partial stats for insert
+    inserts = [block for block in blockdata.keys() if not "Air" in block]
+    insert_vol = sum([blockdata[block][grandeur] for block in inserts])
+    insertdict = {
+        "PointData": {"Arrays": {}},
+        "CellData": {"Arrays": {}},
+    }
+    for datatype in partials:
+        for key in partials[datatype]:
+            insertdict[datatype]["Arrays"][key] = {
+                "Stats": mergeStats(partials[datatype][key], "insert")
+            }
+    createStatsTable([insertdict], "insert", fieldunits, basedir, ureg, verbose)
+
+    # insert histograms: second pass on common bins
+    histokeys = {
+        key: data
+        for key, data in histokeys.items()
+        if data["Bounds"][0] != data["Bounds"][1]
+    }
+    if ComputeHisto and histokeys:
+        print("Histograms for insert by parts:", flush=True)
+        files = {key: [] for key in histokeys}
+        for n, batch in enumerate(batches):
+            insert_batch = [block for block in batch if block in inserts]
+            if not insert_batch:
+                continue
+            with arena.scope("meshinfo.batch"):
+                extractBatch = ExtractBlock(registrationName="parts", Input=input)
+                extractBatch.Selectors = insert_batch
+                cellsize = derive(extractBatch, dim, compact, printed)
+                for block in insert_batch:
+                    name = blockdata[block]["name"]
+                    extractBlock1 = ExtractBlock(registrationName=name, Input=cellsize)
+                    extractBlock1.Selectors = [block]
+                    extractBlock1.UpdatePipeline()
+                    blockkeys = list(extractBlock1.PointData.keys()) + list(
+                        extractBlock1.CellData.keys()
+                    )
+                    for key, data in histokeys.items():
+                        if key in blockkeys:
+                            files[key].append(
+                                getresultHisto(
+                                    extractBlock1,
+                                    f"insert-{name}",
+                                    dim,
+                                    blockdata[block][grandeur],
+                                    fieldunits,
+                                    key,
+                                    data["TypeMode"],
+                                    basedir,
+                                    data["Components"],
+                                    BinCount=BinCount,
+                                    BinRange=list(data["Bounds"]),
+                                    plot=False,
+                                    verbose=verbose,
+                                )
+                            )
+
+        for key in histokeys:
+            mergeHisto(
+                files[key],
+                "insert",
+                key,
+                fieldunits,
+                insert_vol,
+                basedir,
+                dim,
+                show=show,
+                verbose=verbose,
+            )
+
+    if not ComputeStats:
+        return None, blockdata, insertdict
+
+    stats.insert(0, insertdict)
+    if len(blockdata.keys()) > 1:
+        createStatsTable(stats, "total", fieldunits, basedir, ureg, verbose)
+
+    return None, blockdata, stats
+
+
+@profiling.profiled("meshinfo")
 def meshinfo(
     input,
     dim: int,
@@ -183,6 +785,9 @@ def meshinfo(
     ComputeStats: bool = True,
     ComputeHisto: bool = False,
     BinCount: int = 10,
+    byparts: bool = False,
+    memorylimit: float = None,
+    compact: bool = False,
     show: bool = False,
     verbose: bool = False,
     printed: bool = True,
@@ -199,6 +804,9 @@ def meshinfo(
         ComputeStats (bool, optional): compute statistics. Defaults to True.
         ComputeHisto (bool, optional): compute histograms. Defaults to False.
         BinCount (int, optional): number of bins in histograms. Defaults to 10.
+        byparts (bool, optional): process blocks batch by batch (see meshinfoByParts). Defaults to False.
+        memorylimit (float, optional): memory ceiling in MB for byparts. Defaults to None.
+        compact (bool, optional): store derived fields in float32. Defaults to False.
         show (bool, optional): show histograms. Defaults to False.
         verbose (bool, optional): print verbose. Defaults to False.
         printed (bool, optional): Defaults to True.
@@ -209,98 +817,52 @@ def meshinfo(
         stats (dict): dict of statistics
     """
 
-    # rectTocyl: need CellDataToPointData before
-    # for temperature add, for forces and densities norm, rescale
-    cellDatatoPointData1 = CellDatatoPointData(
-        registrationName="CellDatatoPointData", Input=input
-    )
-
-    # for vector
-    print("Add Norm for vectors and RectToCyl:", flush=True)
-    calculator = cellDatatoPointData1
-
-    for field in cellDatatoPointData1.PointData:
-        if (dim == 2 and field.GetNumberOfComponents() > 1) or (
-            field.GetNumberOfComponents() == dim
-        ):
-            print(
-                f"create {field.Name}norm for {field.Name} PointData vector",
-                flush=True,
+    if byparts:
+        if input.GetDataInformation().DataInformation.IsCompositeDataSet():
+            return meshinfoByParts(
+                input,
+                dim,
+                fieldunits,
+                ignored_keys,
+                basedir,
+                ureg,
+                ComputeStats=ComputeStats,
+                ComputeHisto=ComputeHisto,
+                BinCount=BinCount,
+                memorylimit=memorylimit,
+                compact=compact,
+                show=show,
+                verbose=verbose,
+                printed=printed,
             )
-            calculator = createVectorNorm(
-                calculator, field.Name, field.Name, "Point Data"
-            )
-            print(
-                f"create {field.Name}ur and {field.Name}ut for {field.Name} PointData vector",
-                flush=True,
-            )
-            calculator = rectTocylField(
-                calculator, field.Name, field.Name, "Point Data"
-            )
-
-    print("Get mesh size", flush=True)
-    cellsize = CellSize(calculator)  # input
+        print("byparts: input has no blocks, process the whole dataset", flush=True)
 
-    # set some params
-    cellsize.ComputeLength = 0
+    # derived fields shared with views (see view.viewGeometry)
+    cellsize = viewGeometry(input, dim, compact=compact)
     if dim == 2:
-        cellsize.ComputeArea = 1
-        cellsize.ComputeVolume = 0
         grandeur = "Area"
     elif dim == 3:
-        cellsize.ComputeArea = 0
-        cellsize.ComputeVolume = 1
         grandeur = "Volume"
-    cellsize.ComputeVertexCount = 0
-    cellsize.ComputeSum = 1
-    # get params list
-    if not printed:
-        for prop in cellsize.ListProperties():
-            print(f"cellsize: {prop}={cellsize.GetPropertyValue(prop)}", flush=True)
-
-    # apply
-    cellsize.UpdatePipeline()
     dataInfo = info(cellsize)
 
-    dataset = sm.Fetch(cellsize)
-    np_dataset = dsa.WrapDataObject(dataset)
+    # volumes are read from data information (ComputeSum stores them as FieldData
+    # on each block): only these scalars come back from the server
+    composite = dataInfo.DataInformation.IsCompositeDataSet()
 
     blockdata = {}
     # check dataset type
-    if dataset.IsA("vtkUnstructuredGrid"):
+    if not composite:
         print("UnstructuredGrid", flush=True)
-        block = dataset
-    elif dataset.IsA("vtkMultiBlockDataSet"):
+        tvol = cellsize.FieldData[grandeur].GetRange()[0]
+    else:
         print("MultiBlockDataSet", flush=True)
-        block = dataset.GetBlock(0)
-
-    grandeur_data = block.GetCellData().GetArray(grandeur)
-    # print(f'block cellData[{grandeur}_data]: {grandeur_data}, type={type(grandeur_data)}', flush=True)
-    AreaorVolume = block.GetFieldData().GetArray(grandeur)
-    # print(f'block fieldData[{grandeur}]: {AreaorVolume}, type={type(AreaorVolume)}', flush=True)
-    np_grandeur = np_dataset.FieldData[grandeur]
-    # print(f'block fieldData[np_{grandeur}]: {np_grandeur}, type={type(np_grandeur)}, length={algs.shape(np_grandeur)}', flush=True)
-    tvol = algs.sum(np_grandeur)
-    vunits = fieldunits[grandeur]["Units"]
-    mmdim = f"{vunits[1]:~P}"
-    tvol_mmdim = convert_data(
-        {grandeur: vunits},
-        tvol,
-        grandeur,
-    )
-    print(
-        f"block fieldData[np_{grandeur}]: total={tvol_mmdim} {mmdim}, parts={algs.shape(np_grandeur)}",
-        flush=True,
-    )
-
-    if dataset.IsA("vtkMultiBlockDataSet"):
         hierarchy = dataInfo.GetHierarchy()
         rootnode = hierarchy.GetRootNode()
         rootSelector = f"/{hierarchy.GetRootNodeName()}"
         blocks = hierarchy.GetNumberOfChildren(rootnode)
         print(f"Load blocks: {blocks}", flush=True)
 
-        sum_vol = 0
+        tvol = 0
         for i in range(blocks):
             child = hierarchy.GetChild(rootnode, i)
             name = hierarchy.GetNodeName(child)
@@ -310,30 +872,42 @@ def meshinfo(
 
             nodes = child_info.GetNumberOfPoints()
             cells = child_info.GetNumberOfCells()
-            vol = np_grandeur.Arrays[i][0]
-            vol_mmdim = convert_data(
-                {grandeur: vunits},
-                vol,
-                grandeur,
-            )
-            print(
-                f"block[{i}]: {name}, nodes={nodes}, cells={cells}, vol={vol_mmdim} {mmdim}",
-                flush=True,
+            vol = (
+                cellsize.GetSubsetDataInformation(0, child)
+                .GetFieldDataInformation()
+                .GetArrayInformation(grandeur)
+                .GetComponentRange(0)[0]
             )
-
             blockdata[rootChild] = {
                 "name": name,
                 "nodes": nodes,
                 "cells": cells,
                 grandeur: vol,
             }
+            tvol += vol
 
-            sum_vol += vol
+    vunits = fieldunits[grandeur]["Units"]
+    mmdim = f"{vunits[1]:~P}"
+    tvol_mmdim = convert_data(
+        {grandeur: vunits},
+        tvol,
+        grandeur,
+    )
+    print(
+        f"block fieldData[{grandeur}]: total={tvol_mmdim} {mmdim}, parts={len(blockdata)}",
+        flush=True,
+    )
 
-        # check tvol == Sum(vol)
-        if abs(1 - sum_vol / tvol) > 1.0e-3:
-            raise RuntimeError(
-                f"Total {grandeur} != Sum({grandeur}), error={abs(1-sum_vol/tvol)}"
+    if composite:
+        for i, block in enumerate(blockdata.values()):
+            vol_mmdim = convert_data(
+                {grandeur: vunits},
+                block[grandeur],
+                grandeur,
+            )
+            print(
+                f"block[{i}]: {block['name']}, nodes={block['nodes']}, cells={block['cells']}, vol={vol_mmdim} {mmdim}",
+                flush=True,
             )
 
         # Compute Stats
@@ -493,39 +1067,36 @@ def meshinfo(
         """
 
         print("Data ranges without Air:", flush=True)
-        extractBlock1 = ExtractBlock(registrationName="insert", Input=cellsize)
-        extractBlock1.Selectors = [
-            block for block in blockdata.keys() if not "Air" in block
-        ]
-        extractBlock1.UpdatePipeline()
-        Grandeurs = [blockdata[block][grandeur] for block in extractBlock1.Selectors]
-        mergeBlocks1 = MergeBlocks(registrationName="MergeBlocks1", Input=extractBlock1)
-        mergeBlocks1.UpdatePipeline()
-        statsdict = resultStats(
-            mergeBlocks1,
-            "insert",
-            dim,
-            sum(Grandeurs),
-            fieldunits,
-            ignored_keys,
-            ureg,
-            basedir,
-            histo=ComputeHisto,
-            BinCount=BinCount,
-            show=show,
-            verbose=verbose,
-        )
+        with arena.scope("meshinfo.insert"):
+            extractBlock1 = ExtractBlock(registrationName="insert", Input=cellsize)
+            extractBlock1.Selectors = [
+                block for block in blockdata.keys() if not "Air" in block
+            ]
+            extractBlock1.UpdatePipeline()
+            Grandeurs = [
+                blockdata[block][grandeur] for block in extractBlock1.Selectors
+            ]
+            mergeBlocks1 = MergeBlocks(
+                registrationName="MergeBlocks1", Input=extractBlock1
+            )
+            mergeBlocks1.UpdatePipeline()
+            statsdict = resultStats(
+                mergeBlocks1,
+                "insert",
+                dim,
+                sum(Grandeurs),
+                fieldunits,
+                ignored_keys,
+                ureg,
+                basedir,
+                histo=ComputeHisto,
+                BinCount=BinCount,
+                show=show,
+                verbose=verbose,
+            )
         if verbose:
             print(f"insert statsdict={statsdict}", flush=True)
         stats.append(statsdict)
-        extractBlock1.UpdatePipeline()
-        Delete(extractBlock1)
-        del extractBlock1
-
-        # Force a garbage collection
-        collected = gc.collect()
-        if verbose:
-            print(f"Garbage collector: collected {collected} objects.", flush=True)
 
         # aggregate stats data
         createStatsTable([statsdict], "insert", fieldunits, basedir, ureg, verbose)
@@ -538,33 +1109,25 @@ def meshinfo(
             for i, block in enumerate(blockdata.keys()):
                 name = blockdata[block]["name"]
                 print(f"block[{i}]: extract {block}, name={name}", flush=True)
-                extractBlock1 = ExtractBlock(registrationName=name, Input=cellsize)
-                extractBlock1.Selectors = [block]
-                extractBlock1.UpdatePipeline()
-                statsdict = resultStats(
-                    extractBlock1,
-                    name,
-                    dim,
-                    blockdata[block][grandeur],
-                    fieldunits,
-                    ignored_keys,
-                    ureg,
-                    basedir,
-                    histo=ComputeHisto,
-                    BinCount=BinCount,
-                    show=show,
-                    verbose=verbose,
-                )
-                stats.append(statsdict)
-                Delete(extractBlock1)
-                del extractBlock1
-
-                # Force a garbage collection
-                collected = gc.collect()
-                if verbose:
-                    print(
-                        f"Garbage collector: collected {collected} objects.", flush=True
+                with arena.scope("meshinfo.block"):
+                    extractBlock1 = ExtractBlock(registrationName=name, Input=cellsize)
+                    extractBlock1.Selectors = [block]
+                    extractBlock1.UpdatePipeline()
+                    statsdict = resultStats(
+                        extractBlock1,
+                        name,
+                        dim,
+                        blockdata[block][grandeur],
+                        fieldunits,
+                        ignored_keys,
+                        ureg,
+                        basedir,
+                        histo=ComputeHisto,
+                        BinCount=BinCount,
+                        show=show,
+                        verbose=verbose,
                     )
+                stats.append(statsdict)
 
                 # aggregate stats data
                 createStatsTable([statsdict], name, fieldunits, basedir, ureg, verbose)
@@ -572,7 +1135,7 @@ def meshinfo(
             # aggregate stats data
             createStatsTable(stats, "total", fieldunits, basedir, ureg, verbose)
 
-    elif dataset.IsA("vtkUnstructuredGrid"):
+    else:
         stats = []
 
         print("Data ranges:", flush=True)
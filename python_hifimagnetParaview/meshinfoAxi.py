@@ -1,29 +1,35 @@
-import gc
 import pandas as pd
 
 from tabulate import tabulate
 from math import pi, sqrt
 
 from paraview.simple import (
-    CellSize,
     ExtractBlock,
     CellDatatoPointData,
     Calculator,
     MergeBlocks,
-    Delete,
     PointDatatoCellData,
     CellCenters,
 )
-from paraview import servermanager as sm
-from paraview.vtk.numpy_interface import dataset_adapter as dsa
-from paraview.vtk.numpy_interface import algorithms as algs
 
-from .method import convert_data, info, resultinfo, momentN, integrateKeys, keyinfo
+from . import profiling, arena, expressions
+from .method import (
+    convert_data,
+    info,
+    resultinfo,
+    momentN,
+    integrateKeys,
+    createAnalysisCore,
+    createExpressionFields,
+    keyinfo,
+)
 from .statsAxi import resultStats, createStatsTable
 from .histoAxi import resultHistos
-from .meshinfo import createVectorNorm
+from .meshinfo import createVectorFields
+from .view import viewGeometry
 
 
+@arena.owned("part_integrate")
 def part_integrate(
     input,
     name: str,
@@ -116,23 +122,48 @@ def part_integrate(
             flush=True,
         )
 
-    Delete(cellDatatoPointData)
-    del cellDatatoPointData
+    return csv
 
-    # Force a garbage collection
-    collected = gc.collect()
-    if verbose:
-        print(
-            f"resultsHistos: Garbage collector: collected {collected} objects.",
-            flush=True,
+
+def axiVolume(cellsize, child: int = None) -> float:
+    """returns the volume of revolution of a 2D axisymmetric analysis core
+
+    the sums of AxiVolume per block stored as FieldData by createAnalysisCore
+    are read from the data information, nothing is integrated
+
+    Args:
+        cellsize: analysis core (see createAnalysisCore with axis)
+        child (int, optional): hierarchy node of a block, all blocks if None. Defaults to None.
+
+    Returns:
+        float: volume
+    """
+
+    if child is not None:
+        return (
+            cellsize.GetSubsetDataInformation(0, child)
+            .GetFieldDataInformation()
+            .GetArrayInformation("AxiVolume")
+            .GetComponentRange(0)[0]
         )
 
-    return csv
+    dataInfo = info(cellsize)
+    if not dataInfo.DataInformation.IsCompositeDataSet():
+        return cellsize.FieldData["AxiVolume"].GetRange()[0]
+
+    hierarchy = dataInfo.GetHierarchy()
+    rootnode = hierarchy.GetRootNode()
+    return sum(
+        axiVolume(cellsize, hierarchy.GetChild(rootnode, i))
+        for i in range(hierarchy.GetNumberOfChildren(rootnode))
+    )
 
 
+@arena.owned("part")
 def part(
     pinput,
     name: str,
+    vol: float,
     fieldunits: dict,
     ignored_keys: list[str],
     ureg,
@@ -145,8 +176,9 @@ def part(
     """stats & histos for a part
 
     Args:
-        pinput: paraview reader
+        pinput: part of the shared cell centers (see meshinfo), CellData as PointData
         name (str): block name
+        vol (float): volume of the part (see axiVolume)
         fieldunits (dict): dict of diel units
         ignored_keys (list[str]): list of ignored fields
         ureg: pint unit registry
@@ -159,48 +191,6 @@ def part(
     Returns:
         vol, statsdict
     """
-    pointDatatoCellData = PointDatatoCellData(pinput)
-    cellsize = CellSize(pointDatatoCellData)
-    # set some params
-    cellsize.ComputeLength = 0
-    cellsize.ComputeArea = 1
-    cellsize.ComputeVolume = 0
-    cellsize.ComputeVertexCount = 0
-    cellsize.ComputeSum = 1
-    cellsize.UpdatePipeline()
-
-    cellcenters = CellCenters(registrationName="CellCenters", Input=cellsize)
-    # Properties modified on cellCenters1
-    cellcenters.VertexCells = 1
-    cellcenters.UpdatePipeline()
-
-    # Add Volume
-    calculator1 = Calculator(registrationName=f"AxiVolume", Input=cellcenters)
-    calculator1.AttributeType = "Point Data"
-    calculator1.ResultArrayName = f"AxiVolume"
-    calculator1.Function = f"2*{pi}*coordsX*Area"
-    calculator1.UpdatePipeline()
-
-    dataset = sm.Fetch(calculator1)
-    np_dataset = dsa.WrapDataObject(dataset)
-    # print(f"type(dataset)={type(dataset)}", flush=True)
-    if dataset.IsA("vtkUnstructuredGrid"):
-        # print("UnstructuredGrid", flush=True)
-        block = dataset  # .GetBlock(0)
-    elif dataset.IsA("vtkPolyData"):
-        # print("vtkPolyData", flush=True)
-        block = dataset  # .GetBlock(0)
-    elif dataset.IsA("vtkMultiBlockDataSet"):
-        # print("MultiBlockDataSet", flush=True)
-        block = dataset.GetBlock(0)
-
-    Area_data = block.GetPointData().GetArray("AxiVolume")
-    # print(f'block cellData[Area_data]: {Area_data}, type={type(Area_data)}',flush=True)
-    Area = block.GetPointData().GetArray("AxiVolume")
-    # print(f'block fieldData[Area]: {Area}, type={type(Area)}',flush=True)
-    np_Area = np_dataset.PointData["AxiVolume"]
-    # print(f'block fieldData[np_Area]: {np_Area}, type={type(np_Area)}, length={algs.shape(np_Area)}',flush=True)
-    vol = algs.sum(np_Area)
     vunits = fieldunits["Volume"]["Units"]
     mm3 = f"{vunits[1]:~P}"
     vol_mm3 = convert_data(
@@ -208,17 +198,14 @@ def part(
         vol,
         "Volume",
     )
-    print(
-        f"{name}: block fieldData[np_Area]: vol={vol_mm3} {mm3}, parts={algs.shape(np_Area)}",
-        flush=True,
-    )
+    print(f"{name}: vol={vol_mm3} {mm3}", flush=True)
 
     # # check tvol == Sum(vol)
     # if abs(1 - vol / tvol) > 1.0e-3:
     #     print(f"insert Total volume != vol(insert), tvol={tvol}, vol={vol}, error={abs(1-vol/tvol)*100} %",flush=True)
 
     statsdict = resultStats(
-        calculator1,
+        pinput,
         name,
         2,
         vol,
@@ -231,7 +218,7 @@ def part(
     # print(f"insert statsdict: {statsdict}", flush=True)
     if ComputeHisto:
         resultHistos(
-            calculator1,
+            pinput,
             name,
             vol,
             fieldunits,
@@ -242,18 +229,12 @@ def part(
             verbose=verbose,
         )
 
-    Delete(pointDatatoCellData)
-    del pointDatatoCellData
-
-    # Force a garbage collection
-    collected = gc.collect()
-    if verbose:
-        print(f"part: Garbage collector: collected {collected} objects.", flush=True)
-
     return vol, statsdict
 
 
-def cylField(input, key: str, nkey: str, AttributeType: str):
+def cylField(
+    input, key: str, nkey: str, AttributeType: str, ResultArrayType: str = "Double"
+):
     """compute r and theta component of a vector Field
 
     vr = ux
@@ -267,6 +248,7 @@ def cylField(input, key: str, nkey: str, AttributeType: str):
         key (str): field name
         nkey (str): _description_
         AttributeType (str): 'Point Data'
+        ResultArrayType (str, optional): 'Double' or 'Float'. Defaults to 'Double'.
 
     Raises:
         RuntimeError: cylField: key - unsupported AttributeType
@@ -287,12 +269,14 @@ def cylField(input, key: str, nkey: str, AttributeType: str):
 
     calculator2 = Calculator(Input=input)
     calculator2.AttributeType = AttributeType  # 'Cell Data'
+    calculator2.ResultArrayType = ResultArrayType
     calculator2.ResultArrayName = f"{key}_r"
     calculator2.Function = f'"{key}_X"'
     calculator2.UpdatePipeline()
 
     calculator3 = Calculator(Input=calculator2)
     calculator3.AttributeType = AttributeType  # 'Cell Data'
+    calculator3.ResultArrayType = ResultArrayType
     calculator3.ResultArrayName = f"{key}_z"
     calculator3.Function = f'"{key}_Y"'
 
@@ -300,6 +284,73 @@ def cylField(input, key: str, nkey: str, AttributeType: str):
     return calculator3
 
 
+@profiling.profiled("derive")
+def derive(input, dim: int, compact: bool = False, printed: bool = True):
+    """add derived fields of vectors (norm, r and z components), declared fields
+    (see expressions) and the analysis core of an axisymmetric input
+
+    PointData are converted to CellData once, native CellData are passed
+
+    Args:
+        input: paraview reader
+        dim (int): geometry dimmension
+        compact (bool, optional): store derived fields in float32. Defaults to False.
+        printed (bool, optional): Defaults to True.
+
+    Returns:
+        cellsize: paraview filter with derived fields as CellData and analysis
+            core arrays (see createAnalysisCore): BlockId, Area and AxiVolume
+    """
+
+    # for vector
+    print("Add Norm for vectors and CylFields:", flush=True)
+    calculator = input
+    ResultArrayType = "Double"
+    if compact:
+        ResultArrayType = "Float"
+
+    # derived fields keep the association of the vector
+    keys = []
+    for datatype, fields in [
+        ("PointData", input.PointData),
+        ("CellData", input.CellData),
+    ]:
+        for field in fields:
+            if (dim == 2 and field.GetNumberOfComponents() > 1) or (
+                field.GetNumberOfComponents() == dim
+            ):
+                print(
+                    f"create {field.Name}norm, {field.Name}_r and {field.Name}_z for {field.Name} {datatype} vector",
+                    flush=True,
+                )
+                keys.append(field.Name)
+    if keys:
+        calculator = createVectorFields(
+            calculator,
+            keys,
+            axis=True,
+            ResultArrayType=ResultArrayType,
+            printed=printed,
+        )
+
+    # derived fields declared in the job spec or fieldunits
+    program = expressions.configured()
+    if program:
+        calculator = createExpressionFields(
+            calculator, program, ResultArrayType=ResultArrayType, printed=printed
+        )
+
+    # PointData to CellData (single conversion, native CellData is passed)
+    pointDatatoCellData = PointDatatoCellData(
+        registrationName="PointDatatoCellData", Input=calculator
+    )
+
+    # block id, Area and AxiVolume per cell
+    print("Get mesh size", flush=True)
+    return createAnalysisCore(pointDatatoCellData, dim, axis=True, printed=printed)
+
+
+@profiling.profiled("meshinfo")
 def meshinfo(
     input,
     dim: int,
@@ -310,6 +361,7 @@ def meshinfo(
     ComputeStats: bool = True,
     ComputeHisto: bool = False,
     BinCount: int = 10,
+    compact: bool = False,
     show: bool = False,
     verbose: bool = False,
     printed: bool = True,
@@ -326,6 +378,7 @@ def meshinfo(
         ComputeStats (bool, optional): compute statistics. Defaults to True.
         ComputeHisto (bool, optional): compute histograms. Defaults to False.
         BinCount (int, optional): number of bins in histograms. Defaults to 10.
+        compact (bool, optional): store derived fields in float32. Defaults to False.
         show (bool, optional): show histograms. Defaults to False.
         verbose (bool, optional): print verbose. Defaults to False.
         printed (bool, optional): Defaults to True.
@@ -336,105 +389,25 @@ def meshinfo(
         stats (dict): dict of statistics
     """
 
-    """
-    # does not apply for CellData vector (no coordX)
-    for field in input.PointData:
-        if field.GetNumberOfComponents() == 3:
-            print(
-                f"create {field.Name}norm for {field.Name} PointData vector",
-                flush=True,
-            )
-            tmp = createVectorNorm(
-                tmp, field.Name, field.Name, "Point Data"
-            )
-    for field in input.CellData:
-        if field.GetNumberOfComponents() == 3:
-            print(f"create norm for {field.Name} CellData vector", flush=True)
-            tmp = createVectorNorm(
-                tmp, field.Name, field.Name, "Cell Data"
-            )
-    """
-    cellDatatoPointData1 = CellDatatoPointData(
-        registrationName="CellDatatoPointData", Input=input
-    )
-
-    # for vector
-    print("Add Norm for vectors and CylFields:", flush=True)
-    calculator = cellDatatoPointData1
-
-    for field in cellDatatoPointData1.PointData:
-        if (dim == 2 and field.GetNumberOfComponents() > 1) or (
-            field.GetNumberOfComponents() == dim
-        ):
-            print(
-                f"create {field.Name}norm for {field.Name} PointData vector",
-                flush=True,
-            )
-            calculator = createVectorNorm(
-                calculator, field.Name, field.Name, "Point Data"
-            )
-
-            print(
-                f"create {field.Name}_r and {field.Name}_z for {field.Name} PointData vector",
-                flush=True,
-            )
-            calculator = cylField(calculator, field.Name, field.Name, "Point Data")
-
-    # PointData to CellData
-    pointDatatoCellData = PointDatatoCellData(
-        registrationName="PointDatatoCellData", Input=calculator
-    )
-
-    print("Get mesh size", flush=True)
-    cellsize = CellSize(pointDatatoCellData)  # input
-
-    # set some params
-    cellsize.ComputeLength = 0
-    cellsize.ComputeArea = 1
-    cellsize.ComputeVolume = 0
-    cellsize.ComputeVertexCount = 0
-    cellsize.ComputeSum = 1
-    # get params list
-    if not printed:
-        for prop in cellsize.ListProperties():
-            print(f"cellsize: {prop}={cellsize.GetPropertyValue(prop)}", flush=True)
-
-    # apply
-    cellsize.UpdatePipeline()
+    # derived fields and analysis core, shared with views (see view.viewGeometry)
+    cellsize = viewGeometry(input, dim, axis=True, compact=compact)
 
+    # cells as points, CellData are passed as PointData
     cellcenters = CellCenters(registrationName="CellCenters", Input=cellsize)
-    # Properties modified on cellCenters1
     cellcenters.VertexCells = 1
     cellcenters.UpdatePipeline()
 
-    # Add Volume
-    calculator1 = Calculator(registrationName=f"AxiVolume", Input=cellcenters)
-    calculator1.AttributeType = "Point Data"
-    calculator1.ResultArrayName = f"AxiVolume"
-    calculator1.Function = f"2*{pi}*coordsX*Area"
-    calculator1.UpdatePipeline()
-
-    dataInfo = info(calculator1)
-    dataset = sm.Fetch(calculator1)
-    np_dataset = dsa.WrapDataObject(dataset)
+    dataInfo = info(cellcenters)
+    composite = dataInfo.DataInformation.IsCompositeDataSet()
 
     blockdata = {}
     # check dataset type
-    # print(f"type(dataset)={type(dataset)}", flush=True)
-    if dataset.IsA("vtkUnstructuredGrid"):
+    if not composite:
         print("UnstructuredGrid", flush=True)
-        block = dataset
-    elif dataset.IsA("vtkMultiBlockDataSet"):
+    else:
         print("MultiBlockDataSet", flush=True)
-        block = dataset.GetBlock(0)
-
-    Area_data = block.GetPointData().GetArray("AxiVolume")
-    # print(f'block cellData[Area_data]: {Area_data}, type={type(Area_data)}')
-    Area = block.GetPointData().GetArray("AxiVolume")
-    # print(f'block fieldData[Area]: {Area}, type={type(Area)}')
-    np_Area = np_dataset.PointData["AxiVolume"]
-    # print(f'block fieldData[np_Area]: {np_Area}, type={type(np_Area)}, length={algs.shape(np_Area)}')
-    tvol = algs.sum(np_Area)
+
+    tvol = axiVolume(cellsize)
     vunits = fieldunits["Volume"]["Units"]
     mm3 = f"{vunits[1]:~P}"
     tvol_mm3 = convert_data(
@@ -442,18 +415,15 @@ def meshinfo(
         tvol,
         "Volume",
     )
-    print(
-        f"block fieldData[np_Area]: total={tvol_mm3} {mm3}, parts={algs.shape(np_Area)}"
-    )
+    print(f"total={tvol_mm3} {mm3}", flush=True)
 
-    if dataset.IsA("vtkMultiBlockDataSet"):
+    if composite:
         hierarchy = dataInfo.GetHierarchy()
         rootnode = hierarchy.GetRootNode()
         rootSelector = f"/{hierarchy.GetRootNodeName()}"
         blocks = hierarchy.GetNumberOfChildren(rootnode)
         print(f"Load blocks: {blocks}")
 
-        sum_vol = 0
         for i in range(blocks):
             child = hierarchy.GetChild(rootnode, i)
             name = hierarchy.GetNodeName(child)
@@ -465,17 +435,15 @@ def meshinfo(
             cells = child_info.GetNumberOfCells()
             bounds = child_info.GetBounds()
 
-            vol = np_Area.Arrays[i][0]
+            vol = axiVolume(cellsize, child)
             vol_mm3 = convert_data(
                 {"Volume": vunits},
                 vol,
                 "Volume",
             )
-
-            # do not print volumes since they are wrong for unknown reason
             print(
-                f"block[{i}]: {name}, nodes={nodes}, cells={cells}, bounds={bounds}"
-            )  # vol={vol_mm3} {mm3},
+                f"block[{i}]: {name}, nodes={nodes}, cells={cells}, bounds={bounds}, vol={vol_mm3} {mm3}"
+            )
 
             blockdata[rootChild] = {
                 "name": name,
@@ -485,45 +453,36 @@ def meshinfo(
                 "Area": vol,
             }
 
-            sum_vol += vol
-
-            # # check tvol == Sum(vol)
-            # if abs(1 - sum_vol / tvol) > 1.0e-3:
-            #     print(f"Total volume != Sum(vol), tvol={tvol}, sum_vol={sum_vol}, error={abs(1-sum_vol/tvol)*100} %")
-
         # Compute Stats
         stats = []
 
         print("Data ranges:", flush=True)
-        resultinfo(calculator1, ignored_keys, verbose)
-        Delete(pointDatatoCellData)
-        del pointDatatoCellData
-
-        # Force a garbage collection
-        collected = gc.collect()
-        if verbose:
-            print(f"meshinfo: Garbage collector: collected {collected} objects.")
+        resultinfo(cellcenters, ignored_keys, verbose)
 
         print("Data ranges without Air:", flush=True)
         selected_blocks = [block for block in blockdata.keys() if not "Air" in block]
 
-        # TODO: need to restart from input and apply ... Calculator1
-        extractBlock1 = ExtractBlock(registrationName="insert", Input=input)
-        extractBlock1.Selectors = selected_blocks
-        extractBlock1.UpdatePipeline()
-        mergeBlocks1 = MergeBlocks(registrationName="MergeBlocks1", Input=extractBlock1)
-        mergeBlocks1.UpdatePipeline()
+        # parts are extracted from the shared cell centers
+        with arena.scope("meshinfo.insert"):
+            extractBlock1 = ExtractBlock(registrationName="insert", Input=cellcenters)
+            extractBlock1.Selectors = selected_blocks
+            extractBlock1.UpdatePipeline()
+            mergeBlocks1 = MergeBlocks(
+                registrationName="MergeBlocks1", Input=extractBlock1
+            )
+            mergeBlocks1.UpdatePipeline()
 
-        vol, statsdict = part(
-            mergeBlocks1,
-            "insert",
-            fieldunits,
-            ignored_keys,
-            ureg,
-            basedir,
-            ComputeHisto,
-            BinCount,
-        )
+            vol, statsdict = part(
+                mergeBlocks1,
+                "insert",
+                sum(blockdata[block]["Area"] for block in selected_blocks),
+                fieldunits,
+                ignored_keys,
+                ureg,
+                basedir,
+                ComputeHisto,
+                BinCount,
+            )
         stats.append(statsdict)
 
         icsv = part_integrate(
@@ -533,7 +492,9 @@ def meshinfo(
             print(f'insert: vol={vol}, ivol={icsv["AxiVol"].to_list()[0] * 2 * pi}')
         for key, value in statsdict.items():
             for array, avalue in value["Arrays"].items():
-                if "Stats" in avalue:
+                # derived fields are not integrated (see part_integrate):
+                # they keep their descriptive statistics
+                if "Stats" in avalue and f"{array}_moment1" in icsv:
                     (toolbox, physic, fieldname) = keyinfo(array)
 
                     symbol = fieldunits[fieldname]["Symbol"]
@@ -585,21 +546,22 @@ def meshinfo(
         for i, block in enumerate(blockdata.keys()):
             name = blockdata[block]["name"]
             print(f"block[{i}]: extract {block}, name={name}", flush=True)
-            # TODO: need to restart from input and apply ... Calculator1
-            extractBlock1 = ExtractBlock(registrationName=name, Input=input)
-            extractBlock1.Selectors = [block]
-            extractBlock1.UpdatePipeline()
-
-            vol, statsdict = part(
-                extractBlock1,
-                name,
-                fieldunits,
-                ignored_keys,
-                ureg,
-                basedir,
-                ComputeHisto,
-                BinCount,
-            )
+            with arena.scope("meshinfo.block"):
+                extractBlock1 = ExtractBlock(registrationName=name, Input=cellcenters)
+                extractBlock1.Selectors = [block]
+                extractBlock1.UpdatePipeline()
+
+                vol, statsdict = part(
+                    extractBlock1,
+                    name,
+                    blockdata[block]["Area"],
+                    fieldunits,
+                    ignored_keys,
+                    ureg,
+                    basedir,
+                    ComputeHisto,
+                    BinCount,
+                )
             stats.append(statsdict)
             sum_vol += vol
 
@@ -614,7 +576,9 @@ def meshinfo(
             # print(f'insert: vol={vol}, ivol={icsv["AxiVol"].to_list()[0] * 2 * pi}')
             for key, value in statsdict.items():
                 for array, avalue in value["Arrays"].items():
-                    if "Stats" in avalue:
+                    # derived fields are not integrated (see part_integrate):
+                    # they keep their descriptive statistics
+                    if "Stats" in avalue and f"{array}_moment1" in icsv:
                         (toolbox, physic, fieldname) = keyinfo(array)
 
                         symbol = fieldunits[fieldname]["Symbol"]
@@ -654,13 +618,6 @@ def meshinfo(
                         print(f"{array}: {avalue['Stats']}")
 
             stats.append(statsdict)
-            Delete(extractBlock1)
-            del extractBlock1
-
-            # Force a garbage collection
-            collected = gc.collect()
-            if verbose:
-                print(f"loopblock: Garbage collector: collected {collected} objects.")
 
             # aggregate stats data
             createStatsTable([statsdict], name, fieldunits, basedir, verbose)
@@ -677,25 +634,17 @@ def meshinfo(
         # aggregate stats data
         createStatsTable(stats, "total", fieldunits, basedir, verbose)
 
-    if dataset.IsA("vtkUnstructuredGrid"):
+    if not composite:
         stats = []
 
         print("Data ranges:", flush=True)
-        resultinfo(calculator1, ignored_keys, verbose)
-        Delete(pointDatatoCellData)
-        del pointDatatoCellData
-
-        # Force a garbage collection
-        collected = gc.collect()
-        if verbose:
-            print(f"meshinfo: Garbage collector: collected {collected} objects.")
-
-        print("Data ranges without Air:", flush=True)
-        selected_blocks = [block]
+        resultinfo(cellcenters, ignored_keys, verbose)
 
+        # a single dataset: the insert is the whole dataset, no block selection
         vol, statsdict = part(
-            calculator1,
+            cellcenters,
             "insert",
+            tvol,
             fieldunits,
             ignored_keys,
             ureg,
@@ -706,13 +655,15 @@ def meshinfo(
         stats.append(statsdict)
 
         icsv = part_integrate(
-            input, "insert", selected_blocks, basedir, merge=True, verbose=verbose
+            input, "insert", None, basedir, merge=True, verbose=verbose
         )
         if verbose:
             print(f'insert: vol={vol}, ivol={icsv["AxiVol"].to_list()[0] * 2 * pi}')
         for key, value in statsdict.items():
             for array, avalue in value["Arrays"].items():
-                if "Stats" in avalue:
+                # derived fields are not integrated (see part_integrate):
+                # they keep their descriptive statistics
+                if "Stats" in avalue and f"{array}_moment1" in icsv:
                     (toolbox, physic, fieldname) = keyinfo(array)
 
                     symbol = fieldunits[fieldname]["Symbol"]
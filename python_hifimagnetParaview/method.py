@@ -1,4 +1,3 @@
-import gc
 import os
 import re
 import pandas as pd
@@ -14,16 +13,14 @@ from paraview.simple import (
     Delete,
     ProbeLocation,
     SaveData,
+    ProgrammableFilter,
+    CellDatatoPointData,
 )
 
 from pint import Quantity
 
-# Ignore warning for pint
-import warnings
-
-with warnings.catch_warnings():
-    warnings.simplefilter("ignore")
-    Quantity([])
+from . import profiling, arena
+from .writer import saveFigure
 
 
 def convert_data(
@@ -134,6 +131,48 @@ def selectBlocks(blockdata: list, excludes: list[str]) -> list[str]:
     return selectedblocks
 
 
+def blockRange(
+    input, selectedblocks: list[str], field: str, color, component: int = 0
+) -> tuple:
+    """returns the range of field over the selected blocks
+
+    ranges are read from the data information of each block (a block range
+    index gathered with the dataset), no ExtractBlock pipeline is updated
+
+    Args:
+        input: paraview reader
+        selectedblocks (list[str]): list of markers of field
+        field (str): field name
+        color: color for PointData or CellData
+        component (int, optional): component, -1 for magnitude. Defaults to 0.
+
+    Returns:
+        tuple: (min, max), None if field is not defined on the selected blocks
+    """
+
+    hierarchy = input.GetDataInformation().DataInformation.GetHierarchy()
+    rootnode = hierarchy.GetRootNode()
+    rootSelector = f"/{hierarchy.GetRootNodeName()}"
+
+    bounds = []
+    for i in range(hierarchy.GetNumberOfChildren(rootnode)):
+        child = hierarchy.GetChild(rootnode, i)
+        if f"{rootSelector}/{hierarchy.GetNodeName(child)}" not in selectedblocks:
+            continue
+        child_info = input.GetSubsetDataInformation(0, child)
+        if color[0] == "POINTS":
+            arrays = child_info.GetPointDataInformation()
+        else:
+            arrays = child_info.GetCellDataInformation()
+        arrayInfo = arrays.GetArrayInformation(field)
+        if arrayInfo is not None:
+            bounds.append(arrayInfo.GetComponentRange(component))
+
+    if not bounds:
+        return None
+    return (min(r[0] for r in bounds), max(r[1] for r in bounds))
+
+
 def info(input):
     """returns info about input dataset
 
@@ -292,6 +331,355 @@ def load(file: str, printed: bool = True):
     return input
 
 
+def pointData(input, ignored_keys: list[str]):
+    """returns input with its CellData converted to PointData
+
+    only needed arrays are converted, input is returned as is if there are none:
+    to be done once for all consumers requiring PointData (eg. plots)
+
+    Args:
+        input: paraview reader
+        ignored_keys (list[str]): list of ignored keys
+
+    Returns:
+        paraview reader
+    """
+
+    keys = [key for key in input.CellData.keys() if key not in ignored_keys]
+    if not keys:
+        return input
+
+    print(f"pointData: convert {keys} CellData", flush=True)
+    cellDatatoPointData1 = CellDatatoPointData(
+        registrationName="CellDatatoPointData", Input=input
+    )
+    cellDatatoPointData1.ProcessAllArrays = 0
+    cellDatatoPointData1.CellDataArraytoprocess = keys
+    cellDatatoPointData1.UpdatePipeline()
+    return cellDatatoPointData1
+
+
+# script of the analysis core (see createAnalysisCore)
+#   dim: geometry dimension
+#   axis: add the volume of revolution of 2D axisymmetric cells
+_analysisCoreScript = """
+import numpy
+from vtkmodules.vtkFiltersVerdict import vtkCellSizeFilter
+from vtkmodules.vtkFiltersCore import vtkCellCenters
+from vtkmodules.util.numpy_support import vtk_to_numpy
+
+dim = {dim}
+axis = {axis}
+grandeur = "Area" if dim == 2 else "Volume"
+
+output.VTKObject.ShallowCopy(inputs[0].VTKObject)
+blocks = [output]
+if output.VTKObject.IsA("vtkCompositeDataSet"):
+    blocks = list(output)
+
+for blockid, block in enumerate(blocks):
+    dataset = block.VTKObject
+    ncells = dataset.GetNumberOfCells()
+    if ncells == 0:
+        continue
+
+    cellsize = vtkCellSizeFilter()
+    cellsize.SetInputData(dataset)
+    cellsize.SetComputeVertexCount(False)
+    cellsize.SetComputeLength(False)
+    cellsize.SetComputeArea(dim == 2)
+    cellsize.SetComputeVolume(dim == 3)
+    cellsize.SetComputeSum(False)
+    cellsize.Update()
+    measure = vtk_to_numpy(cellsize.GetOutput().GetCellData().GetArray(grandeur))
+
+    cellcenters = vtkCellCenters()
+    cellcenters.SetInputData(dataset)
+    cellcenters.SetCopyArrays(False)
+    cellcenters.Update()
+    centers = vtk_to_numpy(cellcenters.GetOutput().GetPoints().GetData())
+
+    block.CellData.append(numpy.full(ncells, blockid, dtype=numpy.int16), "BlockId")
+    block.CellData.append(measure, grandeur)
+    block.CellData.append(centers, "CellCenters")
+    block.FieldData.append(numpy.array([measure.sum()]), grandeur)
+    if axis:
+        axivolume = 2 * numpy.pi * centers[:, 0] * measure
+        block.CellData.append(axivolume, "AxiVolume")
+        block.FieldData.append(numpy.array([axivolume.sum()]), "AxiVolume")
+"""
+
+
+def createAnalysisCore(input, dim: int, axis: bool = False, printed: bool = True):
+    """add per cell geometric arrays shared by stats, histograms and plots
+
+    built in one pass over the blocks, in native units:
+        BlockId (int16): index of the block of the cell
+        Area or Volume: cell measure (CellData) and its sum per block (FieldData)
+        CellCenters: cell centers
+        AxiVolume: 2*pi*r*Area, volume of revolution of the cell (axis only)
+
+    Args:
+        input: paraview reader
+        dim (int): geometry dimmension
+        axis (bool, optional): 2D axisymmetric input. Defaults to False.
+        printed (bool, optional): Defaults to True.
+
+    Returns:
+        paraview reader
+    """
+
+    analysiscore = ProgrammableFilter(registrationName="AnalysisCore", Input=input)
+    analysiscore.Script = _analysisCoreScript.format(dim=dim, axis=axis)
+    if not printed:
+        for prop in analysiscore.ListProperties():
+            print(
+                f"AnalysisCore: {prop}={analysiscore.GetPropertyValue(prop)}",
+                flush=True,
+            )
+
+    analysiscore.UpdatePipeline()
+    return analysiscore
+
+
+# script of the derived fields (see createExpressionFields)
+#   source: kernel source (see expressions.build)
+#   inputs: fields used by the kernel, outputs: derived fields
+#   chunk: number of tuples per kernel call
+#   dtype: numpy type of derived fields
+_expressionFieldsScript = """
+import numpy
+from vtkmodules.vtkFiltersCore import vtkCellCenters
+from vtkmodules.numpy_interface import dataset_adapter as dsa
+
+inputs_ = {inputs!r}
+outputs_ = {outputs!r}
+chunk = {chunk}
+dtype = numpy.{dtype}
+coords = ["coordsX", "coordsY", "coordsZ"]
+
+namespace = {{
+    "sqrt": numpy.sqrt,
+    "abs": numpy.abs,
+    "exp": numpy.exp,
+    "log": numpy.log,
+    "log10": numpy.log10,
+    "sin": numpy.sin,
+    "cos": numpy.cos,
+    "tan": numpy.tan,
+    "arctan2": numpy.arctan2,
+    "minimum": numpy.minimum,
+    "maximum": numpy.maximum,
+    "norm": lambda u: numpy.linalg.norm(u, axis=-1),
+    "dot": lambda u, v: numpy.einsum("...i,...i->...", u, v),
+}}
+exec({source!r}, namespace)
+kernel = namespace["kernel"]
+
+output.VTKObject.ShallowCopy(inputs[0].VTKObject)
+blocks = [output]
+if output.VTKObject.IsA("vtkCompositeDataSet"):
+    blocks = list(output)
+
+for block in blocks:
+    if block.GetNumberOfPoints() == 0:
+        continue
+
+    # all fields used must have the same association
+    fields = [key for key in inputs_ if key not in coords]
+    if all(key in block.PointData.keys() for key in fields):
+        (data, size) = (block.PointData, block.GetNumberOfPoints())
+        xyz = block.Points
+    elif all(key in block.CellData.keys() for key in fields):
+        (data, size) = (block.CellData, block.GetNumberOfCells())
+        xyz = None
+        if any(key in coords for key in inputs_):
+            centers = vtkCellCenters()
+            centers.SetInputData(block.VTKObject)
+            centers.Update()
+            xyz = dsa.WrapDataObject(centers.GetOutput()).Points
+    else:
+        print(f"ExpressionFields: {{outputs_}} skipped (missing fields)", flush=True)
+        continue
+
+    arrays = []
+    for key in inputs_:
+        if key in coords:
+            arrays.append(numpy.asarray(xyz)[:, coords.index(key)])
+        else:
+            arrays.append(numpy.asarray(data[key]))
+
+    # one kernel call per chunk, derived fields are filled in place
+    results = None
+    for start in range(0, size, chunk):
+        stop = min(start + chunk, size)
+        values = kernel(*[array[start:stop] for array in arrays])
+        if results is None:
+            results = [
+                numpy.empty((size,) + numpy.shape(value)[1:], dtype=dtype)
+                for value in values
+            ]
+        for result, value in zip(results, values):
+            result[start:stop] = value
+
+    for name, result in zip(outputs_, results):
+        data.append(result, name)
+"""
+
+
+def createExpressionFields(
+    input,
+    program: dict,
+    ResultArrayType: str = "Double",
+    chunk: int = 65536,
+    printed: bool = True,
+):
+    """add the derived fields declared by users (see expressions)
+
+    the fields of a program are computed together by a single kernel,
+    chunk by chunk, with the association of the fields they use
+
+    Args:
+        input: paraview reader
+        program (dict): compiled declarations (see expressions.build)
+        ResultArrayType (str, optional): 'Double' or 'Float'. Defaults to 'Double'.
+        chunk (int, optional): number of tuples per kernel call. Defaults to 65536.
+        printed (bool, optional): Defaults to True.
+
+    Returns:
+        paraview reader
+    """
+
+    dtype = "float64"
+    if ResultArrayType == "Float":
+        dtype = "float32"
+
+    expressionfields = ProgrammableFilter(
+        registrationName="ExpressionFields", Input=input
+    )
+    expressionfields.Script = _expressionFieldsScript.format(
+        source=program["source"],
+        inputs=program["inputs"],
+        outputs=program["outputs"],
+        chunk=chunk,
+        dtype=dtype,
+    )
+    if not printed:
+        for prop in expressionfields.ListProperties():
+            print(
+                f"ExpressionFields: {prop}={expressionfields.GetPropertyValue(prop)}",
+                flush=True,
+            )
+
+    expressionfields.UpdatePipeline()
+    return expressionfields
+
+
+# script of the lumped nodal measure (see createNodalMeasure)
+#   grandeur: name of the cell measure ("Area" or "Volume"), the nodal measure
+#       is named Nodal{grandeur}
+_nodalMeasureScript = """
+import numpy
+from vtkmodules.vtkCommonCore import vtkIdList
+from vtkmodules.util.numpy_support import vtk_to_numpy
+
+grandeur = {grandeur!r}
+
+output.VTKObject.ShallowCopy(inputs[0].VTKObject)
+blocks = [output]
+if output.VTKObject.IsA("vtkCompositeDataSet"):
+    blocks = list(output)
+
+for block in blocks:
+    if block.GetNumberOfCells() == 0:
+        continue
+
+    # each cell gives measure/npts to each of its points
+    measure = numpy.asarray(block.CellData[grandeur])
+    dataset = block.VTKObject
+    if dataset.IsA("vtkUnstructuredGrid"):
+        cells = dataset.GetCells()
+        npts = numpy.diff(vtk_to_numpy(cells.GetOffsetsArray()))
+        connectivity = vtk_to_numpy(cells.GetConnectivityArray())
+    else:
+        ids = vtkIdList()
+        npts = numpy.zeros(dataset.GetNumberOfCells(), dtype=numpy.int64)
+        connectivity = []
+        for i in range(dataset.GetNumberOfCells()):
+            dataset.GetCellPoints(i, ids)
+            npts[i] = ids.GetNumberOfIds()
+            connectivity += [ids.GetId(j) for j in range(ids.GetNumberOfIds())]
+    weights = numpy.repeat(measure / npts, npts)
+    nodal = numpy.bincount(
+        connectivity, weights=weights, minlength=dataset.GetNumberOfPoints()
+    )
+    block.PointData.append(nodal, "Nodal" + grandeur)
+"""
+
+
+def createNodalMeasure(input, grandeur: str, printed: bool = True):
+    """add lumped nodal measure: NodalArea or NodalVolume PointData
+
+    each point gets the sum over its cells of cell measure / number of cell points,
+    so that PointData can be weighted like CellData (eg. in histograms)
+
+    Args:
+        input: paraview reader with Area or Volume CellData (see createAnalysisCore)
+        grandeur (str): "Area" or "Volume"
+        printed (bool, optional): Defaults to True.
+
+    Returns:
+        paraview reader
+    """
+
+    nodalmeasure = ProgrammableFilter(registrationName="NodalMeasure", Input=input)
+    nodalmeasure.Script = _nodalMeasureScript.format(grandeur=grandeur)
+    if not printed:
+        for prop in nodalmeasure.ListProperties():
+            print(
+                f"NodalMeasure: {prop}={nodalmeasure.GetPropertyValue(prop)}",
+                flush=True,
+            )
+
+    nodalmeasure.UpdatePipeline()
+    return nodalmeasure
+
+
+def gatherSurface(source) -> tuple:
+    """returns the triangulated surface built by source, gathered on the client
+
+    source outputs a vtkPolyData of triangles on each rank, reduced to be small
+    (eg. only the fields shown, decimated); the ranks are appended on the
+    first one and delivered to the client, where the images or scenes are saved
+
+    Args:
+        source: paraview source with a vtkPolyData output
+
+    Returns:
+        tuple: (points, triangles, PointData, CellData), (n, 3) vertex
+        coordinates, (m, 3) vertex indices and dicts of arrays
+    """
+
+    import numpy
+    from paraview import servermanager
+    from vtkmodules.util.numpy_support import vtk_to_numpy
+
+    mesh = servermanager.Fetch(source)
+    if mesh.GetNumberOfPoints() == 0:
+        return (numpy.empty((0, 3)), numpy.empty((0, 3), dtype=numpy.int64), {}, {})
+
+    points = vtk_to_numpy(mesh.GetPoints().GetData())
+    triangles = vtk_to_numpy(mesh.GetPolys().GetConnectivityArray()).reshape(-1, 3)
+    (pointdata, celldata) = (
+        {
+            data.GetArrayName(i): vtk_to_numpy(data.GetArray(i))
+            for i in range(data.GetNumberOfArrays())
+        }
+        for data in (mesh.GetPointData(), mesh.GetCellData())
+    )
+    return (points, triangles, pointdata, celldata)
+
+
 def momentN(input, key: str, nkey: str, order: int, AttributeType: str):
     """compute moment of order N
 
@@ -321,6 +709,7 @@ def momentN(input, key: str, nkey: str, order: int, AttributeType: str):
     return calculator1
 
 
+@arena.owned("integrateKeys")
 def integrateKeys(
     input, name: str, basedir: str, printed: bool = True, verbose: bool = False
 ) -> str:
@@ -362,21 +751,10 @@ def integrateKeys(
         RealNumberNotation="Scientific",
     )
 
-    Delete(spreadSheetView)
-    del spreadSheetView
-    Delete(descriptiveDisplay)
-
-    # Force a garbage collection
-    collected = gc.collect()
-    if verbose:
-        print(
-            f"integrateKeys: Garbage collector: collected {collected} objects.",
-            flush=True,
-        )
-
     return filename
 
 
+@profiling.profiled("matplotlib")
 def showplot(
     figaxs: dict, suffix: str, basedir: str, title: str = "", show: bool = True
 ):
@@ -403,7 +781,7 @@ def showplot(
         else:
             print(f"save {f}{suffix}.png", flush=True)
             axs[0].tight_layout()
-            axs[0].savefig(f"{basedir}/plots/{f}{suffix}.png", dpi=300)
+            saveFigure(axs[0], f"{basedir}/plots/{f}{suffix}.png", dpi=300)
 
 
 def plot_greySpace(df: pd.DataFrame, cx: str, cy: str, ax, legend: list[str]):
@@ -0,0 +1,209 @@
+import numpy as np
+
+# weighted statistics: fields are weighted by the cell measure (CellData) or the
+# lumped nodal measure (PointData), see stats.getresultStats
+#
+# weights are normalized to the number of values, so that the moments M2, M3, M4
+# keep the units and meaning of DescriptiveStatistics (centered sums) and equal
+# weights give the unweighted statistics; the total weight is kept to merge
+# statistics of disjoint parts (see merge)
+columns = [
+    "Cardinality",
+    "Weight",
+    "Minimum",
+    "Maximum",
+    "Mean",
+    "M2",
+    "M3",
+    "M4",
+    "Standard Deviation",
+]
+
+# components of DescriptiveStatistics variables (vectors and symmetric tensors)
+_components = {
+    "X": 0,
+    "Y": 1,
+    "Z": 2,
+    "XX": 0,
+    "YY": 1,
+    "ZZ": 2,
+    "XY": 3,
+    "YZ": 4,
+    "XZ": 5,
+}
+
+
+def _deviation(M2: float, n: float) -> float:
+    """returns the standard deviation, same estimator as DescriptiveStatistics"""
+
+    return float(np.sqrt(M2 / (n - 1))) if n > 1 else 0.0
+
+
+def weighted(values, weights) -> dict:
+    """returns the weighted statistics of values
+
+    Args:
+        values: (n,) values
+        weights: (n,) weights, eg. cell measures
+
+    Returns:
+        dict: Cardinality, Weight (sum of weights), Minimum, Maximum, Mean,
+        M2, M3, M4 (normalized centered sums) and Standard Deviation
+    """
+
+    values = np.asarray(values, dtype=np.float64).ravel()
+    weights = np.asarray(weights, dtype=np.float64).ravel()
+    valid = np.isfinite(values) & np.isfinite(weights)
+    (values, weights) = (values[valid], weights[valid])
+
+    n = values.size
+    total = float(weights.sum())
+    if n == 0 or total <= 0:
+        return {
+            "Cardinality": n,
+            "Weight": total,
+            "Minimum": np.nan,
+            "Maximum": np.nan,
+            "Mean": np.nan,
+            "M2": 0.0,
+            "M3": 0.0,
+            "M4": 0.0,
+            "Standard Deviation": 0.0,
+        }
+
+    normalized = weights * n / total
+    mean = float((normalized * values).sum() / n)
+    delta = values - mean
+    M2 = float((normalized * delta**2).sum())
+    return {
+        "Cardinality": n,
+        "Weight": total,
+        "Minimum": float(values.min()),
+        "Maximum": float(values.max()),
+        "Mean": mean,
+        "M2": M2,
+        "M3": float((normalized * delta**3).sum()),
+        "M4": float((normalized * delta**4).sum()),
+        "Standard Deviation": _deviation(M2, n),
+    }
+
+
+def merge(a: dict, b: dict) -> dict:
+    """merge weighted statistics of disjoint parts (see weighted)
+
+    the centered sums are combined with the pairwise update formulas from
+    Pebay (2008), the total weights playing the part of the cardinalities;
+    statistics without Weight are unweighted (Weight = Cardinality)
+
+    Args:
+        a (dict): statistics of a part
+        b (dict): statistics of another part
+
+    Returns:
+        dict: merged statistics
+    """
+
+    (nA, nB) = (float(a["Cardinality"]), float(b["Cardinality"]))
+    if nA == 0:
+        return dict(b)
+    if nB == 0:
+        return dict(a)
+    (wA, wB) = (float(a.get("Weight", nA)), float(b.get("Weight", nB)))
+
+    # centered sums in weight units
+    (M2A, M3A, M4A) = (float(a[f"M{k}"]) * wA / nA for k in (2, 3, 4))
+    (M2B, M3B, M4B) = (float(b[f"M{k}"]) * wB / nB for k in (2, 3, 4))
+    (meanA, meanB) = (float(a["Mean"]), float(b["Mean"]))
+
+    w = wA + wB
+    delta = meanB - meanA
+    M2 = M2A + M2B + delta**2 * wA * wB / w
+    M3 = (
+        M3A
+        + M3B
+        + delta**3 * wA * wB * (wA - wB) / w**2
+        + 3 * delta * (wA * M2B - wB * M2A) / w
+    )
+    M4 = (
+        M4A
+        + M4B
+        + delta**4 * wA * wB * (wA**2 - wA * wB + wB**2) / w**3
+        + 6 * delta**2 * (wA**2 * M2B + wB**2 * M2A) / w**2
+        + 4 * delta * (wA * M3B - wB * M3A) / w
+    )
+
+    n = nA + nB
+    return {
+        "Cardinality": n,
+        "Weight": w,
+        "Minimum": min(float(a["Minimum"]), float(b["Minimum"])),
+        "Maximum": max(float(a["Maximum"]), float(b["Maximum"])),
+        "Mean": meanA + delta * wB / w,
+        "M2": M2 * n / w,
+        "M3": M3 * n / w,
+        "M4": M4 * n / w,
+        "Standard Deviation": _deviation(M2 * n / w, n),
+    }
+
+
+def component(values, key: str, variable: str):
+    """returns the values of a DescriptiveStatistics variable of array key
+
+    Args:
+        values: (n,) or (n, k) values of key
+        key (str): array name
+        variable (str): key, key_Magnitude, key_0, key_X, key_XY...
+
+    Returns:
+        np.ndarray: (n,) values
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        return values
+    suffix = variable[len(key) :].lstrip("_ ") if variable.startswith(key) else ""
+    if suffix in ["", "Magnitude"]:
+        return np.linalg.norm(values, axis=1)
+    if suffix.isdigit() and int(suffix) < values.shape[1]:
+        return values[:, int(suffix)]
+    if _components.get(suffix, values.shape[1]) < values.shape[1]:
+        return values[:, _components[suffix]]
+    raise RuntimeError(f"moments: unknown component {variable} of {key}")
+
+
+def variables(key: str, ncomponents: int) -> list[str]:
+    """returns the DescriptiveStatistics variables of array key
+
+    Args:
+        key (str): array name
+        ncomponents (int): number of components of key
+
+    Returns:
+        list[str]: key for scalars, key_0, key_1... and key_Magnitude otherwise
+    """
+
+    if ncomponents == 1:
+        return [key]
+    return [f"{key}_{i}" for i in range(ncomponents)] + [f"{key}_Magnitude"]
+
+
+def reduce(parts) -> list[dict]:
+    """merge the statistics of the variables computed on disjoint parts
+
+    Args:
+        parts: (nparts, nvariables, len(columns)) statistics (see weighted),
+            eg. gathered from the mpi ranks
+
+    Returns:
+        list[dict]: merged statistics of each variable
+    """
+
+    parts = np.asarray(parts, dtype=np.float64)
+    stats = []
+    for variable in range(parts.shape[1]):
+        stat = dict(zip(columns, parts[0, variable]))
+        for part in parts[1:]:
+            stat = merge(stat, dict(zip(columns, part[variable])))
+        stat["Standard Deviation"] = _deviation(stat["M2"], stat["Cardinality"])
+        stats.append(stat)
+    return stats
@@ -0,0 +1,72 @@
+import numpy as np
+
+# multi slice: a family of slices is cut in one pass over the cells
+# (see view.makeslices), each surface of the family is the zero level of a
+# signed distance evaluated on the points
+#   OxOy: planes z = value
+#   OrOz: planes through Oz at theta = value in degrees (see view.makeplaneOrOzslice)
+#   Cylinder: cylinders of axis Oz, r = value
+_kinds = ["OxOy", "OrOz", "Cylinder"]
+
+
+def distances(points, kind: str, values: list[float]):
+    """returns the signed distances of points to the surfaces of a family
+
+    Args:
+        points: (n, 3) point coordinates
+        kind (str): "OxOy", "OrOz" or "Cylinder"
+        values (list[float]): z, theta in degrees or r of the surfaces
+
+    Returns:
+        np.ndarray: (n, len(values)) distances
+    """
+
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    values = np.asarray(values, dtype=np.float64)
+    match kind:
+        case "OxOy":
+            return points[:, 2:3] - values
+        case "OrOz":
+            # normal at theta + 180 deg, as makeplaneOrOzslice(theta + 90)
+            radian = np.radians(values + 180.0)
+            return np.outer(points[:, 0], np.cos(radian)) + np.outer(
+                points[:, 1], np.sin(radian)
+            )
+        case "Cylinder":
+            return np.hypot(points[:, 0], points[:, 1])[:, None] - values
+        case _:
+            raise RuntimeError(f"multislice: unsupported kind {kind} (use {_kinds})")
+
+
+def crossed(offsets, connectivity, distances, chunk: int = 1 << 20):
+    """returns the cells crossed by each surface, cells are walked once
+
+    a cell is crossed when its points are on both sides of the surface
+    (or on it), the cells are given as vtkCellArray offsets and connectivity
+
+    Args:
+        offsets: (m + 1,) start of each cell in connectivity
+        connectivity: point ids of cells
+        distances: (n, k) signed distances of points (see distances)
+        chunk (int, optional): cells processed together. Defaults to 1 << 20.
+
+    Returns:
+        np.ndarray: (m, k) boolean
+    """
+
+    offsets = np.asarray(offsets, dtype=np.int64)
+    connectivity = np.asarray(connectivity, dtype=np.int64)
+    distances = np.asarray(distances)
+    result = np.zeros((len(offsets) - 1, distances.shape[1]), dtype=bool)
+
+    # empty cells take no room in connectivity: each segment of a non empty
+    # cell ends where the next non empty cell starts
+    cells = np.nonzero(offsets[1:] > offsets[:-1])[0]
+    for first in range(0, cells.size, chunk):
+        part = cells[first : first + chunk]
+        (begin, end) = (offsets[part[0]], offsets[part[-1] + 1])
+        values = distances[connectivity[begin:end]]
+        lower = np.minimum.reduceat(values, offsets[part] - begin, axis=0)
+        upper = np.maximum.reduceat(values, offsets[part] - begin, axis=0)
+        result[part] = (lower <= 0) & (upper >= 0)
+    return result
@@ -0,0 +1,212 @@
+import os
+import sys
+import json
+import time
+import functools
+import contextlib
+
+# profiling state
+#   enabled: record stages (see start)
+#   stack: names of the running stages
+#   records: finished stages, in completion order
+#   origin: perf_counter at start
+_profile = {
+    "enabled": False,
+    "stack": [],
+    "records": [],
+    "origin": None,
+}
+
+
+def start():
+    """enable stage recording, stages are not timed unless started"""
+
+    _profile["enabled"] = True
+    _profile["stack"] = []
+    _profile["records"] = []
+    _profile["origin"] = time.perf_counter()
+
+
+def enabled() -> bool:
+    """returns True if stages are recorded"""
+
+    return _profile["enabled"]
+
+
+def rss() -> float:
+    """returns the resident set size of the process in MB
+
+    Returns:
+        float: current RSS (peak RSS where /proc is not available)
+    """
+
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024**2
+    except (OSError, ValueError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":
+            return peak / 1024**2
+        return peak / 1024
+
+
+def vtkinfo() -> tuple:
+    """returns the number of paraview sources and their data memory
+
+    paraview is not imported here: (0, 0) is returned until it is loaded
+
+    Returns:
+        tuple: (number of source proxies, memory size of their data in MB)
+    """
+
+    if "paraview.simple" not in sys.modules:
+        return (0, 0)
+
+    from paraview.simple import GetSources
+
+    sources = GetSources()
+    memory = 0
+    for proxy in sources.values():
+        # GetMemorySize is in kB
+        memory += proxy.GetDataInformation().DataInformation.GetMemorySize()
+    return (len(sources), memory / 1024)
+
+
+@contextlib.contextmanager
+def stage(name: str):
+    """time a stage, stages may be nested
+
+    records wall and cpu time, RSS delta, paraview data memory delta
+    and number of paraview sources created
+
+    Args:
+        name (str): stage name
+    """
+
+    if not _profile["enabled"]:
+        yield
+        return
+
+    _profile["stack"].append(name)
+    path = ";".join(_profile["stack"])
+    (proxies0, memory0) = vtkinfo()
+    rss0 = rss()
+    cpu0 = time.process_time()
+    wall0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        wall1 = time.perf_counter()
+        cpu1 = time.process_time()
+        rss1 = rss()
+        (proxies1, memory1) = vtkinfo()
+        _profile["stack"].pop()
+        _profile["records"].append(
+            {
+                "name": name,
+                "path": path,
+                "depth": path.count(";"),
+                "start": wall0 - _profile["origin"],
+                "wall": wall1 - wall0,
+                "cpu": cpu1 - cpu0,
+                "rss": rss1,
+                "rss_delta": rss1 - rss0,
+                "vtk_memory": memory1,
+                "vtk_memory_delta": memory1 - memory0,
+                "proxies_created": proxies1 - proxies0,
+            }
+        )
+
+
+def profiled(name: str):
+    """decorator timing each call of a function as a stage
+
+    Args:
+        name (str): stage name
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _profile["enabled"]:
+                return func(*args, **kwargs)
+            with stage(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def summary() -> list[dict]:
+    """aggregate records by stage path
+
+    Returns:
+        list[dict]: calls, wall and cpu time per stage path, slowest first
+    """
+
+    stages = {}
+    for record in _profile["records"]:
+        path = record["path"]
+        if path not in stages:
+            stages[path] = {"path": path, "calls": 0, "wall": 0, "cpu": 0}
+        stages[path]["calls"] += 1
+        stages[path]["wall"] += record["wall"]
+        stages[path]["cpu"] += record["cpu"]
+    return sorted(stages.values(), key=lambda item: item["wall"], reverse=True)
+
+
+def report(filename: str, trace: str = None):
+    """write the JSON report and optionally a trace of the recorded stages
+
+    the trace uses the Chrome trace event format (chrome://tracing, Perfetto
+    or speedscope display it as a flamegraph)
+
+    Args:
+        filename (str): json report file name
+        trace (str, optional): trace file name. Defaults to None.
+    """
+
+    dirname = os.path.dirname(filename)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    with open(filename, "w") as f:
+        json.dump(
+            {"summary": summary(), "stages": _profile["records"]},
+            f,
+            indent=4,
+        )
+    print(f"profile: report saved to {filename}", flush=True)
+
+    if trace is None:
+        return
+
+    events = []
+    for record in _profile["records"]:
+        events.append(
+            {
+                "name": record["name"],
+                "cat": record["path"],
+                "ph": "X",
+                "ts": record["start"] * 1.0e6,
+                "dur": record["wall"] * 1.0e6,
+                "pid": os.getpid(),
+                "tid": 0,
+                "args": {
+                    key: record[key]
+                    for key in [
+                        "cpu",
+                        "rss",
+                        "rss_delta",
+                        "vtk_memory_delta",
+                        "proxies_created",
+                    ]
+                },
+            }
+        )
+    with open(trace, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    print(f"profile: trace saved to {trace}", flush=True)
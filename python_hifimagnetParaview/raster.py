@@ -0,0 +1,261 @@
+import numpy as np
+
+# direct rasterizer for 2D and Axi views: triangles seen head-on are scan
+# converted into an image buffer without a render view (see display2D.rasterField)
+#
+# the image is composed like the paraview views: "Rainbow Uniform" color map,
+# comment on top and scalar bar with the data range (matplotlib)
+
+# "Rainbow Uniform" color map: (x, r, g, b) anchors of the paraview preset
+_rainbowUniform = np.array(
+    [
+        [0.00, 0.020, 0.381, 0.998],
+        [0.10, 0.020, 0.532, 0.874],
+        [0.20, 0.020, 0.668, 0.754],
+        [0.30, 0.044, 0.755, 0.605],
+        [0.40, 0.167, 0.787, 0.381],
+        [0.50, 0.373, 0.803, 0.173],
+        [0.60, 0.622, 0.821, 0.063],
+        [0.70, 0.857, 0.790, 0.047],
+        [0.80, 0.968, 0.624, 0.053],
+        [0.90, 0.974, 0.399, 0.057],
+        [1.00, 0.900, 0.062, 0.078],
+    ]
+)
+
+
+def colormap(values, vmin: float, vmax: float):
+    """map values to "Rainbow Uniform" colors
+
+    Args:
+        values: array of values
+        vmin (float): value of the first color
+        vmax (float): value of the last color
+
+    Returns:
+        np.ndarray: float rgb colors in [0, 1], shape values.shape + (3,)
+    """
+
+    span = vmax - vmin if vmax > vmin else 1.0
+    x = np.clip((np.asarray(values, dtype=np.float64) - vmin) / span, 0.0, 1.0)
+    anchors = _rainbowUniform[:, 0]
+    return np.stack(
+        [np.interp(x, anchors, _rainbowUniform[:, i]) for i in (1, 2, 3)], axis=-1
+    )
+
+
+def rasterize(
+    points,
+    triangles,
+    values,
+    pointdata: bool,
+    shape: tuple,
+    chunk: int = 1 << 22,
+):
+    """scan convert triangles into an image of values
+
+    the geometry is fitted into the image, aspect ratio preserved; a pixel
+    gets the value of the triangle covering its center, interpolated from the
+    triangle vertices for PointData
+
+    Args:
+        points: (n, 2) vertex coordinates
+        triangles: (m, 3) vertex indices of triangles
+        values: (n,) PointData or (m,) CellData values
+        pointdata (bool): values are given per vertex
+        shape (tuple): (height, width) of the image in pixels
+        chunk (int, optional): pixels tested together. Defaults to 1 << 22.
+
+    Returns:
+        np.ndarray: (height, width) image of values, NaN outside the geometry
+    """
+
+    (height, width) = shape
+    image = np.full(shape, np.nan)
+    points = np.asarray(points, dtype=np.float64)
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    values = np.asarray(values, dtype=np.float64)
+    if triangles.size == 0:
+        return image
+
+    # pixel coordinates, y axis downwards
+    (lower, upper) = (points.min(axis=0), points.max(axis=0))
+    extent = np.where(upper > lower, upper - lower, 1.0)
+    scale = min(width / extent[0], height / extent[1])
+    margin = (np.array([width, height]) - extent * scale) / 2
+    pixels = (points - lower) * scale + margin
+    pixels[:, 1] = height - pixels[:, 1]
+
+    (a, b, c) = (pixels[triangles[:, i]] for i in range(3))
+    area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (
+        c[:, 0] - a[:, 0]
+    )
+    corners = np.stack([a, b, c])
+    xmin = np.clip(np.ceil(corners[..., 0].min(axis=0) - 0.5), 0, width - 1)
+    xmax = np.clip(np.floor(corners[..., 0].max(axis=0) - 0.5), 0, width - 1)
+    ymin = np.clip(np.ceil(corners[..., 1].min(axis=0) - 0.5), 0, height - 1)
+    ymax = np.clip(np.floor(corners[..., 1].max(axis=0) - 0.5), 0, height - 1)
+    (xmin, xmax, ymin, ymax) = (v.astype(np.int64) for v in (xmin, xmax, ymin, ymax))
+    counts = np.where(
+        (area != 0) & (xmax >= xmin) & (ymax >= ymin),
+        (xmax - xmin + 1) * (ymax - ymin + 1),
+        0,
+    )
+
+    # triangles are processed by chunks of candidate pixels (bounding boxes)
+    bounds = np.concatenate([[0], np.cumsum(counts)])
+    first = 0
+    while first < len(triangles):
+        last = np.searchsorted(bounds, bounds[first] + chunk, side="right") - 1
+        last = max(first + 1, last)
+        ids = np.repeat(np.arange(first, last), counts[first:last])
+        if ids.size:
+            offset = np.arange(ids.size) - (bounds[ids] - bounds[first])
+            boxwidth = xmax[ids] - xmin[ids] + 1
+            px = xmin[ids] + offset % boxwidth
+            py = ymin[ids] + offset // boxwidth
+            (cx, cy) = (px + 0.5, py + 0.5)
+
+            # barycentric coordinates of pixel centers
+            w = []
+            for p, q in [(b, c), (c, a), (a, b)]:
+                w.append(
+                    (
+                        (q[ids, 0] - p[ids, 0]) * (cy - p[ids, 1])
+                        - (q[ids, 1] - p[ids, 1]) * (cx - p[ids, 0])
+                    )
+                    / area[ids]
+                )
+            w = np.stack(w)
+            inside = (w >= -1e-9).all(axis=0)
+            (ids, px, py, w) = (ids[inside], px[inside], py[inside], w[:, inside])
+            if pointdata:
+                vertices = values[triangles[ids]]
+                image[py, px] = (w.T * vertices).sum(axis=1)
+            else:
+                image[py, px] = values[ids]
+        first = last
+    return image
+
+
+def compose(
+    image,
+    vmin: float,
+    vmax: float,
+    filename: str,
+    title: str,
+    comment: str = "",
+    background: bool = False,
+):
+    """save an image of values with its scalar bar and comment
+
+    Args:
+        image: (height, width) image of values (see rasterize)
+        vmin (float): range of the color map
+        vmax (float): range of the color map
+        filename (str): png file name
+        title (str): scalar bar title
+        comment (str, optional): comment on top of the view. Defaults to "".
+        background (bool, optional): transparent background (& text black). Defaults to False.
+    """
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import ListedColormap, Normalize
+    from matplotlib.ticker import FormatStrFormatter
+
+    from .writer import saveFigure
+
+    (height, width) = image.shape
+    dpi = 100
+    rgba = np.zeros(image.shape + (4,))
+    valid = ~np.isnan(image)
+    rgba[valid, :3] = colormap(image[valid], vmin, vmax)
+    rgba[valid, 3] = 1.0
+
+    color = "black" if background else "white"
+    fig = plt.figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    if not background:
+        fig.patch.set_facecolor((0.32, 0.34, 0.43))
+    else:
+        fig.patch.set_alpha(0.0)
+    ax = fig.add_axes([0.0, 0.0, 0.85, 0.92])
+    ax.imshow(rgba, interpolation="nearest", aspect="equal")
+    ax.set_axis_off()
+    if comment:
+        fig.text(
+            0.5,
+            0.97,
+            comment,
+            ha="center",
+            va="top",
+            fontsize=24,
+            fontweight="bold",
+            fontstyle="italic",
+            color=color,
+        )
+
+    cax = fig.add_axes([0.88, 0.05, 0.03, 0.8])
+    samples = colormap(np.linspace(vmin, vmax, 256), vmin, vmax)
+    bar = fig.colorbar(
+        plt.cm.ScalarMappable(Normalize(vmin, vmax), ListedColormap(samples)),
+        cax=cax,
+        format=FormatStrFormatter("%-#6.3g"),
+    )
+    bar.ax.tick_params(labelsize=20, colors=color)
+    cax.set_title(
+        title, fontsize=24, fontweight="bold", fontstyle="italic", color=color
+    )
+    cax.text(
+        0.5,
+        -0.03,
+        f"{np.nanmin(image):-#6.3e}\n{np.nanmax(image):-#6.3e}" if valid.any() else "",
+        transform=cax.transAxes,
+        ha="center",
+        va="top",
+        fontsize=14,
+        color=color,
+    )
+
+    saveFigure(fig, filename, dpi=dpi)
+    plt.close(fig)
+
+
+def snapshot(
+    points,
+    triangles,
+    values,
+    pointdata: bool,
+    filename: str,
+    title: str,
+    comment: str = "",
+    range: tuple = None,
+    resolution: tuple = (1600, 1200),
+    background: bool = False,
+):
+    """rasterize a field and save the view
+
+    Args:
+        points: (n, 2) vertex coordinates
+        triangles: (m, 3) vertex indices of triangles
+        values: PointData or CellData values, vectors are colored by magnitude
+        pointdata (bool): values are given per vertex
+        filename (str): png file name
+        title (str): scalar bar title
+        comment (str, optional): comment on top of the view. Defaults to "".
+        range (tuple, optional): range of the color map, data range if None. Defaults to None.
+        resolution (tuple, optional): (width, height) in pixels. Defaults to (1600, 1200).
+        background (bool, optional): transparent background (& text black). Defaults to False.
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim > 1:
+        values = np.linalg.norm(values, axis=1)
+    if range is None:
+        range = (values.min(), values.max()) if values.size else (0.0, 1.0)
+
+    (width, height) = resolution
+    image = rasterize(points, triangles, values, pointdata, (height, width))
+    compose(image, range[0], range[1], filename, title, comment, background)
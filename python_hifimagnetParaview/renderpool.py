@@ -0,0 +1,211 @@
+import os
+import argparse
+import multiprocessing
+
+from . import scheduler, writer, viewcache
+
+# render pool: view groups are rendered by worker processes, each owning an
+# offscreen render context and the geometry, loaded once per worker
+#   pool: multiprocessing pool, started on first use (see render)
+#   jobs: number of workers
+#   args: parsed command line options, to load the dataset in workers
+#   fields: derived field declarations of the job spec (see expressions)
+_pool = {
+    "pool": None,
+    "jobs": 1,
+    "args": None,
+    "fields": [],
+}
+
+# worker state
+#   context: dataset and field units (see cli.prepare)
+_worker = {
+    "context": None,
+}
+
+
+def configure(args, fields: list, jobs: int):
+    """set the options used by the workers
+
+    Args:
+        args: parsed command line options
+        fields (list): derived field declarations from the job spec
+        jobs (int): number of workers, views are rendered in process when 1
+    """
+
+    _pool["args"] = args
+    _pool["fields"] = list(fields)
+    _pool["jobs"] = max(1, jobs or 1)
+
+
+def jobs() -> int:
+    """returns the number of workers"""
+
+    return _pool["jobs"]
+
+
+def _initialize(args, fields: list):
+    """worker initializer: load the dataset and the field units
+
+    without a display, VTK renders offscreen (OSMesa) as pvbatch does
+    """
+
+    if not os.environ.get("DISPLAY"):
+        os.environ.setdefault("VTK_DEFAULT_OPENGL_WINDOW", "vtkOSOpenGLRenderWindow")
+
+    from .cli import prepare
+    from . import expressions
+
+    context = prepare(args)
+    expressions.configure(fields, context["fieldunits"], context["ureg"])
+    _worker["context"] = context
+
+
+def _geometry(factor: int, compact: bool, axis: bool):
+    """returns the geometry of views in a worker, built once (see view.viewGeometry)
+
+    Args:
+        factor (int): deformation factor, None for the undeformed geometry
+        compact (bool): store derived fields in float32
+        axis (bool): axisymmetric dataset
+    """
+
+    from . import cache
+    from .view import deformed, viewGeometry
+
+    context = _worker["context"]
+    geometry = viewGeometry(context["reader"], context["dim"], axis, compact)
+    if factor is not None:
+        geometry = cache.get(deformed, geometry, factor=factor)
+    return geometry
+
+
+def _render(task: dict) -> list[str]:
+    """worker: render a view group
+
+    Args:
+        task (dict): view group and rendering options (see render)
+
+    Returns:
+        tuple: fields rendered, views recorded (see viewcache.take)
+    """
+
+    context = _worker["context"]
+    geometry = _geometry(task["factor"], task["compact"], task["axis"])
+    blockdata = dict.fromkeys(task["blocks"])
+    options = {
+        "suffix": task["suffix"],
+        "addruler": task["addruler"],
+        "background": task["background"],
+        "customRangeHisto": task["customRangeHisto"],
+        "deformedfactor": task["deformedfactor"],
+        "combine": task["combine"],
+    }
+    if task["kind"] == "2D":
+        from .case2D.display2D import makeviews
+
+        makeviews(
+            argparse.Namespace(raster=task["raster"]),
+            geometry,
+            blockdata,
+            task["fields"],
+            context["fieldunits"],
+            context["basedir"],
+            **options,
+        )
+    else:
+        from .case3D.display3D import renderGroup
+
+        renderGroup(
+            geometry,
+            blockdata,
+            task["kind"],
+            task["value"],
+            task["fields"],
+            context["fieldunits"],
+            context["basedir"],
+            family=task["family"],
+            **options,
+        )
+    return ([field for (field, color) in task["fields"]], viewcache.take())
+
+
+def render(
+    groups: list[dict],
+    blockdata: dict,
+    factor: int = None,
+    suffix: str = None,
+    compact: bool = False,
+    axis: bool = False,
+    addruler: bool = False,
+    background: bool = False,
+    customRangeHisto: bool = False,
+    raster: bool = False,
+    deformedfactor: int = None,
+    combine: list[str] = None,
+):
+    """render view groups in the worker pool
+
+    workers render the geometry of the views (derived fields as in process, see
+    view.viewGeometry, deformed by factor) of the dataset they load, filenames are those of makeviews; each worker cuts
+    the slices of a kind at once (see scheduler.families) and warps them for
+    the paired deformed views (see display3D.renderGroup)
+
+    Args:
+        groups (list[dict]): view groups (see scheduler.schedule)
+        blockdata: blockdata from meshinfo
+        factor (int, optional): deformation factor. Defaults to None.
+        suffix (str, optional):  None or -deformed. Defaults to None.
+        compact (bool, optional): store derived fields in float32. Defaults to False.
+        axis (bool, optional): axisymmetric dataset (see view.viewGeometry). Defaults to False.
+        addruler (bool, optional): add ruler to view. Defaults to False.
+        background (bool, optional): transparent background (& text black). Defaults to False.
+        customRangeHisto (bool, optional):  create custom range from field histogram. Defaults to False.
+        raster (bool, optional): rasterize 2D views (see display2D.rasterField). Defaults to False.
+        deformedfactor (int, optional): factor of the paired deformed views. Defaults to None.
+        combine (list[str], optional): "sidebyside", "overlay" views of pairs. Defaults to None.
+    """
+
+    # histograms read by customRangeHisto are written by the writer thread
+    writer.sync()
+
+    if _pool["pool"] is None:
+        context = multiprocessing.get_context("spawn")
+        _pool["pool"] = context.Pool(
+            _pool["jobs"],
+            initializer=_initialize,
+            initargs=(_pool["args"], _pool["fields"]),
+        )
+
+    families = scheduler.families(groups)
+    tasks = [
+        {
+            **task,
+            "family": families.get(task["kind"]),
+            "blocks": list(blockdata.keys()),
+            "factor": factor,
+            "suffix": suffix,
+            "compact": compact,
+            "axis": axis,
+            "addruler": addruler,
+            "background": background,
+            "customRangeHisto": customRangeHisto,
+            "raster": raster,
+            "deformedfactor": deformedfactor,
+            "combine": combine,
+        }
+        for task in scheduler.tasks(groups, _pool["jobs"])
+    ]
+    print(f"Render {len(tasks)} view tasks with {_pool['jobs']} workers", flush=True)
+    for fields, recorded in _pool["pool"].imap_unordered(_render, tasks):
+        viewcache.merge(recorded)
+        print(f"rendered: {fields}", flush=True)
+
+
+def close():
+    """stop the workers"""
+
+    if _pool["pool"] is not None:
+        _pool["pool"].close()
+        _pool["pool"].join()
+        _pool["pool"] = None
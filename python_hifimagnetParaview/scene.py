@@ -0,0 +1,381 @@
+import json
+import struct
+
+import numpy as np
+
+# interactive scene export: one decimated surface per case with its fields,
+# saved as binary glTF (.glb), viewable in web viewers (eg. three.js, babylon.js)
+#
+# the scene is packed compactly:
+#   positions: 16 bits per coordinate (KHR_mesh_quantization), node translation
+#       and scale restore the coordinates
+#   fields: 16 bits per value, two fields per vertex attribute (_FIELDS0, ...),
+#       0 for vertices without data (eg. excluded blocks)
+#   COLOR_0: colors of the first field ("Rainbow Uniform", see raster.colormap)
+# field ranges, units and decoding are given in the scene extras
+
+# glTF constants
+_ARRAY_BUFFER = 34962
+_ELEMENT_ARRAY_BUFFER = 34963
+_UNSIGNED_BYTE = 5121
+_UNSIGNED_SHORT = 5123
+_UNSIGNED_INT = 5125
+
+
+def quantize(values):
+    """quantize values on 16 bits, 0 is reserved for NaN
+
+    a value is restored from the normalized attribute n (q / 65535) as
+    scale * n + offset
+
+    Args:
+        values: array of values
+
+    Returns:
+        tuple: (uint16 array, {min, max, scale, offset})
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    valid = np.isfinite(values)
+    (lo, hi) = (0.0, 0.0)
+    if valid.any():
+        (lo, hi) = (float(values[valid].min()), float(values[valid].max()))
+    span = hi - lo if hi > lo else 1.0
+
+    q = np.zeros(values.shape, dtype=np.uint16)
+    q[valid] = 1 + np.round((values[valid] - lo) / span * 65534).astype(np.uint16)
+    decoding = {
+        "min": lo,
+        "max": hi,
+        "scale": span * 65535 / 65534,
+        "offset": lo - span / 65534,
+    }
+    return q, decoding
+
+
+def glb(
+    points,
+    triangles,
+    fields: dict,
+    units: dict = None,
+    color: str = None,
+) -> bytes:
+    """returns a binary glTF of a triangulated surface and its fields
+
+    Args:
+        points: (n, 3) vertex coordinates
+        triangles: (m, 3) vertex indices of triangles
+        fields (dict): field name -> (n,) values per vertex
+        units (dict, optional): field name -> units of values. Defaults to None.
+        color (str, optional): field of COLOR_0, the first field if None. Defaults to None.
+
+    Returns:
+        bytes: glb file content
+    """
+
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    triangles = np.asarray(triangles).reshape(-1, 3)
+    names = list(fields)
+    npoints = len(points)
+
+    chunks = []
+    views = []
+    accessors = []
+
+    def add(data: bytes, target: int, stride: int = None) -> int:
+        offset = sum(len(chunk) for chunk in chunks)
+        chunks.append(data + b"\x00" * (-len(data) % 4))
+        view = {"buffer": 0, "byteOffset": offset, "byteLength": len(data)}
+        if target is not None:
+            view["target"] = target
+        if stride is not None:
+            view["byteStride"] = stride
+        views.append(view)
+        return len(views) - 1
+
+    def accessor(view: int, component: int, count: int, kind: str, **kwargs) -> int:
+        accessors.append(
+            {
+                "bufferView": view,
+                "componentType": component,
+                "count": count,
+                "type": kind,
+                **kwargs,
+            }
+        )
+        return len(accessors) - 1
+
+    # positions: uint16 padded to 8 bytes per vertex (4 bytes alignment)
+    (lo, hi) = (points.min(axis=0), points.max(axis=0))
+    extent = np.where(hi > lo, hi - lo, 1.0)
+    position = np.zeros((npoints, 4), dtype=np.uint16)
+    position[:, :3] = np.round((points - lo) / extent * 65535)
+    attributes = {
+        "POSITION": accessor(
+            add(position.astype("<u2").tobytes(), _ARRAY_BUFFER, 8),
+            _UNSIGNED_SHORT,
+            npoints,
+            "VEC3",
+            normalized=True,
+            min=[float(v) for v in position[:, :3].min(axis=0) / 65535],
+            max=[float(v) for v in position[:, :3].max(axis=0) / 65535],
+        )
+    }
+
+    # fields: two per attribute
+    extras = {"fields": {}}
+    for i in range(0, len(names), 2):
+        packed = np.zeros((npoints, 2), dtype=np.uint16)
+        attribute = f"_FIELDS{i // 2}"
+        for j, name in enumerate(names[i : i + 2]):
+            (packed[:, j], decoding) = quantize(fields[name])
+            extras["fields"][name] = {
+                "attribute": attribute,
+                "component": j,
+                "units": (units or {}).get(name, ""),
+                **decoding,
+            }
+        attributes[attribute] = accessor(
+            add(packed.astype("<u2").tobytes(), _ARRAY_BUFFER, 4),
+            _UNSIGNED_SHORT,
+            npoints,
+            "VEC2",
+            normalized=True,
+        )
+
+    if names:
+        from .raster import colormap
+
+        color = color if color in fields else names[0]
+        decoding = extras["fields"][color]
+        values = np.asarray(fields[color], dtype=np.float64)
+        rgba = np.zeros((npoints, 4), dtype=np.uint8)
+        rgba[:, :3] = np.round(
+            colormap(np.nan_to_num(values), decoding["min"], decoding["max"]) * 255
+        )
+        rgba[:, 3] = 255
+        attributes["COLOR_0"] = accessor(
+            add(rgba.tobytes(), _ARRAY_BUFFER, 4),
+            _UNSIGNED_BYTE,
+            npoints,
+            "VEC4",
+            normalized=True,
+        )
+        extras["color"] = color
+
+    if npoints < 65536:
+        indices = (triangles.astype("<u2").tobytes(), _UNSIGNED_SHORT)
+    else:
+        indices = (triangles.astype("<u4").tobytes(), _UNSIGNED_INT)
+    index = accessor(
+        add(indices[0], _ELEMENT_ARRAY_BUFFER), indices[1], triangles.size, "SCALAR"
+    )
+
+    binary = b"".join(chunks)
+    document = {
+        "asset": {"version": "2.0", "generator": "python_hifimagnetParaview"},
+        "extensionsUsed": ["KHR_mesh_quantization"],
+        "extensionsRequired": ["KHR_mesh_quantization"],
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [
+            {
+                "mesh": 0,
+                "translation": [float(v) for v in lo],
+                "scale": [float(v) for v in extent],
+            }
+        ],
+        "meshes": [
+            {
+                "primitives": [
+                    {"attributes": attributes, "indices": index, "material": 0}
+                ]
+            }
+        ],
+        "materials": [
+            {
+                "pbrMetallicRoughness": {"metallicFactor": 0.0, "roughnessFactor": 1.0},
+                "doubleSided": True,
+            }
+        ],
+        "buffers": [{"byteLength": len(binary)}],
+        "bufferViews": views,
+        "accessors": accessors,
+        "extras": extras,
+    }
+
+    content = json.dumps(document, separators=(",", ":")).encode()
+    content += b" " * (-len(content) % 4)
+    length = 12 + 8 + len(content) + 8 + len(binary)
+    return b"".join(
+        [
+            struct.pack("<4sII", b"glTF", 2, length),
+            struct.pack("<I4s", len(content), b"JSON"),
+            content,
+            struct.pack("<I4s", len(binary), b"BIN\x00"),
+            binary,
+        ]
+    )
+
+
+def save(
+    filename: str,
+    points,
+    triangles,
+    fields: dict,
+    units: dict = None,
+    color: str = None,
+):
+    """save a scene as binary glTF (see glb), in background if the writer is started"""
+
+    from .writer import submit, writeBytes
+
+    data = glb(points, triangles, fields, units, color)
+    print(
+        f"scene: {len(points)} points, {len(triangles)} triangles, "
+        f"{len(fields)} fields, {len(data) / 1024**2:.1f} MB -> {filename}",
+        flush=True,
+    )
+    submit(filename, writeBytes, filename, data)
+
+
+# script of the scene export (see exportScene): blocks are surfaced, triangulated
+# and decimated where the data are, the triangle budget is shared by the mpi
+# ranks in proportion of their triangles
+#   fields: names of the fields exported, CellData are converted to PointData
+#   triangles: triangle budget
+_sceneScript = """
+import numpy
+from vtkmodules.vtkCommonCore import vtkDoubleArray
+from vtkmodules.vtkCommonDataModel import vtkPolyData
+from vtkmodules.vtkFiltersCore import (
+    vtkAppendPolyData,
+    vtkCellDataToPointData,
+    vtkTriangleFilter,
+    vtkDecimatePro,
+)
+from vtkmodules.vtkFiltersGeometry import vtkDataSetSurfaceFilter
+from vtkmodules.vtkParallelCore import vtkMultiProcessController
+from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+
+fields = {fields!r}
+budget = {triangles}
+
+blocks = [inputs[0]]
+if inputs[0].VTKObject.IsA("vtkCompositeDataSet"):
+    blocks = list(inputs[0])
+
+meshes = []
+for block in blocks:
+    if block.GetNumberOfCells() == 0:
+        continue
+    pointdata = vtkCellDataToPointData()
+    pointdata.SetInputData(block.VTKObject)
+    surface = vtkDataSetSurfaceFilter()
+    surface.SetInputConnection(pointdata.GetOutputPort())
+    triangle = vtkTriangleFilter()
+    triangle.SetInputConnection(surface.GetOutputPort())
+    triangle.PassVertsOff()
+    triangle.PassLinesOff()
+    triangle.Update()
+    if triangle.GetOutput().GetNumberOfPolys():
+        meshes.append(triangle.GetOutput())
+
+# triangles of all the ranks
+total = sum(mesh.GetNumberOfPolys() for mesh in meshes)
+controller = vtkMultiProcessController.GetGlobalController()
+if controller is not None and controller.GetNumberOfProcesses() > 1:
+    counts = vtkDoubleArray()
+    controller.AllGather(numpy_to_vtk(numpy.array([float(total)]), deep=True), counts)
+    total = vtk_to_numpy(counts).sum()
+
+# blocks are decimated by the same ratio, arrays missing in a block are NaN
+append = vtkAppendPolyData()
+for mesh in meshes:
+    if total > budget:
+        decimate = vtkDecimatePro()
+        decimate.SetInputData(mesh)
+        decimate.SetTargetReduction(1 - budget / total)
+        decimate.PreserveTopologyOff()
+        decimate.BoundaryVertexDeletionOn()
+        decimate.Update()
+        mesh = decimate.GetOutput()
+
+    # only the triangles and the fields are kept for the client
+    triangles = vtkPolyData()
+    triangles.SetPoints(mesh.GetPoints())
+    triangles.SetPolys(mesh.GetPolys())
+    for name in fields:
+        array = mesh.GetPointData().GetArray(name)
+        data = numpy.full(mesh.GetNumberOfPoints(), numpy.nan)
+        if array is not None:
+            data = vtk_to_numpy(array).astype(numpy.float64)
+            if data.ndim > 1:
+                data = numpy.linalg.norm(data, axis=1)
+        values = numpy_to_vtk(data, deep=True)
+        values.SetName(name)
+        triangles.GetPointData().AddArray(values)
+    append.AddInputData(triangles)
+
+if meshes:
+    append.Update()
+    output.VTKObject.ShallowCopy(append.GetOutput())
+"""
+
+
+def exportScene(
+    input,
+    filename: str,
+    fields: list[str],
+    fieldunits: dict,
+    triangles: int = 200000,
+    color: str = None,
+    printed: bool = True,
+):
+    """export a decimated surface of input with its fields (see glb)
+
+    Args:
+        input: paraview reader
+        filename (str): glb file name
+        fields (list[str]): fields exported
+        fieldunits (dict): dict of field units
+        triangles (int, optional): triangle budget. Defaults to 200000.
+        color (str, optional): field of the scene colors. Defaults to None.
+        printed (bool, optional): Defaults to True.
+    """
+
+    from paraview.simple import ProgrammableFilter
+
+    from .method import keyinfo, gatherSurface
+
+    units = {}
+    for field in fields:
+        (toolbox, physic, fieldname) = keyinfo(field)
+        if fieldname in fieldunits:
+            units[field] = f'{fieldunits[fieldname]["Units"][0]:~P}'
+
+    exportscene = ProgrammableFilter(registrationName="Scene", Input=input)
+    exportscene.OutputDataSetType = "vtkPolyData"
+    exportscene.Script = _sceneScript.format(
+        fields=list(fields), triangles=int(triangles)
+    )
+    if not printed:
+        for prop in exportscene.ListProperties():
+            print(
+                f"Scene: {prop}={exportscene.GetPropertyValue(prop)}",
+                flush=True,
+            )
+    exportscene.UpdatePipeline()
+
+    # the scene is saved once, from the client
+    (points, polys, PointData, CellData) = gatherSurface(exportscene)
+    if len(polys):
+        save(
+            filename,
+            points,
+            polys,
+            {field: PointData[field] for field in fields},
+            units=units,
+            color=color,
+        )
+    return exportscene
@@ -0,0 +1,101 @@
+# view scheduling: view requests are grouped by slice and camera so that each
+# slice is cut once and rendered for all fields
+#   request: {kind, value, field, color}
+#       kind: "3D" (1/4 cut out), "2D", "OxOy" (value: z) or "OrOz" (value: theta)
+#   group: {kind, value, fields: [(field, color)]}
+#   task: a group or a part of a group fields, rendered by a worker (see renderpool)
+#   family: values of the groups of a slice kind, cut in one pass (see families)
+
+
+def requests(
+    fields: list[tuple], z: list[float] = None, theta: list = None, kind: str = "3D"
+) -> list:
+    """returns the view requests of fields, field by field (as makeview)
+
+    Args:
+        fields (list[tuple]): (field, color) to display
+        z (list[float], optional): OxOy slices. Defaults to None.
+        theta (list, optional): OrOz slices. Defaults to None.
+        kind (str, optional): view of the whole geometry, "3D" or "2D". Defaults to "3D".
+
+    Returns:
+        list[dict]: view requests
+    """
+
+    slices = [(kind, None)]
+    slices += [("OxOy", value) for value in z or []]
+    slices += [("OrOz", value) for value in theta or []]
+
+    views = []
+    for field, color in fields:
+        for kind, value in slices:
+            views.append({"kind": kind, "value": value, "field": field, "color": color})
+    return views
+
+
+def schedule(views: list[dict]) -> list[dict]:
+    """group view requests by slice and camera, in order of first request
+
+    Args:
+        views (list[dict]): view requests
+
+    Returns:
+        list[dict]: groups {kind, value, fields}, a field is rendered once per group
+    """
+
+    groups = {}
+    for view in views:
+        key = (view["kind"], view["value"])
+        if key not in groups:
+            groups[key] = {"kind": view["kind"], "value": view["value"], "fields": []}
+        item = (view["field"], view["color"])
+        if item not in groups[key]["fields"]:
+            groups[key]["fields"].append(item)
+    return list(groups.values())
+
+
+def families(groups: list[dict]) -> dict:
+    """returns the slice values of groups by kind, cut together (see view.makeslices)
+
+    Args:
+        groups (list[dict]): view groups (see schedule)
+
+    Returns:
+        dict: kind -> values of the OxOy and OrOz groups, in order
+    """
+
+    values = {}
+    for group in groups:
+        if group["kind"] in ("OxOy", "OrOz"):
+            values.setdefault(group["kind"], []).append(group["value"])
+    return values
+
+
+def tasks(groups: list[dict], jobs: int) -> list[dict]:
+    """split groups so that jobs workers have work
+
+    groups are kept whole when there are enough of them, otherwise the fields
+    of each group are split in parts proportionally to its size: a slice is
+    then cut by several workers
+
+    Args:
+        groups (list[dict]): view groups (see schedule)
+        jobs (int): number of workers
+
+    Returns:
+        list[dict]: groups {kind, value, fields}, largest first
+    """
+
+    total = sum(len(group["fields"]) for group in groups)
+    if len(groups) >= jobs or total <= len(groups):
+        parts = groups
+    else:
+        parts = []
+        for group in groups:
+            fields = group["fields"]
+            count = min(len(fields), max(1, -(-jobs * len(fields) // total)))
+            for i in range(count):
+                first = i * len(fields) // count
+                last = (i + 1) * len(fields) // count
+                parts.append({**group, "fields": fields[first:last]})
+    return sorted(parts, key=lambda part: len(part["fields"]), reverse=True)
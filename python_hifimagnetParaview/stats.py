@@ -1,18 +1,21 @@
 import pandas as pd
 import os
+import math
 
 from tabulate import tabulate
 
 from paraview.simple import (
     DescriptiveStatistics,
-    Delete,
     ExportView,
+    ProgrammableFilter,
     CreateView,
     Show,
 )
 
+from . import profiling, arena, moments
 from .method import convert_data, resultinfo, keyinfo
 from .histo import getresultHisto
+from .writer import toCSV
 
 
 def createTable(file: str, key: str, name: str, verbose: bool = False):
@@ -35,7 +38,8 @@ def createTable(file: str, key: str, name: str, verbose: bool = False):
 
     # drop following keys
     csv.rename(columns={"Block Name": "BlockName"}, inplace=True)
-    dropped_keys = ["Row ID", "Cardinality", "Kurtosis", "Skewness", "Sum", "Variance"]
+    # keep Cardinality to be able to merge stats (see mergeStats)
+    dropped_keys = ["Row ID", "Kurtosis", "Skewness", "Sum", "Variance"]
     csv.drop(columns=dropped_keys, inplace=True)
 
     # print("createTable: post-process stats table", flush=True)
@@ -59,6 +63,46 @@ def createTable(file: str, key: str, name: str, verbose: bool = False):
     return stats_
 
 
+def mergeStats(partials: list[pd.DataFrame], name: str) -> pd.DataFrame:
+    """merge statistics tables computed on disjoint parts
+
+    M2, M3 and M4 are the centered sums of DescriptiveStatistics,
+    they are combined with the pairwise update formulas from Pebay (2008),
+    weighted statistics by their total weight (see moments.merge).
+
+    Args:
+        partials (list[pd.DataFrame]): statistics tables (see createTable)
+        name (str): name of the merged table
+
+    Returns:
+        pd.DataFrame: merged statistics table
+    """
+
+    merged = {}
+    for partial in partials:
+        for _, row in partial.iterrows():
+            variable = row["Variable"]
+            stat = {
+                column: float(row[column])
+                for column in ["Cardinality", "Minimum", "Maximum", "Mean"]
+                + ["M2", "M3", "M4"]
+            }
+            if "Weight" in row and not pd.isna(row["Weight"]):
+                stat["Weight"] = float(row["Weight"])
+            if variable in merged:
+                stat = moments.merge(merged[variable], stat)
+            merged[variable] = stat
+
+    for variable, stat in merged.items():
+        n = stat["Cardinality"]
+        # same estimator as DescriptiveStatistics (SampleEstimate)
+        stat["Standard Deviation"] = math.sqrt(stat["M2"] / (n - 1)) if n > 1 else 0.0
+        stat["Variable"] = variable
+        stat["Name"] = name
+
+    return pd.DataFrame(list(merged.values()))
+
+
 def createStatsTable(
     stats: list, name: str, fieldunits: dict, basedir: str, ureg, verbose: bool = False
 ) -> pd.DataFrame:
@@ -231,7 +275,6 @@ def createStatsTable(
                     tabulate(df, headers="keys", tablefmt="psql", showindex=False),
                     flush=True,
                 )
-            df.to_csv(f"{basedir}/stats/{key}-descriptivestats.csv")
             dfs.append(df)
 
     total_df = pd.DataFrame()
@@ -241,13 +284,12 @@ def createStatsTable(
             tabulate(total_df, headers="keys", tablefmt="psql", showindex=False),
             flush=True,
         )
-        total_df.to_csv(f"{basedir}/stats/{name}-descriptivestats.csv")
+        toCSV(total_df, f"{basedir}/stats/{name}-descriptivestats.csv")
 
         # remove temporary csv files
         for datatype in _dataset:
             for key in _dataset[datatype]:
                 try:
-                    os.remove(f"{basedir}/stats/{key}-descriptivestats.csv")
                     os.remove(f"{basedir}/stats/{name}-{key}-descriptivestats.csv")
                 except:
                     pass
@@ -255,6 +297,135 @@ def createStatsTable(
     return total_df
 
 
+def statsWeights(input, dim: int, AttributeMode: str) -> str:
+    """returns the weights of the statistics of input
+
+    CellData are weighted by the cell measure (AxiVolume for Axi), PointData by
+    the lumped nodal measure (see method.createNodalMeasure)
+
+    Args:
+        input: paraview reader
+        dim (int): geometry dimmension
+        AttributeMode (str): "Point Data" or "Cell Data"
+
+    Returns:
+        str: name of the weights, None if input has no measure
+    """
+
+    grandeur = "Area" if dim == 2 else "Volume"
+    if AttributeMode == "Cell Data":
+        for weights in ["AxiVolume", grandeur]:
+            if weights in input.CellData.keys():
+                return weights
+    elif f"Nodal{grandeur}" in input.PointData.keys():
+        return f"Nodal{grandeur}"
+    return None
+
+
+# script of the weighted statistics (see getresultStats): moments of key over all
+# blocks where the data are (see moments.weighted), merged over the mpi ranks and
+# stored as FieldData "WeightedStats <column>", one component per variable
+#   key, association: array and its association ("POINTS" or "CELLS")
+#   weights: cell measure or lumped nodal measure
+#   ncomponents: number of components of key (see moments.variables)
+_weightedStatsScript = """
+import numpy
+from vtkmodules.vtkCommonCore import vtkDoubleArray
+from vtkmodules.vtkParallelCore import vtkMultiProcessController
+from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+from python_hifimagnetParaview import moments
+
+key = {key!r}
+weights = {weights!r}
+variables = moments.variables(key, {ncomponents})
+
+output.VTKObject.ShallowCopy(inputs[0].VTKObject)
+blocks = [output]
+if output.VTKObject.IsA("vtkCompositeDataSet"):
+    blocks = list(output)
+
+(arrays, measures) = ([], [])
+for block in blocks:
+    data = block.PointData if {association!r} == "POINTS" else block.CellData
+    if key not in data.keys() or weights not in data.keys():
+        continue
+    arrays.append(numpy.asarray(data[key], dtype=numpy.float64))
+    measures.append(numpy.asarray(data[weights], dtype=numpy.float64))
+(values, measure) = (numpy.empty(0), numpy.empty(0))
+if arrays:
+    (values, measure) = (numpy.concatenate(arrays), numpy.concatenate(measures))
+
+# partial statistics of this rank, every rank gets the merged statistics
+local = numpy.array(
+    [
+        [stat[column] for column in moments.columns]
+        for stat in (
+            moments.weighted(moments.component(values, key, variable), measure)
+            for variable in variables
+        )
+    ]
+)
+parts = local[numpy.newaxis]
+controller = vtkMultiProcessController.GetGlobalController()
+if controller is not None and controller.GetNumberOfProcesses() > 1:
+    gathered = vtkDoubleArray()
+    controller.AllGather(numpy_to_vtk(local.ravel(), deep=True), gathered)
+    parts = vtk_to_numpy(gathered).reshape((-1,) + local.shape)
+stats = moments.reduce(parts)
+
+for block in blocks:
+    for column in moments.columns:
+        block.FieldData.append(
+            numpy.array([[stat[column] for stat in stats]]), f"WeightedStats {{column}}"
+        )
+"""
+
+
+@arena.owned("stats.weighted")
+def weightedStats(
+    input, name: str, key: str, AttributeMode: str, weights: str
+) -> pd.DataFrame:
+    """compute the weighted statistics of key
+
+    the moments are computed once in the pipeline and read back from the data
+    information (see _weightedStatsScript)
+
+    Args:
+        input: paraview reader
+        name (str): block name
+        key (str): field name
+        AttributeMode (str): "Point Data" or "Cell Data"
+        weights (str): name of the weights (see statsWeights)
+
+    Returns:
+        pd.DataFrame: statistics table with Weight (see createTable)
+    """
+
+    data = input.PointData if AttributeMode == "Point Data" else input.CellData
+    ncomponents = data[key].GetNumberOfComponents()
+
+    weightedstats = ProgrammableFilter(registrationName="WeightedStats", Input=input)
+    weightedstats.Script = _weightedStatsScript.format(
+        key=key,
+        association="POINTS" if AttributeMode == "Point Data" else "CELLS",
+        weights=weights,
+        ncomponents=ncomponents,
+    )
+    weightedstats.UpdatePipeline()
+
+    rows = []
+    for i, variable in enumerate(moments.variables(key, ncomponents)):
+        row = {"Variable": variable}
+        for column in moments.columns:
+            info = weightedstats.FieldData[f"WeightedStats {column}"]
+            row[column] = info.GetRange(i)[0]
+        row["Name"] = name
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+@profiling.profiled("stats.key")
+@arena.owned("stats.key")
 def getresultStats(
     input,
     name: str,
@@ -263,8 +434,9 @@ def getresultStats(
     basedir: str,
     printed: bool = True,
     verbose: bool = False,
+    weights: str = None,
 ) -> str:
-    """compute stats for key
+    """compute stats for key, weighted by weights (see statsWeights)
 
     Args:
         input (_type_): paraview reader
@@ -274,6 +446,7 @@ def getresultStats(
         basedir (str): result directory
         printed (bool, optional): Defaults to True.
         verbose (bool, optional): print verbose. Defaults to False.
+        weights (str, optional): name of the weights, unweighted if None. Defaults to None.
 
     Returns:
         str: csv file name
@@ -288,7 +461,9 @@ def getresultStats(
             flush=True,
         )
 
-    # if field is a vector, create a field for its norm
+    # weighted statistics are computed once, without DescriptiveStatistics
+    if weights:
+        return weightedStats(input, name, key, AttributeMode, weights)
 
     # statistics
     statistics = DescriptiveStatistics(input)
@@ -323,17 +498,11 @@ def getresultStats(
     #     for prop in export.ListProperties():
     #         print(f'ExportView: {prop}={export.GetPropertyValue(prop)}', flush=True)
 
-    Delete(descriptiveStatisticsDisplay)
-    Delete(spreadSheetView)
-    del spreadSheetView
-    Delete(statistics)
-    del statistics
-
     csv = createTable(filename, key, name, verbose)
-
     return csv
 
 
+@profiling.profiled("resultStats")
 def resultStats(
     input,
     name: str,
@@ -350,6 +519,9 @@ def resultStats(
 ) -> dict:
     """compute stats for PointData, CellData and FieldData
 
+    CellData are weighted by the cell measure, PointData by the lumped nodal
+    measure (see statsWeights)
+
     Args:
         input: paraview reader
         name (str): block name
@@ -403,6 +575,7 @@ def resultStats(
                                 AttributeMode,
                                 basedir,
                                 verbose=verbose,
+                                weights=statsWeights(input, dim, AttributeMode),
                             )
 
                             if histo:
@@ -10,7 +10,9 @@ from paraview.simple import (
     Show,
 )
 
+from . import profiling
 from .method import convert_data, resultinfo, keyinfo
+from .writer import toCSV
 
 
 def createStatsTable(
@@ -117,16 +119,17 @@ def createStatsTable(
                     print(
                         tabulate(df, headers="keys", tablefmt="psql", showindex=False)
                     )
-                df.to_csv(f"{basedir}/stats/{key}-descriptivestats-create.csv")
+                toCSV(df, f"{basedir}/stats/{key}-descriptivestats-create.csv")
                 dfs.append(df)
 
     total_df = pd.concat(dfs)
     print(tabulate(total_df, headers="keys", tablefmt="psql", showindex=False))
-    total_df.to_csv(f"{basedir}/stats/{name}-descriptiveAxistats-create.csv")
+    toCSV(total_df, f"{basedir}/stats/{name}-descriptiveAxistats-create.csv")
 
     pass
 
 
+@profiling.profiled("resultStats")
 def resultStats(
     input,
     name: str,
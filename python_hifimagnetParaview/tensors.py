@@ -0,0 +1,58 @@
+import numpy as np
+
+# derived fields of 3D tensors (see meshinfo.createTensorFields), computed in
+# one pass over the values of a block: principal values, Von Mises and Tresca
+# equivalent values and cylindrical components
+#   suffixes: names of the derived fields, appended to the tensor name
+suffixes = ["I", "II", "III", "VonMises", "Tresca", "rr", "tt", "zz"]
+
+
+def full(values):
+    """returns tensors as symmetric 3x3 matrices
+
+    Args:
+        values: (n, 9) tensors or (n, 6) symmetric tensors (XX, YY, ZZ, XY, YZ, XZ)
+
+    Returns:
+        np.ndarray: (n, 3, 3) symmetric tensors
+    """
+
+    t = np.asarray(values, dtype=np.float64)
+    if t.shape[1] == 6:
+        (xx, yy, zz, xy, yz, xz) = t.T
+        t = np.stack([xx, xy, xz, xy, yy, yz, xz, yz, zz], axis=1)
+    elif t.shape[1] != 9:
+        raise RuntimeError(f"tensors: expected 6 or 9 components, got {t.shape[1]}")
+    t = t.reshape(-1, 3, 3)
+    return 0.5 * (t + t.transpose(0, 2, 1))
+
+
+def derived(values, xyz) -> dict:
+    """returns the derived fields of tensors
+
+    Args:
+        values: (n, 9) or (n, 6) tensors (see full)
+        xyz: (n, 3) coordinates of the tensors (points or cell centers)
+
+    Returns:
+        dict: suffix -> (n,) values, I >= II >= III principal values,
+        VonMises, Tresca (I - III), rr, tt (hoop) and zz
+    """
+
+    t = full(values)
+
+    # principal values in decreasing order, one batched eigenvalue pass
+    principal = np.linalg.eigvalsh(t)[:, ::-1]
+    (s1, s2, s3) = principal.T
+    vonmises = np.sqrt(0.5 * ((s1 - s2) ** 2 + (s2 - s3) ** 2 + (s3 - s1) ** 2))
+
+    # rotation to cylindrical components
+    xyz = np.asarray(xyz, dtype=np.float64)
+    theta = np.arctan2(xyz[:, 1], xyz[:, 0])
+    (c, s) = (np.cos(theta), np.sin(theta))
+    rr = c * c * t[:, 0, 0] + 2 * c * s * t[:, 0, 1] + s * s * t[:, 1, 1]
+    tt = s * s * t[:, 0, 0] - 2 * c * s * t[:, 0, 1] + c * c * t[:, 1, 1]
+
+    return dict(
+        zip(suffixes, [s1, s2, s3, vonmises, s1 - s3, rr, tt, t[:, 2, 2].copy()])
+    )
@@ -6,11 +6,38 @@ from paraview.simple import (
     Clip,
     Slice,
     WarpByVector,
+    ProgrammableFilter,
     UpdatePipeline,
 )
-from paraview import servermanager as sm
 
+from . import cache
 from .method import getbounds, invert_convert_data
+from .writer import sync
+
+
+def viewGeometry(input, dim: int, axis: bool = False, compact: bool = False):
+    """returns the geometry of views: input with derived fields, built once
+
+    the same geometry is used by meshinfo, plots and views in process and by
+    the render workers (see renderpool), so that they see the same fields:
+    meshinfoAxi.derive for Axi (CellData, AxiVolume), meshinfo.derive otherwise
+
+    Args:
+        input: paraview reader
+        dim (int): geometry dimmension
+        axis (bool, optional): axisymmetric input. Defaults to False.
+        compact (bool, optional): store derived fields in float32. Defaults to False.
+
+    Returns:
+        paraview filter with derived fields (see cache.get)
+    """
+
+    if axis:
+        from .meshinfoAxi import derive
+    else:
+        from .meshinfo import derive
+
+    return cache.get(derive, input, dim, compact)
 
 
 def deformed(input, factor: float = 1, printed: bool = True):
@@ -48,7 +75,6 @@ def deformed(input, factor: float = 1, printed: bool = True):
     )
     print(f"warpByVector1: CellData={list(warpByVector1.CellData.keys())}", flush=True)
 
-    sm.Fetch(warpByVector1)
     UpdatePipeline()
     return warpByVector1
 
@@ -257,6 +283,216 @@ def makeplaneslice(input, name: str, z: float = 0.0):
     return slice1
 
 
+# script of the multi slice (see makeslices): cells crossed by each surface
+# are found in one pass (see multislice.crossed), only those are extracted
+# (vtkExtractCells) and contoured
+#   kind, values: family of surfaces (see multislice.distances)
+# the block structure is kept, each block holds the slices of its cells tagged
+# by the SliceId CellData (index of the surface in values)
+_multiSliceScript = """
+import numpy
+from vtkmodules.vtkCommonCore import VTK_INT
+from vtkmodules.vtkCommonDataModel import vtkDataObject, vtkPolyData, VTK_POLYHEDRON
+from vtkmodules.vtkFiltersCore import vtkAppendPolyData, vtkContourFilter
+
+try:
+    from vtkmodules.vtkFiltersCore import vtkExtractCells
+except ImportError:
+    # VTK < 9.3
+    from vtkmodules.vtkFiltersExtraction import vtkExtractCells
+from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+from python_hifimagnetParaview import multislice
+
+kind = {kind!r}
+values = {values!r}
+
+
+def array(data, name, vtktype=None):
+    result = numpy_to_vtk(numpy.ascontiguousarray(data), deep=1, array_type=vtktype)
+    result.SetName(name)
+    return result
+
+
+def extract(dataset, ids):
+    # only the crossed cells (and their points) are copied, the sorted ids are
+    # passed in one call (a list converts faster than a numpy or vtkIdTypeArray)
+    extraction = vtkExtractCells()
+    extraction.SetInputData(dataset)
+    extraction.SetCellIds(ids.tolist(), len(ids))
+    extraction.AssumeSortedAndUniqueIdsOn()
+    return extraction
+
+
+def cut(dataset):
+    append = vtkAppendPolyData()
+    if dataset.GetNumberOfCells() == 0:
+        return append.GetOutput()
+    work = dataset.NewInstance()
+    work.ShallowCopy(dataset)
+    d = multislice.distances(vtk_to_numpy(work.GetPoints().GetData()), kind, values)
+
+    # cells crossed by each surface, all cells for other than linear grids
+    cells = None
+    if work.IsA("vtkUnstructuredGrid"):
+        types = vtk_to_numpy(work.GetCellTypesArray())
+        if not (types == VTK_POLYHEDRON).any():
+            cells = multislice.crossed(
+                vtk_to_numpy(work.GetCells().GetOffsetsArray()),
+                vtk_to_numpy(work.GetCells().GetConnectivityArray()),
+                d,
+            )
+
+    for i in range(len(values)):
+        if cells is not None and not cells[:, i].any():
+            continue
+        work.GetPointData().AddArray(array(d[:, i], "SliceDistance"))
+        contour = vtkContourFilter()
+        if cells is None:
+            contour.SetInputData(work)
+        else:
+            crossed = extract(work, numpy.nonzero(cells[:, i])[0])
+            contour.SetInputConnection(crossed.GetOutputPort())
+        contour.SetInputArrayToProcess(
+            0, 0, 0, vtkDataObject.FIELD_ASSOCIATION_POINTS, "SliceDistance"
+        )
+        contour.SetValue(0, 0.0)
+        contour.ComputeScalarsOff()
+        contour.Update()
+
+        slice = vtkPolyData()
+        slice.ShallowCopy(contour.GetOutput())
+        slice.GetPointData().RemoveArray("SliceDistance")
+        ncells = slice.GetNumberOfCells()
+        slice.GetCellData().AddArray(
+            array(numpy.full(ncells, i, dtype=numpy.int32), "SliceId", VTK_INT)
+        )
+        append.AddInputData(slice)
+
+    if append.GetNumberOfInputConnections(0) == 0:
+        return append.GetOutput()
+    append.Update()
+    return append.GetOutput()
+
+
+source = inputs[0].VTKObject
+if not source.IsA("vtkDataObjectTree"):
+    raise RuntimeError("MultiSlice: input must be a multiblock dataset")
+output.VTKObject.ShallowCopy(source)
+iterator = output.VTKObject.NewTreeIterator()
+iterator.VisitOnlyLeavesOn()
+iterator.InitTraversal()
+while not iterator.IsDoneWithTraversal():
+    output.VTKObject.SetDataSet(iterator, cut(iterator.GetCurrentDataObject()))
+    iterator.GoToNextItem()
+"""
+
+
+def makeslices(input, name: str, kind: str, values: list[float], printed: bool = True):
+    """cut a family of slices from input dataset in a single pass
+
+    the cells are walked once for all the surfaces, instead of once per Slice
+    (see makeplaneslice, makeplaneOrOzslice, makecylinderslice);
+    a slice is then extracted with selectslice
+
+    Args:
+        input: paraview reader (multiblock)
+        name (str): name of the slices
+        kind (str): "OxOy" (z planes), "OrOz" (theta planes) or "Cylinder" (r)
+        values (list[float]): z in m, theta in degrees (as OrOz views) or r in m
+        printed (bool, optional): Defaults to True.
+
+    Returns:
+        paraview reader, slices tagged by SliceId (index in values)
+    """
+    print(f"makeslices: name={name}, kind={kind}, values={values}", flush=True)
+
+    multislice = ProgrammableFilter(registrationName=name, Input=input)
+    multislice.Script = _multiSliceScript.format(
+        kind=kind, values=[float(value) for value in values]
+    )
+
+    # get params list
+    if not printed:
+        for prop in multislice.ListProperties():
+            print(
+                f"MultiSlice: {prop}={multislice.GetPropertyValue(prop)}", flush=True
+            )
+
+    multislice.UpdatePipeline()
+    return multislice
+
+
+# script of the slice selection (see selectslice)
+#   index: SliceId of the slice
+_selectSliceScript = """
+from vtkmodules.vtkCommonDataModel import vtkDataObject
+from vtkmodules.vtkFiltersCore import vtkThreshold
+from vtkmodules.vtkFiltersGeometry import vtkGeometryFilter
+
+index = {index}
+
+output.VTKObject.ShallowCopy(inputs[0].VTKObject)
+iterator = output.VTKObject.NewTreeIterator()
+iterator.VisitOnlyLeavesOn()
+iterator.InitTraversal()
+while not iterator.IsDoneWithTraversal():
+    threshold = vtkThreshold()
+    threshold.SetInputData(iterator.GetCurrentDataObject())
+    threshold.SetInputArrayToProcess(
+        0, 0, 0, vtkDataObject.FIELD_ASSOCIATION_CELLS, "SliceId"
+    )
+    threshold.SetLowerThreshold(index - 0.5)
+    threshold.SetUpperThreshold(index + 0.5)
+    threshold.SetThresholdFunction(vtkThreshold.THRESHOLD_BETWEEN)
+    geometry = vtkGeometryFilter()
+    geometry.SetInputConnection(threshold.GetOutputPort())
+    geometry.Update()
+    slice = geometry.GetOutput()
+    slice.GetCellData().RemoveArray("SliceId")
+    output.VTKObject.SetDataSet(iterator, slice)
+    iterator.GoToNextItem()
+"""
+
+
+def selectslice(input, name: str, index: int):
+    """extract a slice cut by makeslices
+
+    Args:
+        input: slices from makeslices
+        name (str): name of the slice
+        index (int): index of the slice in the values of makeslices
+
+    Returns:
+        sliced paraview reader
+    """
+    print(f"selectslice: name={name}, index={index}", flush=True)
+
+    slice1 = ProgrammableFilter(registrationName=name, Input=input)
+    slice1.Script = _selectSliceScript.format(index=int(index))
+    slice1.UpdatePipeline()
+    return slice1
+
+
+def makefamilyslice(input, name: str, kind: str, values: list[float], value: float):
+    """extract the slice at value of a family, the family is cut once per input
+
+    the slices of the family are shared by all consumers (see cache.get)
+
+    Args:
+        input: paraview reader (multiblock)
+        name (str): name of the slice
+        kind (str): "OxOy", "OrOz" or "Cylinder" (see makeslices)
+        values (list[float]): values of the family
+        value (float): value of the slice, in values
+
+    Returns:
+        sliced paraview reader
+    """
+
+    slices = cache.get(makeslices, input, f"slices-{kind}", kind, values)
+    return selectslice(slices, name, list(values).index(value))
+
+
 def makesphereslice(
     input,
     name: str,
@@ -383,6 +619,25 @@ def setCamera(
     # print(f"help={dir(camera)}", flush=True)
 
 
+def histogramFile(filename: str) -> str:
+    """returns the histogram file used by the custom range of a view (see rangeHisto)
+
+    Args:
+        filename (str): name of futur view file
+
+    Returns:
+        str: histogram file name
+    """
+
+    histfile = filename.replace("views/", "histograms/insert-").replace(
+        ".png", "-histogram-matplotlib.csv"
+    )
+    histfile = re.sub(r"-deformed_factor\d+", "", histfile)
+    histfile = re.sub(r"-OrOz-theta=\d+deg", "", histfile)
+    histfile = re.sub(r"-OxOy-z=\d+.\d+mm", "", histfile)
+    return histfile
+
+
 def rangeHisto(field: str, fieldname: str, fieldunits: dict, filename: str) -> tuple:
     """find custom range from histogram of field
     (removes data from extremities whose area/volume is less than 0.1% of total area/volume)
@@ -397,12 +652,9 @@ def rangeHisto(field: str, fieldname: str, fieldunits: dict, filename: str) -> t
         tuple: new custom range (None if doesn't change/ hist doesn't exist)
     """
 
-    histfile = filename.replace("views/", "histograms/insert-").replace(
-        ".png", "-histogram-matplotlib.csv"
-    )
-    histfile = re.sub(r"-deformed_factor\d+", "", histfile)
-    histfile = re.sub(r"-OrOz-theta=\d+deg", "", histfile)
-    histfile = re.sub(r"-OxOy-z=\d+.\d+mm", "", histfile)
+    histfile = histogramFile(filename)
+    # histograms may still be in the background writer queue
+    sync()
     try:
         df = pd.read_csv(histfile)
     except:
@@ -0,0 +1,168 @@
+import glob
+import hashlib
+import json
+import os
+
+from . import writer
+
+# render cache: views are skipped when the image exists and its fingerprint
+# (dataset, pipeline, field, blocks, slice, color range, camera, resolution and
+# background) is the one recorded in the manifest of the views directory
+#   manifest: manifest file name, None if not configured
+#   dataset: fingerprint of the dataset and of the pipeline options
+#   force: render all views (--forceviews)
+#   entries: view file (relative to the manifest) -> fingerprint, from last runs
+#   recorded: views rendered by this run (see record)
+_viewcache = {
+    "manifest": None,
+    "dataset": None,
+    "force": False,
+    "entries": {},
+    "recorded": {},
+}
+
+
+def _digest(value) -> str:
+    """returns the sha256 of the json of value"""
+
+    data = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def dataset(filename: str) -> list:
+    """returns the stamps of the files of an Ensight case
+
+    a stamp is (name, size, modification time) of the case file, of the
+    geometry and of the variable files (time step wildcards included)
+
+    Args:
+        filename (str): case file name (ex. Export.case)
+
+    Returns:
+        list: stamps of the case files
+    """
+
+    from .estimate import readcase
+
+    case = readcase(filename)
+    dirname = os.path.dirname(filename)
+    patterns = [case["geometry"]]
+    patterns += [variable["file"] for variable in case["variables"]]
+
+    stamps = []
+    for name in [filename] + sorted(
+        {name for pattern in patterns for name in glob.glob(f"{dirname}/{pattern}")}
+    ):
+        stat = os.stat(name)
+        stamps.append((os.path.basename(name), stat.st_size, stat.st_mtime_ns))
+    return stamps
+
+
+def configure(basedir: str, filename: str, force: bool = False, **pipeline):
+    """load the manifest of basedir/views and stamp the dataset
+
+    Args:
+        basedir (str): result directory
+        filename (str): case file name (ex. Export.case)
+        force (bool, optional): render all views. Defaults to False.
+        pipeline: options changing the geometry of views (eg. cliptheta)
+    """
+
+    _viewcache["manifest"] = f"{basedir}/views/manifest.json"
+    _viewcache["dataset"] = _digest({"files": dataset(filename), **pipeline})
+    _viewcache["force"] = force
+    _viewcache["entries"] = {}
+    _viewcache["recorded"] = {}
+    if os.path.isfile(_viewcache["manifest"]):
+        with open(_viewcache["manifest"], "r") as f:
+            _viewcache["entries"] = json.load(f)
+
+
+def _name(filename: str) -> str:
+    """returns the manifest key of a view file"""
+
+    return os.path.relpath(filename, os.path.dirname(_viewcache["manifest"]))
+
+
+def stamp(filename: str) -> str:
+    """returns the sha256 of a file read by views (eg. histograms), None if missing"""
+
+    # the file may still be in the background writer queue
+    writer.sync()
+    if not os.path.isfile(filename):
+        return None
+    with open(filename, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def fingerprint(params: dict) -> str:
+    """returns the fingerprint of a view
+
+    Args:
+        params (dict): parameters of the view, json serializable (or str-able)
+
+    Returns:
+        str: fingerprint, including the dataset
+    """
+
+    return _digest({"dataset": _viewcache["dataset"], **params})
+
+
+def fresh(filename: str, key: str) -> bool:
+    """returns True if the view filename is up to date
+
+    Args:
+        filename (str): view file name
+        key (str): view fingerprint (see fingerprint)
+    """
+
+    if _viewcache["manifest"] is None or _viewcache["force"]:
+        return False
+    if not os.path.isfile(filename):
+        return False
+    return _viewcache["entries"].get(_name(filename)) == key
+
+
+def record(filename: str, key: str):
+    """record a rendered view (saved in the manifest by save)"""
+
+    if _viewcache["manifest"] is not None:
+        _viewcache["recorded"][_name(filename)] = key
+
+
+def take() -> dict:
+    """returns and forget the views recorded (eg. by a render worker)"""
+
+    recorded = _viewcache["recorded"]
+    _viewcache["recorded"] = {}
+    return recorded
+
+
+def merge(recorded: dict):
+    """add views recorded elsewhere (eg. by a render worker, see take)"""
+
+    _viewcache["recorded"].update(recorded)
+
+
+def save(errors: list = None):
+    """save the manifest with the views recorded, except those not written
+
+    Args:
+        errors (list, optional): (filename, error) of failed writes. Defaults to None.
+    """
+
+    if _viewcache["manifest"] is None or not _viewcache["recorded"]:
+        return
+
+    failed = {_name(filename) for (filename, error) in errors or []}
+    entries = dict(_viewcache["entries"])
+    for name, key in take().items():
+        if name in failed:
+            entries.pop(name, None)
+        else:
+            entries[name] = key
+    _viewcache["entries"] = entries
+
+    os.makedirs(os.path.dirname(_viewcache["manifest"]), exist_ok=True)
+    with open(_viewcache["manifest"], "w") as f:
+        json.dump(entries, f, indent=4, sort_keys=True)
@@ -0,0 +1,219 @@
+import io
+import os
+import queue
+import shutil
+import tempfile
+import threading
+
+# background writer state
+#   queue: bounded queue of pending writes (filename, func, args)
+#   thread: writer thread
+#   tmpdir: local directory for files produced by paraview
+#   errors: list of (filename, error) for failed writes
+_writer = {
+    "queue": None,
+    "thread": None,
+    "tmpdir": None,
+    "errors": [],
+}
+
+
+def _run(jobs: queue.Queue):
+    """writer thread loop: write files until None is received
+
+    Args:
+        jobs (queue.Queue): queue of pending writes
+    """
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            jobs.task_done()
+            break
+
+        (filename, func, args) = job
+        try:
+            func(*args)
+        except Exception as error:
+            _writer["errors"].append((filename, error))
+        finally:
+            jobs.task_done()
+
+
+def start(maxsize: int = 32):
+    """start the background writer
+
+    Once started, the output helpers of this module hand off finished buffers
+    (or files rendered in a local directory) to the writer thread.
+    Producers block when maxsize writes are pending.
+
+    Args:
+        maxsize (int, optional): maximum number of pending writes. Defaults to 32.
+    """
+
+    if _writer["thread"] is not None:
+        return
+
+    _writer["queue"] = queue.Queue(maxsize=maxsize)
+    _writer["tmpdir"] = tempfile.mkdtemp(prefix="hifimagnetParaview-")
+    _writer["errors"] = []
+    _writer["thread"] = threading.Thread(
+        target=_run, args=(_writer["queue"],), name="writer", daemon=True
+    )
+    _writer["thread"].start()
+
+
+def submit(filename: str, func, *args):
+    """write filename with func(*args), in background if the writer is started
+
+    Args:
+        filename (str): output file name (for error report)
+        func: function actually writing filename
+    """
+
+    if _writer["thread"] is None:
+        func(*args)
+    else:
+        _writer["queue"].put((filename, func, args))
+
+
+def writeBytes(filename: str, data: bytes):
+    """write data to filename
+
+    Args:
+        filename (str): output file name
+        data (bytes): file content
+    """
+
+    dirname = os.path.dirname(filename)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    with open(filename, "wb") as f:
+        f.write(data)
+
+
+def moveFile(src: str, filename: str):
+    """move src to filename
+
+    Args:
+        src (str): local file name
+        filename (str): output file name
+    """
+
+    dirname = os.path.dirname(filename)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    shutil.move(src, filename)
+
+
+def tmpfile(filename: str) -> str:
+    """returns a unique local file name with the same extension as filename
+
+    Args:
+        filename (str): output file name
+
+    Returns:
+        str: local file name
+    """
+
+    (fd, tmp) = tempfile.mkstemp(
+        suffix=os.path.splitext(filename)[1], dir=_writer["tmpdir"]
+    )
+    os.close(fd)
+    return tmp
+
+
+def toCSV(df, filename: str, **kwargs):
+    """save a DataFrame as csv
+
+    Args:
+        df (pd.DataFrame): data
+        filename (str): csv file name
+        kwargs: options for DataFrame.to_csv
+    """
+
+    submit(filename, writeBytes, filename, df.to_csv(**kwargs).encode())
+
+
+def saveFigure(fig, filename: str, dpi: int = 300):
+    """save a matplotlib figure, the image is rendered before the hand off
+
+    Args:
+        fig: matplotlib figure
+        filename (str): image file name
+        dpi (int, optional): resolution. Defaults to 300.
+    """
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=os.path.splitext(filename)[1][1:], dpi=dpi)
+    submit(filename, writeBytes, filename, buffer.getvalue())
+
+
+def saveScreenshot(filename: str, view, **kwargs):
+    """save a paraview screenshot, rendered to a local file then moved in background
+
+    Args:
+        filename (str): image file name
+        view: paraview render view
+        kwargs: options for SaveScreenshot
+    """
+
+    from paraview.simple import SaveScreenshot
+
+    if _writer["thread"] is None:
+        return SaveScreenshot(filename, view, **kwargs)
+
+    tmp = tmpfile(filename)
+    SaveScreenshot(tmp, view, **kwargs)
+    submit(filename, moveFile, tmp, filename)
+
+
+def saveData(filename: str, proxy, **kwargs):
+    """save paraview data (eg. stl), written to a local file then moved in background
+
+    Args:
+        filename (str): data file name
+        proxy: paraview source
+        kwargs: options for SaveData
+    """
+
+    from paraview.simple import SaveData
+
+    if _writer["thread"] is None:
+        return SaveData(filename, proxy=proxy, **kwargs)
+
+    tmp = tmpfile(filename)
+    SaveData(tmp, proxy=proxy, **kwargs)
+    submit(filename, moveFile, tmp, filename)
+
+
+def sync():
+    """wait until all pending writes are done (eg. before reading an output back)"""
+
+    if _writer["thread"] is not None:
+        _writer["queue"].join()
+
+
+def flush() -> list:
+    """wait for pending writes, stop the writer and report write errors
+
+    Returns:
+        list: list of (filename, error) for failed writes
+    """
+
+    if _writer["thread"] is None:
+        return []
+
+    _writer["queue"].put(None)
+    _writer["thread"].join()
+    shutil.rmtree(_writer["tmpdir"], ignore_errors=True)
+
+    errors = _writer["errors"]
+    for filename, error in errors:
+        print(f"writer: failed to write {filename}: {error}", flush=True)
+
+    _writer["queue"] = None
+    _writer["thread"] = None
+    _writer["tmpdir"] = None
+    _writer["errors"] = []
+    return errors
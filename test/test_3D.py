@@ -1,4 +1,5 @@
 import pytest
+import os
 import gmsh
 import re
 import json
@@ -235,3 +236,275 @@ def test_stats(file, jsonfile):
     #     assert (
     #         abs(1 - Feel_VM_min / statselastic["Minimum"].iloc[0]) < 0.01
     #     ), f'VonMisesmin: abs(1-Feel:{Feel_VM_min}/Paraview:{statselastic["Minimum"].iloc[0]}) > 0.01'
+
+
+@pytest.mark.parametrize("file,jsonfile", cases)
+def test_stats_byparts(file, jsonfile):
+
+    (cwd, basedir, ureg, distance_unit, reader) = init(file)
+
+    fieldtype = returnExportFields(jsonfile, basedir)
+    fieldunits, ignored_keys = create_dicts_fromjson(
+        fieldtype, ureg, distance_unit, basedir
+    )
+    meshinfo(reader, dim, fieldunits, ignored_keys, basedir, ureg, ComputeStats=False)
+    stats = pd.read_csv(f"{basedir}/stats/insert-descriptivestats.csv")
+    statsheat = stats[stats["Variable"] == "T [°C]"]
+
+    cellsize, blockdata, statsdict = meshinfo(
+        reader,
+        dim,
+        fieldunits,
+        ignored_keys,
+        basedir,
+        ureg,
+        ComputeStats=False,
+        byparts=True,
+    )
+    assert cellsize is None
+    stats = pd.read_csv(f"{basedir}/stats/insert-descriptivestats.csv")
+    statsheat_byparts = stats[stats["Variable"] == "T [°C]"]
+
+    for column in ["Minimum", "Mean", "Maximum"]:
+        ref = statsheat[column].iloc[0]
+        new = statsheat_byparts[column].iloc[0]
+        assert abs(1 - new / ref) < 0.01, f"T {column}: byparts:{new} != {ref}"
+
+
+@pytest.mark.parametrize("file,jsonfile", cases)
+def test_stats_compact(file, jsonfile):
+    """accuracy check of float32 derived fields against the double path"""
+
+    (cwd, basedir, ureg, distance_unit, reader) = init(file)
+
+    fieldtype = returnExportFields(jsonfile, basedir)
+    fieldunits, ignored_keys = create_dicts_fromjson(
+        fieldtype, ureg, distance_unit, basedir
+    )
+    meshinfo(reader, dim, fieldunits, ignored_keys, basedir, ureg, ComputeStats=False)
+    stats = pd.read_csv(f"{basedir}/stats/insert-descriptivestats.csv")
+
+    meshinfo(
+        reader,
+        dim,
+        fieldunits,
+        ignored_keys,
+        basedir,
+        ureg,
+        ComputeStats=False,
+        compact=True,
+    )
+    stats_compact = pd.read_csv(f"{basedir}/stats/insert-descriptivestats.csv")
+
+    assert stats["Variable"].to_list() == stats_compact["Variable"].to_list()
+    for column in ["Minimum", "Mean", "Maximum", "Standard Deviation"]:
+        ref = stats[column].to_numpy()
+        new = stats_compact[column].to_numpy()
+        # float32 relative precision and 3 digits written in csv
+        assert np.allclose(
+            new, ref, rtol=1.0e-5, atol=1.0e-3
+        ), f"{column}: compact {new} != {ref}"
+
+
+@pytest.mark.parametrize("file,jsonfile", cases)
+def test_no_fetch(file, jsonfile, monkeypatch):
+    """meshinfo and deformed must not copy the dataset to the client"""
+
+    from paraview import servermanager as sm
+    from python_hifimagnetParaview.view import deformed
+
+    def fetch(*args, **kwargs):
+        raise AssertionError("full dataset fetched to the client")
+
+    monkeypatch.setattr(sm, "Fetch", fetch)
+
+    (cwd, basedir, ureg, distance_unit, reader) = init(file)
+
+    fieldtype = returnExportFields(jsonfile, basedir)
+    fieldunits, ignored_keys = create_dicts_fromjson(
+        fieldtype, ureg, distance_unit, basedir
+    )
+    cellsize, blockdata, statsdict = meshinfo(
+        reader, dim, fieldunits, ignored_keys, basedir, ureg, ComputeStats=False
+    )
+    assert sum(block["Volume"] for block in blockdata.values()) > 0
+
+    deformed(cellsize, factor=1)
+
+
+@pytest.mark.parametrize("file,jsonfile", cases)
+def test_vectorfields(file, jsonfile):
+    """fused vector stage gives the same fields as the Calculator chains"""
+
+    from paraview.simple import CellDatatoPointData
+    from python_hifimagnetParaview.meshinfo import (
+        createVectorFields,
+        createVectorNorm,
+        rectTocylField,
+    )
+
+    (cwd, basedir, ureg, distance_unit, reader) = init(file)
+
+    pointdata = CellDatatoPointData(Input=reader)
+    keys = [
+        field.Name
+        for field in pointdata.PointData
+        if field.GetNumberOfComponents() == dim
+    ]
+    fused = createVectorFields(pointdata, keys)
+
+    for key in keys:
+        calculator = createVectorNorm(pointdata, key, key, "Point Data")
+        calculator = rectTocylField(calculator, key, key, "Point Data")
+        for field in [f"{key}norm", f"{key}_ur", f"{key}_ut", "r"]:
+            ref = calculator.PointData[field].GetRange()
+            new = fused.PointData[field].GetRange()
+            assert np.allclose(new, ref, rtol=1.0e-10), f"{field}: {new} != {ref}"
+
+
+@pytest.mark.parametrize("file,jsonfile", cases)
+def test_nodal_measure(file, jsonfile):
+    """lumped nodal measure preserves the volume of each block"""
+
+    from paraview import servermanager as sm
+    from paraview.vtk.numpy_interface import dataset_adapter as dsa
+    from python_hifimagnetParaview.meshinfo import derive
+
+    (cwd, basedir, ureg, distance_unit, reader) = init(file)
+
+    cellsize = derive(reader, dim)
+    dataset = dsa.WrapDataObject(sm.Fetch(cellsize))
+    for block in dataset:
+        nodal = np.sum(block.PointData["NodalVolume"])
+        cells = np.sum(block.CellData["Volume"])
+        assert abs(1 - nodal / cells) < 1.0e-10, f"{nodal} != {cells}"
+
+
+@pytest.mark.parametrize("file,jsonfile", cases)
+def test_arena(file, jsonfile):
+    """proxies created in a scope are released, kept and cached ones survive"""
+
+    from paraview.simple import GetSources, ExtractBlock, Calculator
+    from python_hifimagnetParaview import arena, cache
+    from python_hifimagnetParaview.view import makeclip
+
+    arena.configure()
+    (cwd, basedir, ureg, distance_unit, reader) = init(file)
+    sources = len(GetSources())
+
+    with arena.scope("test"):
+        extractBlock1 = ExtractBlock(Input=reader)
+        Calculator(Input=extractBlock1)
+        kept = arena.keep(Calculator(Input=reader))
+        clip = cache.get(makeclip, reader, "test")
+
+    assert len(GetSources()) == sources + 2
+    assert kept in GetSources().values()
+    assert clip in GetSources().values()
+    assert arena.leaks()["test"] == 2
+    cache.release()
+
+
+@pytest.mark.parametrize("file,jsonfile", cases)
+def test_analysis_core(file, jsonfile):
+    """block id, cell measure and centers are built in one pass"""
+
+    from paraview.simple import IntegrateVariables
+    from python_hifimagnetParaview.method import info, createAnalysisCore
+
+    (cwd, basedir, ureg, distance_unit, reader) = init(file)
+
+    core = createAnalysisCore(reader, dim)
+    hierarchy = info(core).GetHierarchy()
+    rootnode = hierarchy.GetRootNode()
+    blocks = hierarchy.GetNumberOfChildren(rootnode)
+    assert core.CellData["BlockId"].GetRange() == (0, blocks - 1)
+    assert core.CellData["CellCenters"].GetNumberOfComponents() == 3
+
+    volume = 0
+    for i in range(blocks):
+        child = hierarchy.GetChild(rootnode, i)
+        volume += (
+            core.GetSubsetDataInformation(0, child)
+            .GetFieldDataInformation()
+            .GetArrayInformation("Volume")
+            .GetComponentRange(0)[0]
+        )
+    # reference: volume integrated by IntegrateVariables
+    integrated = IntegrateVariables(Input=reader)
+    integrated.DivideCellDataByVolume = 0
+    integrated.UpdatePipeline()
+    total = integrated.CellData["Volume"].GetRange()[0]
+    assert abs(1 - volume / total) < 1.0e-10, f"{volume} != {total}"
+
+
+@pytest.mark.parametrize("file,jsonfile", cases)
+def test_tensorfields(file, jsonfile):
+    """principal values and cylindrical components share the tensor invariants"""
+
+    from paraview.simple import Calculator
+    from python_hifimagnetParaview.meshinfo import createTensorFields
+
+    (cwd, basedir, ureg, distance_unit, reader) = init(file)
+
+    keys = [
+        field.Name
+        for field in reader.CellData
+        if field.GetNumberOfComponents() in [6, 9]
+    ]
+    if not keys:
+        pytest.skip("no tensor in export")
+    tensors = createTensorFields(reader, keys)
+
+    for key in keys:
+        (smin, smax) = tensors.CellData[f"{key}_I"].GetRange()
+        scale = max(abs(smin), abs(smax), 1.0e-30)
+        for name, function in [
+            ("trace", f"{key}_rr+{key}_tt+{key}_zz-{key}_I-{key}_II-{key}_III"),
+            ("tresca", f"{key}_Tresca-{key}_I+{key}_III"),
+            ("order", f"min({key}_I-{key}_II,{key}_II-{key}_III)"),
+        ]:
+            calculator = Calculator(
+                Input=tensors,
+                AttributeType="Cell Data",
+                ResultArrayName=name,
+                Function=function,
+            )
+            calculator.UpdatePipeline()
+            (vmin, vmax) = calculator.CellData[name].GetRange()
+            if name == "order":
+                assert vmin >= -1.0e-10 * scale, f"{key} {name}: {vmin}"
+            else:
+                assert max(abs(vmin), abs(vmax)) < 1.0e-10 * scale, f"{key} {name}"
+
+
+@pytest.mark.parametrize("file,jsonfile", cases)
+def test_render_session(file, jsonfile):
+    """views are grouped by slice: one slice and render view for all fields"""
+
+    from paraview.simple import GetViews, GetSources
+    from python_hifimagnetParaview.case3D.display3D import makeviews
+
+    (cwd, basedir, ureg, distance_unit, reader) = init(file)
+
+    fieldtype = returnExportFields(jsonfile, basedir)
+    fieldunits, ignored_keys = create_dicts_fromjson(
+        fieldtype, ureg, distance_unit, basedir
+    )
+    cellsize, blockdata, statsdict = meshinfo(
+        reader, dim, fieldunits, ignored_keys, basedir, ureg, ComputeStats=False
+    )
+
+    (views, sources) = (len(GetViews()), len(GetSources()))
+    fields = [
+        (key, ["POINTS", key])
+        for key in ["cfpdes.heat.temperature", "cfpdes.elastic.displacement"]
+        if key in list(cellsize.PointData.keys())
+    ]
+    args = argparse.Namespace(z=[0.0], theta=None)
+    makeviews(args, cellsize, blockdata, fields, fieldunits, basedir)
+
+    for field, color in fields:
+        assert os.path.isfile(f"{basedir}/views/{field}.png")
+    assert len(GetViews()) == views
+    assert len(GetSources()) == sources
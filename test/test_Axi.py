@@ -228,3 +228,42 @@ def test_stats(file, jsonfile):
         assert (
             abs(1 - Feel_VM_min / statselastic["Minimum"].iloc[0]) < 0.01
         ), f'VonMisesmin: abs(1-Feel:{Feel_VM_min}/Paraview:{statselastic["Minimum"].iloc[0]}) > 0.01'
+
+
+@pytest.mark.parametrize("file,jsonfile", axi_cases)
+def test_view_geometry(file, jsonfile):
+    """render workers build the geometry of the serial views (see view.viewGeometry)"""
+
+    from python_hifimagnetParaview import cache, renderpool
+
+    (cwd, basedir, ureg, distance_unit, reader) = init(file)
+
+    fieldtype = returnExportFields(jsonfile, basedir)
+    fieldunits, ignored_keys = create_dicts_fromjson(
+        fieldtype, ureg, distance_unit, basedir
+    )
+    cellsize, blockdata, statsdict = meshinfo(
+        reader, dim, fieldunits, ignored_keys, basedir, ureg, ComputeStats=False
+    )
+
+    def fields(geometry):
+        return {
+            (datatype, array.Name): array.GetRange(-1)
+            for datatype, arrays in [
+                ("PointData", geometry.PointData),
+                ("CellData", geometry.CellData),
+            ]
+            for array in arrays
+        }
+
+    serial = fields(cellsize)
+    assert ("CellData", "AxiVolume") in serial
+
+    # worker geometry built from scratch
+    cache.release()
+    renderpool._worker["context"] = {"reader": reader, "dim": dim}
+    geometry = renderpool._geometry(None, False, axis)
+    assert fields(geometry).keys() == serial.keys()
+    for key, (vmin, vmax) in fields(geometry).items():
+        assert (vmin, vmax) == pytest.approx(serial[key]), key
+    cache.release()
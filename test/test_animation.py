@@ -0,0 +1,75 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from python_hifimagnetParaview import animation
+
+# unit cube split in a tetrahedron and a hexahedron (non simplex), and a triangle
+sourcepoints = [
+    [0.0, 0.0, 0.0],
+    [1.0, 0.0, 0.0],
+    [0.0, 1.0, 0.0],
+    [0.0, 0.0, 1.0],
+    [1.0, 1.0, 0.0],
+]
+offsets = [0, 4, 7]
+connectivity = [0, 1, 2, 3, 1, 4, 2]
+types = [10, 5]
+
+
+def test_weights():
+
+    points = [[0.25, 0.25, 0.25], [0.5, 0.5, 0.0], [0.0, 0.0, 0.0], [9.0, 9.0, 9.0]]
+    (ids, weights, pending) = animation.weights(
+        points, [0, 1, 0, -1], offsets, connectivity, types, sourcepoints
+    )
+
+    # weights restore the points, points out of cells get nothing
+    restored = np.einsum("pk,pkd->pd", weights, np.array(sourcepoints)[ids])
+    assert np.allclose(restored[:3], np.array(points)[:3])
+    assert np.allclose(weights.sum(axis=1), [1.0, 1.0, 1.0, 0.0])
+    assert not pending.any()
+
+    # non simplex cells are left to the cell functions
+    (ids, weights, pending) = animation.weights(
+        points[:1], [0], offsets, connectivity, [12, 5], sourcepoints
+    )
+    assert pending.tolist() == [True]
+
+
+def test_interpolate():
+
+    ids = np.array([[0, 1], [1, 2]])
+    weights = np.array([[0.5, 0.5], [0.25, 0.75]])
+
+    values = np.array([0.0, 2.0, 4.0])
+    assert np.allclose(animation.interpolate(values, ids, weights), [1.0, 3.5])
+
+    vectors = np.array([[0.0, 1.0], [2.0, 1.0], [4.0, 1.0]])
+    assert np.allclose(
+        animation.interpolate(vectors, ids, weights), [[1.0, 1.0], [3.5, 1.0]]
+    )
+
+    # markers are taken from the nearest point
+    markers = np.array([1, 2, 3])
+    assert animation.interpolate(markers, ids, weights).tolist() == [1, 3]
+
+
+def test_owners():
+
+    owner = animation.owners(offsets, connectivity, 6)
+
+    # a point shared by cells gets one of them
+    assert owner[[0, 3, 4, 5]].tolist() == [0, 0, 1, -1]
+    assert owner[1] in (0, 1) and owner[2] in (0, 1)
+
+
+def test_command():
+
+    args = animation.command("frames/%04d.png", "T.mp4", 5)
+    assert args[0] == "ffmpeg" and args[-1] == "T.mp4"
+    assert "libx264" in args
+
+    assert "-c:v" not in animation.command("frames/%04d.png", "T.gif", 5)
+    with pytest.raises(RuntimeError):
+        animation.command("frames/%04d.png", "T.avi", 5)
@@ -0,0 +1,22 @@
+from python_hifimagnetParaview import arena
+
+
+def test_leaks(monkeypatch):
+
+    monkeypatch.setitem(arena._arena, "reports", [])
+    arena._arena["reports"] += [
+        {"name": "getresultHisto", "released": ["sources/CellSize1"], "memory": None},
+        {"name": "getresultHisto", "released": [], "memory": None},
+        {"name": "plot", "released": ["sources/PlotOverLine1"], "memory": None},
+        {"name": "getresultHisto", "released": ["sources/Histogram1"], "memory": None},
+    ]
+
+    assert arena.leaks() == {"getresultHisto": 2, "plot": 1}
+
+
+def test_keep_outside_scope():
+
+    # without a running scope, keep is a no-op
+    proxy = object()
+    assert arena.keep(proxy) is proxy
+    assert arena._arena["scopes"] == []
@@ -0,0 +1,43 @@
+from python_hifimagnetParaview import cache
+
+
+def test_cache_shared(monkeypatch):
+
+    # cached objects of this test are dropped at the end (no paraview here)
+    monkeypatch.setitem(cache._cache, "proxies", {})
+    calls = []
+
+    def builder(input, name, value, invert=True):
+        calls.append((name, value, invert))
+        return [input, name, value, invert]
+
+    input = object()
+    first = cache.get(builder, input, "clip", [1.0, 2.0], invert=False)
+    second = cache.get(builder, input, "clip", [1.0, 2.0], invert=False)
+    other = cache.get(builder, input, "clip", [1.0, 2.0], invert=True)
+
+    assert first is second
+    assert other is not first
+    assert calls == [("clip", [1.0, 2.0], False), ("clip", [1.0, 2.0], True)]
+
+    # a different input gives a different filter
+    cache.get(builder, object(), "clip", [1.0, 2.0], invert=False)
+    assert len(calls) == 3
+    assert cache.size() == 3
+
+
+def test_cache_builders(monkeypatch):
+
+    # builders with the same name (eg. derive of meshinfo and meshinfoAxi)
+    monkeypatch.setitem(cache._cache, "proxies", {})
+
+    def make(tag):
+        def derive(input, dim):
+            return (tag, input, dim)
+
+        return derive
+
+    input = object()
+    assert cache.get(make("3D"), input, 2)[0] == "3D"
+    assert cache.get(make("Axi"), input, 2)[0] == "Axi"
+    assert cache.size() == 2
@@ -0,0 +1,27 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from python_hifimagnetParaview import combine
+
+
+def test_sidebyside():
+
+    left = np.full((4, 3, 3), 255, dtype=np.uint8)
+    right = np.zeros((2, 5, 4))
+    right[..., 3] = 1.0
+    image = combine.sidebyside(left, right)
+
+    # top aligned, the shorter image is padded with transparent pixels
+    assert image.shape == (4, 8, 4)
+    assert np.allclose(image[:, :3], 1.0)
+    assert np.allclose(image[:2, 3:], [0.0, 0.0, 0.0, 1.0])
+    assert np.allclose(image[2:, 3:], 0.0)
+
+
+def test_modes():
+
+    assert combine.modes(None) == []
+    assert combine.modes(["overlay", "sidebyside"]) == ["overlay", "sidebyside"]
+    with pytest.raises(RuntimeError):
+        combine.modes(["blend"])
@@ -0,0 +1,117 @@
+import struct
+import argparse
+
+import pytest
+
+from python_hifimagnetParaview import estimate
+
+case = """FORMAT
+type: ensight gold
+
+GEOMETRY
+model: Export.geo
+
+VARIABLE
+scalar per node: heat.temperature heat.temperature.scl
+vector per element: elasticity.displacement elasticity.displacement.vec
+tensor symm per element: elasticity.strain elasticity.strain.ten
+"""
+
+
+def args(**kwargs) -> argparse.Namespace:
+    flags = {
+        "stats": True,
+        "histos": False,
+        "views": False,
+        "plots": False,
+        "r": None,
+        "z": None,
+        "theta": None,
+        "dryrun": True,
+    }
+    flags.update(kwargs)
+    return argparse.Namespace(**flags)
+
+
+def string(text: str) -> bytes:
+    return text.encode().ljust(80, b"\x00")
+
+
+def binary(nodeids: bool) -> bytes:
+    data = string("C Binary") + string("geometry") + string("")
+    data += string(f"node id {'given' if nodeids else 'off'}")
+    data += string("element id off")
+    for number, name, nodes, tetras in [(1, "Conductor", 10, 4), (2, "Air", 6, 2)]:
+        data += string("part") + struct.pack("<i", number) + string(name)
+        data += string("coordinates") + struct.pack("<i", nodes)
+        values = nodes * (4 if nodeids else 3)
+        data += struct.pack(f"<{values}f", *[0.0] * values)
+        data += string("tetra4") + struct.pack("<i", tetras)
+        data += struct.pack(f"<{4 * tetras}i", *[1] * 4 * tetras)
+        data += string("nsided") + struct.pack("<i", 2)
+        data += struct.pack("<2i", 3, 4) + struct.pack("<7i", *[1] * 7)
+    return data
+
+
+@pytest.mark.parametrize("nodeids", [False, True])
+def test_binary(tmp_path, nodeids):
+
+    (tmp_path / "Export.case").write_text(case)
+    (tmp_path / "Export.geo").write_bytes(binary(nodeids))
+
+    parsed = estimate.readcase(f"{tmp_path}/Export.case")
+    parts = estimate.readgeometry(f"{tmp_path}/Export.geo")
+
+    assert [variable["type"] for variable in parsed["variables"]] == [
+        "scalar",
+        "vector",
+        "tensor",
+    ]
+    assert parts == [
+        {"part": 1, "name": "Conductor", "nodes": 10, "cells": 6},
+        {"part": 2, "name": "Air", "nodes": 6, "cells": 4},
+    ]
+
+
+def test_ascii(tmp_path):
+
+    lines = ["geometry", "", "node id assign", "element id given", "extents"]
+    lines += ["0 1", "0 1", "0 1", "part", "1", "Conductor", "coordinates", "4"]
+    lines += ["0.0"] * 12
+    lines += ["tetra4", "1", "7", "1 2 3 4"]
+    (tmp_path / "Export.geo").write_text("\n".join(lines) + "\n")
+
+    parts = estimate.readgeometry(f"{tmp_path}/Export.geo")
+    assert parts == [{"part": 1, "name": "Conductor", "nodes": 4, "cells": 1}]
+
+
+def test_dryrun(tmp_path):
+
+    (tmp_path / "Export.case").write_text(case)
+    (tmp_path / "Export.geo").write_bytes(binary(False))
+
+    report = estimate.dryrun(
+        args(file=f"{tmp_path}/Export.case", views=True, z=[0.0]), str(tmp_path)
+    )
+    work = report["work"]
+
+    # scalar, vector with 3 derived fields, tensor with 8 derived fields
+    assert work["fields"] == 1 + 4 + 9
+    assert work["stats"] == 2 * work["fields"]
+    # displacement: undeformed and deformed views, 3D and OxOy at z
+    assert work["views"] == work["fields"] * 2 * 2
+    assert report["cost"]["total"] > 0
+    assert (tmp_path / "dryrun.json").exists()
+
+
+def test_recommend():
+
+    work = {"fields": 10, "blocks": 100}
+    cost = {"memory": 4000, "block_memory": 40}
+
+    advice = estimate.recommend(work, cost, memory=8000)
+    assert advice["byparts"] and advice["compact"]
+    assert advice["memorylimit"] == 4000
+
+    advice = estimate.recommend(work, cost, memory=1.0e6)
+    assert not advice["byparts"]
@@ -0,0 +1,113 @@
+import math
+
+import pytest
+
+from python_hifimagnetParaview import expressions
+
+functions = {"sqrt": math.sqrt, "abs": abs, "exp": math.exp, "log": math.log}
+
+
+def test_dependencies():
+
+    program = expressions.build(["Q = P / 2", "P = a * b", "T_C = T - 273.15"])
+
+    assert program["outputs"] == ["P", "Q", "T_C"]
+    assert program["inputs"] == ["T", "a", "b"]
+
+    kernel = expressions.kernel(program, functions)
+    assert kernel(300.0, 2.0, 3.0) == pytest.approx((6.0, 3.0, 300.0 - 273.15))
+
+
+def test_dotted_names():
+
+    program = expressions.build(
+        ["q = sqrt(heat.temperature^2) + abs(-elasticity.stress_0)"]
+    )
+
+    assert program["inputs"] == ["elasticity.stress_0", "heat.temperature"]
+    assert expressions.kernel(program, functions)(-1.5, 2.0) == (3.5,)
+
+
+def test_units():
+
+    pint = pytest.importorskip("pint")
+    pytest.importorskip("paraview.simple")
+    ureg = pint.UnitRegistry()
+
+    fieldunits = {
+        "J": {"Units": [ureg.ampere / ureg.meter**2, ureg.ampere / ureg.mm**2]},
+        "E": {"Units": [ureg.volt / ureg.meter, ureg.volt / ureg.mm]},
+        "T": {"Units": [ureg.kelvin, ureg.kelvin], "Exclude": ["Air"]},
+    }
+    program = expressions.build(
+        [
+            "P = J·E",
+            "ratio = J / sqrt(J^2)",
+            {"name": "T_C", "expr": "T - 273.15", "units": "degC"},
+        ]
+    )
+    expressions.register(fieldunits, program, ureg)
+
+    power = (ureg.watt / ureg.meter**3).dimensionality
+    assert [unit.dimensionality for unit in fieldunits["P"]["Units"]] == [power] * 2
+    display = ureg.Quantity(1, fieldunits["P"]["Units"][1]).to("W/m**3")
+    assert display.magnitude == pytest.approx(1e9)
+    assert fieldunits["ratio"]["Units"][0].dimensionless
+    assert fieldunits["T_C"]["Units"] == [ureg.degC, ureg.degC]
+    assert fieldunits["T_C"]["Exclude"] == ["Air"]
+
+    with pytest.raises(RuntimeError):
+        expressions.register(fieldunits, expressions.build(["x = J + E"]), ureg)
+    with pytest.raises(RuntimeError):
+        expressions.register(fieldunits, expressions.build(["x = T - 273.15"]), ureg)
+
+
+def test_dotted_units():
+
+    pint = pytest.importorskip("pint")
+    pytest.importorskip("paraview.simple")
+    ureg = pint.UnitRegistry()
+
+    # fieldunits are keyed by field name, expressions use the exported names
+    fieldunits = {
+        "current_density": {
+            "Units": [ureg.ampere / ureg.meter**2, ureg.ampere / ureg.mm**2],
+            "Exclude": ["Air"],
+        },
+        "electric_field": {"Units": [ureg.volt / ureg.meter, ureg.volt / ureg.mm]},
+        "temperature": {"Units": [ureg.kelvin, ureg.degC], "Exclude": ["Isolant"]},
+    }
+    program = expressions.build(
+        [
+            "P = electric.current_density·electric.electric_field",
+            {"name": "T_C", "expr": "heat.temperature - 273.15", "units": "degC"},
+        ]
+    )
+    expressions.register(fieldunits, program, ureg)
+
+    power = (ureg.watt / ureg.meter**3).dimensionality
+    assert [unit.dimensionality for unit in fieldunits["P"]["Units"]] == [power] * 2
+    assert fieldunits["P"]["Exclude"] == ["Air"]
+    assert fieldunits["T_C"]["Exclude"] == ["Isolant"]
+
+    # inferred [K, degC]: the offset would be applied twice
+    for declaration in [
+        "T_C = heat.temperature - 273.15",
+        "dT = heat.temperature - cfpdes.heat.temperature",
+    ]:
+        with pytest.raises(RuntimeError):
+            expressions.register(fieldunits, expressions.build([declaration]), ureg)
+
+
+def test_invalid():
+
+    with pytest.raises(RuntimeError):
+        expressions.parse("P J*E")
+    with pytest.raises(RuntimeError):
+        expressions.parse("P = __import__('os')")
+    with pytest.raises(RuntimeError):
+        expressions.parse("P = J[1:2]")
+    with pytest.raises(RuntimeError):
+        expressions.parse("P = sqrt(J, E)")
+    with pytest.raises(RuntimeError):
+        expressions.build(["a = b + 1", "b = a * 2"])
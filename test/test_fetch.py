@@ -0,0 +1,17 @@
+import pathlib
+import re
+
+# sm.Fetch copies the whole dataset to the client:
+# only server side reductions (data information, IntegrateVariables) are allowed,
+# and the reduced surfaces of images and scenes (see method.gatherSurface)
+package = pathlib.Path(__file__).parent.parent / "python_hifimagnetParaview"
+
+
+def test_no_fetch():
+
+    files = {
+        str(file.relative_to(package)): len(re.findall(r"\bFetch\(", file.read_text()))
+        for file in package.rglob("*.py")
+        if re.search(r"\bFetch\(", file.read_text())
+    }
+    assert files == {"method.py": 1}, f"Fetch found in {files}"
@@ -0,0 +1,162 @@
+import argparse
+
+import pytest
+
+from python_hifimagnetParaview import jobspec
+
+
+def flags(**kwargs) -> argparse.Namespace:
+    args = {
+        "stats": False,
+        "histos": False,
+        "bins": 20,
+        "plots": False,
+        "views": False,
+        "channels": False,
+        "r": None,
+        "z": None,
+        "theta": None,
+        "field": "",
+        "plotsMarker": "",
+        "greyspace": False,
+        "show": False,
+        "transparentBG": False,
+        "customRangeHisto": False,
+        "deformedfactor": 1,
+        "compact": False,
+        "byparts": False,
+        "memorylimit": None,
+    }
+    args.update(kwargs)
+    return argparse.Namespace(**args)
+
+
+def test_shared_stages():
+
+    args = flags(stats=True, plots=True, r=[0.1], z=[0.0], views=True, channels=True)
+    stages = jobspec.plan(jobspec.normalize(jobspec.fromargs(args)))
+    ops = [stage["op"] for stage in stages]
+
+    # views and stl share the dataset, stl the deformed geometry (factor 1)
+    # and deformed views are paired with the views
+    assert ops.count("meshinfo") == 1
+    assert ops.count("derive") == 1
+    assert ops.count("deformed") == 1
+    assert ops.count("views") == 1
+    assert ops.count("stl") == 2
+
+    # dependencies are planned first
+    names = [stage["name"] for stage in stages]
+    for i, stage in enumerate(stages):
+        assert all(names.index(dep) < i for dep in stage["deps"])
+
+
+def test_deformed_factors():
+
+    args = flags(views=True, channels=True, deformedfactor=10)
+    stages = jobspec.plan(jobspec.normalize(jobspec.fromargs(args)))
+    factors = [
+        stage["params"]["factor"]
+        for stage in stages
+        if stage["op"] in ["deformed", "views"]
+    ]
+
+    assert sorted(factors) == [1, 10]
+
+
+def test_run_once():
+
+    spec = {
+        "outputs": [
+            {"kind": "plots", "r": [0.1], "z": [0.0]},
+            {"kind": "plots", "r": [0.2], "z": [0.0]},
+            {"kind": "plots", "r": [0.1], "z": [0.0]},
+        ]
+    }
+    stages = jobspec.plan(jobspec.normalize(spec))
+    calls = []
+
+    def operation(op):
+        def run(*inputs, **params):
+            calls.append(op)
+            return op
+
+        return run
+
+    ops = ["meshinfo", "derive", "pointdata", "plots"]
+    jobspec.run(stages, {op: operation(op) for op in ops})
+
+    assert calls == ["meshinfo", "derive", "pointdata", "plots", "plots"]
+
+
+def test_invalid_spec():
+
+    with pytest.raises(RuntimeError):
+        jobspec.normalize({"outputs": [{"kind": "movie"}]})
+    with pytest.raises(RuntimeError):
+        jobspec.normalize({"outputs": [{"kind": "views", "zoom": 2}]})
+    with pytest.raises(RuntimeError):
+        jobspec.normalize({"options": {"threads": 4}})
+
+
+def test_save_load(tmp_path):
+
+    spec = jobspec.normalize(jobspec.fromargs(flags(stats=True, histos=True)))
+    jobspec.save(spec, f"{tmp_path}/job.json")
+
+    assert jobspec.load(f"{tmp_path}/job.json") == spec
+
+
+def test_fields():
+
+    spec = jobspec.normalize({"fields": ["P = J·E", {"name": "T_C", "expr": "T-273"}]})
+    assert len(spec["fields"]) == 2
+
+    with pytest.raises(RuntimeError):
+        jobspec.normalize({"fields": ["P = J·"]})
+
+
+def test_scene():
+
+    args = flags(views=True, scene=50000)
+    stages = jobspec.plan(jobspec.normalize(jobspec.fromargs(args)))
+    scenes = [stage for stage in stages if stage["op"] == "scene"]
+
+    # the scene shares the derived dataset of the views
+    assert len(scenes) == 1
+    assert scenes[0]["params"]["triangles"] == 50000
+    assert [stage["op"] for stage in stages].count("derive") == 1
+
+
+def test_animation():
+
+    args = flags(animate=[], field="T", fps=10, movieformat="gif")
+    stages = jobspec.plan(jobspec.normalize(jobspec.fromargs(args)))
+    animations = [stage for stage in stages if stage["op"] == "animation"]
+
+    # animations are made on the derived dataset, never deformed
+    assert len(animations) == 1
+    assert animations[0]["deps"][0].startswith("derive")
+    assert animations[0]["params"]["fields"] == ["T"]
+    assert animations[0]["params"]["format"] == "gif"
+    assert "factor" not in animations[0]["params"]
+
+
+def test_paired_views():
+
+    args = flags(views=True, deformedfactor=5, combine=["overlay"])
+    stages = jobspec.plan(jobspec.normalize(jobspec.fromargs(args)))
+    views = [stage for stage in stages if stage["op"] == "views"]
+
+    # deformed views are warped from the views: no deformed geometry
+    assert len(views) == 1
+    assert views[0]["deps"][0].startswith("derive")
+    assert views[0]["params"]["paired"]
+    assert views[0]["params"]["factor"] == 5
+    assert views[0]["params"]["combine"] == ["overlay"]
+    assert "deformed" not in [stage["op"] for stage in stages]
+
+    # views of a job spec are either deformed or paired
+    spec = {"outputs": [{"kind": "views", "deformed": True, "paired": True}]}
+    with pytest.raises(RuntimeError):
+        jobspec.normalize(spec)
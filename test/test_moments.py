@@ -0,0 +1,81 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from python_hifimagnetParaview import moments
+
+
+def test_weighted():
+
+    values = np.array([1.0, 2.0, 4.0])
+    weights = np.array([1.0, 1.0, 2.0])
+    stat = moments.weighted(values, weights)
+
+    # a value of weight 2 counts as two values
+    ref = np.array([1.0, 2.0, 4.0, 4.0])
+    assert stat["Cardinality"] == 3
+    assert stat["Weight"] == 4.0
+    assert np.isclose(stat["Mean"], ref.mean())
+    assert np.isclose(stat["M2"] * 4 / 3, ((ref - ref.mean()) ** 2).sum())
+
+    # equal weights give the unweighted statistics
+    stat = moments.weighted(values, np.full(3, 0.5))
+    assert np.isclose(stat["Mean"], values.mean())
+    assert np.isclose(stat["M2"], ((values - values.mean()) ** 2).sum())
+    assert np.isclose(stat["Standard Deviation"], values.std(ddof=1))
+
+
+def test_merge():
+
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=100)
+    weights = rng.uniform(0.1, 2.0, size=100)
+    whole = moments.weighted(values, weights)
+    merged = moments.merge(
+        moments.weighted(values[:30], weights[:30]),
+        moments.weighted(values[30:], weights[30:]),
+    )
+
+    for column in ["Cardinality", "Weight", "Mean", "M2", "M3", "M4", "Minimum"]:
+        assert np.isclose(merged[column], whole[column]), column
+
+
+def test_component():
+
+    vectors = np.array([[3.0, 4.0, 0.0], [0.0, 0.0, 2.0]])
+
+    assert np.allclose(moments.component(vectors, "B", "B_Magnitude"), [5.0, 2.0])
+    assert np.allclose(moments.component(vectors, "B", "B_1"), [4.0, 0.0])
+    assert np.allclose(moments.component(vectors, "B", "B_Z"), [0.0, 2.0])
+    with pytest.raises(RuntimeError):
+        moments.component(vectors, "B", "B_XY")
+
+
+def test_reduce():
+
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(50, 3))
+    weights = rng.uniform(0.1, 2.0, size=50)
+    variables = moments.variables("B", 3)
+    assert variables == ["B_0", "B_1", "B_2", "B_Magnitude"]
+    assert moments.variables("T", 1) == ["T"]
+
+    # statistics of 3 ranks, one of them without data
+    def part(values, weights):
+        return [
+            [
+                moments.weighted(moments.component(values, "B", v), weights)[column]
+                for column in moments.columns
+            ]
+            for v in variables
+        ]
+
+    parts = [part(vectors[:20], weights[:20]), part(vectors[20:], weights[20:])]
+    parts.insert(1, part(np.empty((0, 3)), np.empty(0)))
+    merged = moments.reduce(parts)
+    whole = part(vectors, weights)
+
+    assert len(merged) == len(variables)
+    for stat, ref in zip(merged, whole):
+        for column, value in zip(moments.columns, ref):
+            assert np.isclose(stat[column], value), column
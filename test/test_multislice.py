@@ -0,0 +1,44 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from python_hifimagnetParaview import multislice
+
+# two unit cubes along z (hexahedra) and an empty cell
+points = [[x, y, z] for z in (0.0, 1.0, 2.0) for y in (0.0, 1.0) for x in (0.0, 1.0)]
+connectivity = [0, 1, 3, 2, 4, 5, 7, 6, 4, 5, 7, 6, 8, 9, 11, 10]
+offsets = [0, 8, 8, 16]
+
+
+def test_distances():
+
+    d = multislice.distances(points, "OxOy", [0.5, 2.0])
+    assert d.shape == (12, 2)
+    assert np.allclose(d[:, 0], np.array(points)[:, 2] - 0.5)
+
+    # OrOz planes contain Oz
+    d = multislice.distances([[0.0, 0.0, 3.0], [1.0, 0.0, 0.0]], "OrOz", [0, 90])
+    assert np.allclose(d[0], 0.0)
+    assert np.allclose(np.abs(d[1]), [1.0, 0.0])
+
+    d = multislice.distances([[3.0, 4.0, 1.0]], "Cylinder", [1.0, 5.0])
+    assert np.allclose(d, [[4.0, 0.0]])
+
+    with pytest.raises(RuntimeError):
+        multislice.distances(points, "Sphere", [1.0])
+
+
+def test_crossed():
+
+    d = multislice.distances(points, "OxOy", [0.5, 1.0, 1.5, 3.0])
+    cells = multislice.crossed(offsets, connectivity, d)
+
+    # a plane on a face crosses both cells, no plane crosses the empty cell
+    assert cells.tolist() == [
+        [True, True, False, False],
+        [False, False, False, False],
+        [False, True, True, False],
+    ]
+
+    # same result whatever the chunk of cells
+    assert (multislice.crossed(offsets, connectivity, d, chunk=1) == cells).all()
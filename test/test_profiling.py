@@ -0,0 +1,43 @@
+import json
+
+from python_hifimagnetParaview import profiling
+
+
+@profiling.profiled("inner")
+def inner(n: int) -> int:
+    return sum(range(n))
+
+
+def test_stages(tmp_path):
+
+    profiling.start()
+    with profiling.stage("outer"):
+        inner(1000)
+        inner(1000)
+    profiling.report(f"{tmp_path}/profile.json", f"{tmp_path}/trace.json")
+
+    with open(f"{tmp_path}/profile.json", "r") as f:
+        report = json.load(f)
+    paths = [record["path"] for record in report["stages"]]
+    assert paths == ["outer;inner", "outer;inner", "outer"]
+    assert report["stages"][-1]["wall"] >= report["stages"][0]["wall"]
+    calls = {stage["path"]: stage["calls"] for stage in report["summary"]}
+    assert calls == {"outer": 1, "outer;inner": 2}
+
+    with open(f"{tmp_path}/trace.json", "r") as f:
+        trace = json.load(f)
+    assert [event["name"] for event in trace["traceEvents"]] == [
+        "inner",
+        "inner",
+        "outer",
+    ]
+
+
+def test_disabled(monkeypatch):
+
+    monkeypatch.setitem(profiling._profile, "enabled", False)
+    monkeypatch.setitem(profiling._profile, "records", [])
+    assert inner(10) == 45
+    with profiling.stage("outer"):
+        pass
+    assert profiling._profile["records"] == []
@@ -0,0 +1,40 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from python_hifimagnetParaview import raster
+
+# unit square as two triangles
+points = [[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]]
+triangles = [[0, 1, 2], [0, 2, 3]]
+
+
+def test_pointdata_interpolation():
+
+    x = np.array([p[0] for p in points])
+    image = raster.rasterize(points, triangles, x, True, (41, 41))
+
+    # the square fills the image and x is interpolated linearly
+    assert not np.isnan(image).any()
+    assert np.allclose(image[20], (np.arange(41) + 0.5) / 41)
+
+
+def test_celldata_and_chunks():
+
+    image = raster.rasterize(points, triangles, [1.0, 2.0], False, (30, 60))
+    chunked = raster.rasterize(points, triangles, [1.0, 2.0], False, (30, 60), chunk=7)
+
+    # aspect ratio is kept: pixels outside the square are NaN
+    assert np.isnan(image[:, 0]).all()
+    assert set(np.unique(image[~np.isnan(image)])) == {1.0, 2.0}
+    assert np.array_equal(np.isnan(image), np.isnan(chunked))
+    assert np.allclose(image[~np.isnan(image)], chunked[~np.isnan(chunked)])
+
+
+def test_colormap():
+
+    colors = raster.colormap([0.0, 0.5, 1.0, 2.0], 0.0, 1.0)
+
+    assert colors.shape == (4, 3)
+    assert np.allclose(colors[0], raster._rainbowUniform[0, 1:])
+    assert np.allclose(colors[2], colors[3])
@@ -0,0 +1,45 @@
+import json
+import struct
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from python_hifimagnetParaview import scene
+
+
+def test_quantize():
+
+    values = np.array([1.0, 2.0, np.nan, 3.0])
+    (q, decoding) = scene.quantize(values)
+
+    # 0 is reserved for missing values
+    assert q[2] == 0 and (q[[0, 1, 3]] > 0).all()
+    restored = decoding["scale"] * q / 65535 + decoding["offset"]
+    assert np.allclose(restored[[0, 1, 3]], values[[0, 1, 3]], atol=2 / 65534)
+
+
+def test_glb():
+
+    points = [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 1]]
+    triangles = [[0, 1, 2], [0, 2, 3]]
+    fields = {name: np.arange(4.0) * (i + 1) for i, name in enumerate("TJB")}
+    data = scene.glb(points, triangles, fields, units={"T": "K"}, color="J")
+
+    (magic, version, length) = struct.unpack("<4sII", data[:12])
+    assert (magic, version, length) == (b"glTF", 2, len(data))
+    (size, kind) = struct.unpack("<I4s", data[12:20])
+    assert kind == b"JSON" and size % 4 == 0
+    document = json.loads(data[20 : 20 + size])
+
+    # three fields packed in two attributes, colors of J
+    attributes = document["meshes"][0]["primitives"][0]["attributes"]
+    assert set(attributes) == {"POSITION", "_FIELDS0", "_FIELDS1", "COLOR_0"}
+    assert document["extras"]["color"] == "J"
+    assert document["extras"]["fields"]["B"]["attribute"] == "_FIELDS1"
+    assert document["extras"]["fields"]["T"]["units"] == "K"
+
+    # vertex attributes are 4 bytes aligned
+    for view in document["bufferViews"]:
+        assert view["byteOffset"] % 4 == 0
+        assert view.get("byteStride", 4) % 4 == 0
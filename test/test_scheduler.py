@@ -0,0 +1,54 @@
+from python_hifimagnetParaview import scheduler
+
+
+def test_schedule():
+
+    fields = [("T", ["POINTS", "T"]), ("J", ["CELLS", "J"])]
+    views = scheduler.requests(fields, z=[0.0, 0.1], theta=[0, 30])
+    groups = scheduler.schedule(views)
+
+    # one group per slice and camera, each with all fields
+    assert len(views) == 2 * 5
+    assert [(group["kind"], group["value"]) for group in groups] == [
+        ("3D", None),
+        ("OxOy", 0.0),
+        ("OxOy", 0.1),
+        ("OrOz", 0),
+        ("OrOz", 30),
+    ]
+    assert all(group["fields"] == fields for group in groups)
+
+
+def test_duplicates():
+
+    fields = [("T", ["POINTS", "T"])]
+    groups = scheduler.schedule(scheduler.requests(fields + fields))
+
+    assert groups == [{"kind": "3D", "value": None, "fields": fields}]
+
+
+def test_tasks():
+
+    fields = [(f"f{i}", ["POINTS", f"f{i}"]) for i in range(6)]
+    groups = scheduler.schedule(scheduler.requests(fields, kind="2D"))
+
+    # a single group is split so that each worker has fields to render
+    tasks = scheduler.tasks(groups, 4)
+    assert len(tasks) >= 4
+    assert all(task["kind"] == "2D" for task in tasks)
+    assert sorted(item for task in tasks for item in task["fields"]) == sorted(fields)
+
+    # enough groups: groups are kept whole
+    groups = scheduler.schedule(scheduler.requests(fields, z=[0.0, 0.1]))
+    assert len(scheduler.tasks(groups, 2)) == len(groups)
+
+
+def test_families():
+
+    fields = [("T", ["POINTS", "T"])]
+    groups = scheduler.schedule(
+        scheduler.requests(fields, z=[0.0, 0.1], theta=[0, 30, 60])
+    )
+
+    # slices of a kind are cut together, the 3D view is not a family
+    assert scheduler.families(groups) == {"OxOy": [0.0, 0.1], "OrOz": [0, 30, 60]}
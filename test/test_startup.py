@@ -0,0 +1,46 @@
+import sys
+import time
+import subprocess
+
+import pytest
+
+# import-time benchmark: options parsing must not load heavy modules
+heavy_modules = ["paraview", "pandas", "pint", "matplotlib", "PIL"]
+
+
+@pytest.mark.parametrize("module", ["cli", "compare"])
+def test_import(module):
+
+    code = (
+        "import sys\n"
+        f"import python_hifimagnetParaview.{module}\n"
+        f"print([m for m in {heavy_modules} if m in sys.modules])\n"
+    )
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    elapsed = time.perf_counter() - start
+
+    assert output.stdout.strip() == "[]", f"{module} imports {output.stdout}"
+    assert elapsed < 1.0, f"import {module}: {elapsed:.2f}s > 1s"
+
+
+@pytest.mark.parametrize(
+    "command",
+    [
+        ["python_hifimagnetParaview.cli", "--help"],
+        ["python_hifimagnetParaview.cli", "3D", "--help"],
+        ["python_hifimagnetParaview.compare", "--help"],
+    ],
+)
+def test_help(command):
+
+    pytest.importorskip("argcomplete")
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m"] + command, capture_output=True, check=True
+    )
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 1.0, f"{' '.join(command)}: {elapsed:.2f}s > 1s"
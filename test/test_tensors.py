@@ -0,0 +1,46 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from python_hifimagnetParaview import tensors
+
+
+def test_diagonal():
+
+    # symmetric tensor (XX, YY, ZZ, XY, YZ, XZ) at theta = 0 and theta = 90
+    values = [[1.0, 2.0, 3.0, 0.0, 0.0, 0.0]] * 2
+    xyz = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]
+    fields = tensors.derived(values, xyz)
+
+    assert list(fields) == tensors.suffixes
+    assert np.allclose(fields["I"], 3.0)
+    assert np.allclose(fields["II"], 2.0)
+    assert np.allclose(fields["III"], 1.0)
+    assert np.allclose(fields["VonMises"], math.sqrt(3.0))
+    assert np.allclose(fields["Tresca"], 2.0)
+    assert np.allclose(fields["rr"], [1.0, 2.0])
+    assert np.allclose(fields["tt"], [2.0, 1.0])
+    assert np.allclose(fields["zz"], 3.0)
+
+
+def test_shear():
+
+    # pure shear in the xy plane, seen along the bisector: rr carries all of it
+    values = [[1.0, 1.0, 0.0, 1.0, 1.0, 0.0, 0.0, 0.0, 0.0]]
+    fields = tensors.derived(values, [[1.0, 1.0, 0.0]])
+
+    assert np.allclose([fields[s] for s in ["I", "II", "III"]], [[2.0], [0.0], [0.0]])
+    assert np.allclose(fields["VonMises"], 2.0)
+    assert np.allclose(fields["rr"], 2.0)
+    assert np.allclose(fields["tt"], 0.0)
+
+    # non symmetric tensors are symmetrized, principal values keep the trace
+    t = tensors.full([[0.0, 2.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 4.0]])
+    assert np.allclose(t[0], [[0.0, 1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 4.0]])
+    fields = tensors.derived(t.reshape(1, 9), [[1.0, 0.0, 0.0]])
+    assert fields["I"] + fields["II"] + fields["III"] == pytest.approx(4.0)
+
+    with pytest.raises(RuntimeError):
+        tensors.full([[1.0, 2.0, 3.0, 4.0]])
@@ -0,0 +1,66 @@
+import os
+
+from python_hifimagnetParaview import viewcache
+
+case = """FORMAT
+type: ensight gold
+
+GEOMETRY
+model: Export.geo
+
+VARIABLE
+scalar per node: heat.temperature heat.temperature.scl
+"""
+
+
+def dataset(tmp_path) -> str:
+    (tmp_path / "Export.case").write_text(case)
+    (tmp_path / "Export.geo").write_bytes(b"geometry")
+    (tmp_path / "heat.temperature.scl").write_bytes(b"temperature")
+    return f"{tmp_path}/Export.case"
+
+
+def test_skip_fresh_views(tmp_path):
+
+    filename = dataset(tmp_path)
+    basedir = f"{tmp_path}/paraview.exports"
+    view = f"{basedir}/views/heat.temperature.png"
+    params = {"field": "heat.temperature", "camera": {"roll": 90}}
+
+    viewcache.configure(basedir, filename)
+    key = viewcache.fingerprint(params)
+    assert not viewcache.fresh(view, key)
+
+    # rendered and written
+    os.makedirs(os.path.dirname(view))
+    open(view, "wb").close()
+    viewcache.record(view, key)
+    viewcache.save([])
+
+    viewcache.configure(basedir, filename)
+    assert viewcache.fresh(view, viewcache.fingerprint(params))
+    assert not viewcache.fresh(view, viewcache.fingerprint({**params, "roll": 0}))
+
+    # --forceviews
+    viewcache.configure(basedir, filename, force=True)
+    assert not viewcache.fresh(view, viewcache.fingerprint(params))
+
+    # updated dataset
+    (tmp_path / "heat.temperature.scl").write_bytes(b"new temperature")
+    viewcache.configure(basedir, filename)
+    assert not viewcache.fresh(view, viewcache.fingerprint(params))
+
+
+def test_failed_writes(tmp_path):
+
+    filename = dataset(tmp_path)
+    basedir = f"{tmp_path}/paraview.exports"
+    view = f"{basedir}/views/heat.temperature.png"
+
+    viewcache.configure(basedir, filename)
+    key = viewcache.fingerprint({})
+    viewcache.merge({"heat.temperature.png": key})
+    viewcache.save([(view, OSError("disk full"))])
+
+    viewcache.configure(basedir, filename)
+    assert viewcache._viewcache["entries"] == {}
@@ -0,0 +1,29 @@
+import os
+
+from python_hifimagnetParaview import writer
+
+
+def test_background_writes(tmp_path):
+
+    writer.start(maxsize=2)
+    files = [f"{tmp_path}/out/file{i}.csv" for i in range(10)]
+    for i, filename in enumerate(files):
+        writer.submit(filename, writer.writeBytes, filename, f"{i}\n".encode())
+    errors = writer.flush()
+
+    assert errors == []
+    for i, filename in enumerate(files):
+        with open(filename, "r") as f:
+            assert f.read() == f"{i}\n"
+
+
+def test_write_errors_reported_at_flush(tmp_path):
+
+    os.makedirs(f"{tmp_path}/dir")
+    writer.start()
+    writer.submit(f"{tmp_path}/dir", writer.writeBytes, f"{tmp_path}/dir", b"")
+    writer.submit(f"{tmp_path}/ok.csv", writer.writeBytes, f"{tmp_path}/ok.csv", b"")
+    errors = writer.flush()
+
+    assert [filename for filename, error in errors] == [f"{tmp_path}/dir"]
+    assert os.path.isfile(f"{tmp_path}/ok.csv")